@@ -3,12 +3,30 @@
 """
 
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import redis
 
 from .settings import settings
 
+# 同步驱动到异步驱动的映射
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """根据同步数据库URL推导异步驱动URL"""
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
 # 创建数据库引擎
 engine = create_engine(
     settings.database_url,
@@ -17,9 +35,24 @@ engine = create_engine(
     echo=settings.debug
 )
 
+# 创建异步数据库引擎（aiomysql / aiosqlite）
+async_engine = create_async_engine(
+    settings.async_database_url or get_async_database_url(settings.database_url),
+    pool_pre_ping=True,
+    pool_recycle=300,
+    echo=settings.debug
+)
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 创建异步会话工厂（提交后不过期属性，避免在事件循环中触发隐式加载）
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # 创建基础模型类
 Base = declarative_base()
 
@@ -27,7 +60,11 @@ Base = declarative_base()
 metadata = MetaData()
 
 # Redis连接
-redis_client = redis.from_url(settings.redis_url)
+redis_client = redis.from_url(
+    settings.redis_url,
+    socket_timeout=settings.redis_socket_timeout,
+    socket_connect_timeout=settings.redis_connect_timeout
+)
 
 
 def get_db():
@@ -39,6 +76,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """获取异步数据库会话"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_redis():
     """获取Redis连接"""
-    return redis_client
\ No newline at end of file
+    return redis_client
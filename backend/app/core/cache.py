@@ -0,0 +1,160 @@
+"""
+Redis读穿缓存
+
+服务层的读方法通过 @cached 声明缓存命名空间和TTL，写方法通过 @invalidates 声明需要失效的命名空间。
+失效采用命名空间版本号：写操作只需对版本号执行一次INCR，旧版本的键随TTL自然过期，无需扫描删除。
+Redis不可用时自动回退到直接查询数据库。
+"""
+
+import enum
+import functools
+import hashlib
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+import redis
+from sqlalchemy import Date, DateTime, Enum, inspect
+
+from ..config.database import redis_client
+from ..config.settings import settings
+from .metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "cache"
+
+# 缓存命名空间
+VENUES = "venues"
+CANDIDATES = "candidates"
+SCHEDULES = "schedules"
+EXAM_PRODUCTS = "exam_products"
+
+
+def _version_key(namespace: str) -> str:
+    """命名空间版本号的键"""
+    return f"{CACHE_PREFIX}:{namespace}:version"
+
+
+def build_cache_key(namespace: str, version: int, name: str, args: tuple, kwargs: dict) -> str:
+    """根据命名空间、版本号和调用参数构建缓存键"""
+    raw = json.dumps([args, kwargs], default=str, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"{CACHE_PREFIX}:{namespace}:v{version}:{name}:{digest}"
+
+
+def cached(
+    namespace: str,
+    ttl: Optional[int] = None,
+    serializer: Optional[Callable[[Any], Any]] = None,
+    deserializer: Optional[Callable[[Any], Any]] = None
+):
+    """
+    服务读方法的读穿缓存装饰器
+
+    Args:
+        namespace: 缓存命名空间，与 @invalidates 对应
+        ttl: 过期时间（秒），默认使用 settings.cache_default_ttl
+        serializer: 写入缓存前将返回值转换为可JSON序列化的数据
+        deserializer: 从缓存读取后还原返回值
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not settings.cache_enabled:
+                return func(self, *args, **kwargs)
+
+            try:
+                version = int(redis_client.get(_version_key(namespace)) or 0)
+                key = build_cache_key(namespace, version, func.__qualname__, args, kwargs)
+                hit = redis_client.get(key)
+            except redis.RedisError as e:
+                logger.warning("缓存读取失败，回退到数据库查询: %s", e)
+                return func(self, *args, **kwargs)
+
+            record_cache(namespace, hit is not None)
+            if hit is not None:
+                value = json.loads(hit)
+                return deserializer(value) if deserializer else value
+
+            result = func(self, *args, **kwargs)
+
+            try:
+                payload = serializer(result) if serializer else result
+                redis_client.set(
+                    key,
+                    json.dumps(payload, default=str, ensure_ascii=False),
+                    ex=ttl or settings.cache_default_ttl
+                )
+            except redis.RedisError as e:
+                logger.warning("缓存写入失败: %s", e)
+
+            return result
+        return wrapper
+    return decorator
+
+
+def invalidate(*namespaces: str) -> None:
+    """使指定命名空间下的所有缓存失效"""
+    if not settings.cache_enabled or not namespaces:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.incr(_version_key(namespace))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("缓存失效失败: %s", e)
+
+
+def invalidates(*namespaces: str):
+    """写方法成功返回后使指定命名空间的缓存失效"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            invalidate(*namespaces)
+            return result
+        return wrapper
+    return decorator
+
+
+def model_to_dict(instance, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """将ORM实例的列属性转换为可缓存的字典（枚举转换为枚举值）"""
+    data = {}
+    for column in inspect(instance).mapper.column_attrs:
+        if column.key in exclude:
+            continue
+        value = getattr(instance, column.key)
+        data[column.key] = value.value if isinstance(value, enum.Enum) else value
+    return data
+
+
+def models_to_dicts(instances: List[Any]) -> List[Dict[str, Any]]:
+    """批量转换ORM实例"""
+    return [model_to_dict(instance) for instance in instances]
+
+
+def dicts_to_models(model: Type) -> Callable[[List[Dict[str, Any]]], List[Any]]:
+    """生成将缓存字典还原为（游离态）ORM实例的反序列化函数"""
+    def deserializer(rows: List[Dict[str, Any]]) -> List[Any]:
+        column_types = {
+            attr.key: attr.columns[0].type for attr in inspect(model).column_attrs
+        }
+        instances = []
+        for row in rows:
+            for key, value in row.items():
+                if not value:
+                    continue
+                if isinstance(column_types.get(key), DateTime):
+                    row[key] = datetime.fromisoformat(value)
+                elif isinstance(column_types.get(key), Date):
+                    row[key] = date.fromisoformat(value)
+                elif isinstance(column_types.get(key), Enum) and column_types[key].enum_class:
+                    row[key] = column_types[key].enum_class(value)
+            instances.append(model(**row))
+        return instances
+
+    return deserializer
@@ -0,0 +1,55 @@
+"""
+跨进程事件总线
+
+服务层在事务提交后通过 publish 发布事件，事件经 Redis pub/sub 广播到所有worker进程；
+各进程内的订阅方（如考场状态推送）在启动时注册监听。
+Redis不可用时事件仅投递给本进程内通过 subscribe_local 注册的处理函数。
+"""
+
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+import redis
+
+from ..config.database import redis_client
+
+logger = logging.getLogger(__name__)
+
+EVENT_PREFIX = "events"
+
+# 事件频道
+VENUE_STATUS_CHANNEL = f"{EVENT_PREFIX}:venue_status"
+
+_local_handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = defaultdict(list)
+
+
+def subscribe_local(channel: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+    """注册本进程内的事件处理函数（Redis不可用时的回退投递）"""
+    _local_handlers[channel].append(handler)
+
+
+def unsubscribe_local(channel: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+    """注销本进程内的事件处理函数"""
+    if handler in _local_handlers[channel]:
+        _local_handlers[channel].remove(handler)
+
+
+def dispatch_local(channel: str, payload: Dict[str, Any]) -> None:
+    """将事件投递给本进程内的处理函数"""
+    for handler in list(_local_handlers[channel]):
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("事件处理失败: %s", channel)
+
+
+def publish(channel: str, payload: Dict[str, Any]) -> None:
+    """发布事件到所有worker进程"""
+    message = json.dumps(payload, default=str, ensure_ascii=False)
+    try:
+        redis_client.publish(channel, message)
+    except redis.RedisError as e:
+        logger.warning("事件发布失败，仅投递到本进程: %s", e)
+        dispatch_local(channel, json.loads(message))
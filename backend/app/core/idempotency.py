@@ -0,0 +1,47 @@
+"""
+幂等请求结果缓存
+
+客户端为一次业务操作生成幂等键（如扫码端每次扫码生成一个UUID），网络重试时携带同一个键。
+首次成功处理后将响应写入Redis，重试直接返回已保存的响应，不再访问数据库。
+Redis不可用时由业务方自行兜底（如签到通过数据库中的幂等键识别重复请求）。
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+import redis
+
+from ..config.database import redis_client
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_PREFIX = "idempotency"
+
+
+def _idempotency_key(scope: str, key: str) -> str:
+    return f"{IDEMPOTENCY_PREFIX}:{scope}:{key}"
+
+
+def get_response(scope: str, key: str) -> Optional[Dict[str, Any]]:
+    """获取幂等键对应的已保存响应"""
+    try:
+        hit = redis_client.get(_idempotency_key(scope, key))
+    except redis.RedisError as e:
+        logger.warning("幂等键读取失败: %s", e)
+        return None
+
+    return json.loads(hit) if hit is not None else None
+
+
+def save_response(scope: str, key: str, response: Dict[str, Any], ttl: Optional[int] = None) -> None:
+    """保存幂等键对应的响应"""
+    try:
+        redis_client.set(
+            _idempotency_key(scope, key),
+            json.dumps(response, default=str, ensure_ascii=False),
+            ex=ttl or settings.idempotency_ttl
+        )
+    except redis.RedisError as e:
+        logger.warning("幂等键写入失败: %s", e)
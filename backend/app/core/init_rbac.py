@@ -4,6 +4,7 @@
 from sqlalchemy.orm import Session
 from ..models.rbac import Role, Permission
 from ..models.user import User
+from .permissions import bump_permissions_version
 import hashlib
 
 
@@ -152,6 +153,7 @@ def assign_role_permissions(db: Session):
         candidate_role.permissions = candidate_permissions
     
     db.commit()
+    bump_permissions_version()
 
 
 def create_default_admin(db: Session):
@@ -177,6 +179,7 @@ def create_default_admin(db: Session):
         if super_admin_role:
             admin_user.roles.append(super_admin_role)
             db.commit()
+            bump_permissions_version()
 
 
 def init_rbac_system(db: Session):
@@ -0,0 +1,212 @@
+"""
+后台任务
+
+批量导入、报表导出等耗时操作以任务形式提交：HTTP请求只负责保存输入并登记任务，立即返回任务ID；
+任务在独立的进程池中执行，不占用API进程的事件循环。任务状态、进度、错误和取消标记保存在Redis哈希中，
+任意worker都可以查询；任务结果写入上传目录下的任务目录，供下载。
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config.database import redis_client
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+JOB_PREFIX = "jobs"
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+# 任务结果文件名
+RESULT_FILENAME = "result.json"
+
+_INT_FIELDS = ("created_by", "total", "processed", "error_count", "cancel_requested")
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_PREFIX}:{job_id}"
+
+
+def _errors_key(job_id: str) -> str:
+    return f"{JOB_PREFIX}:{job_id}:errors"
+
+
+def job_dir(job_id: str) -> str:
+    """任务的工作目录（保存上传的输入文件和结果文件）"""
+    return os.path.join(settings.upload_path, "jobs", job_id)
+
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    pipe = redis_client.pipeline()
+    pipe.hset(_job_key(job_id), mapping={key: value for key, value in fields.items() if value is not None})
+    pipe.expire(_job_key(job_id), settings.job_ttl)
+    pipe.execute()
+
+
+def create_job(job_type: str, created_by: int) -> str:
+    """登记一个待执行的任务，返回任务ID"""
+    job_id = uuid.uuid4().hex
+    os.makedirs(job_dir(job_id), exist_ok=True)
+    _update_job(
+        job_id,
+        id=job_id,
+        type=job_type,
+        status=PENDING,
+        created_by=created_by,
+        created_at=datetime.now().isoformat(),
+        total=0,
+        processed=0,
+        error_count=0,
+        cancel_requested=0
+    )
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """获取任务状态及前若干条错误"""
+    pipe = redis_client.pipeline()
+    pipe.hgetall(_job_key(job_id))
+    pipe.lrange(_errors_key(job_id), 0, -1)
+    data, errors = pipe.execute()
+    if not data:
+        return None
+
+    job = {key.decode(): value.decode() for key, value in data.items()}
+    for field in _INT_FIELDS:
+        job[field] = int(job.get(field, 0))
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    job["errors"] = [json.loads(error) for error in errors]
+    return job
+
+
+def request_cancel(job_id: str) -> Optional[Dict[str, Any]]:
+    """请求取消任务；尚未开始的任务直接标记为已取消，运行中的任务在下一次汇报进度时停止"""
+    job = get_job(job_id)
+    if not job or job["status"] in FINISHED_STATUSES:
+        return job
+
+    _update_job(job_id, cancel_requested=1)
+    if job["status"] == PENDING:
+        _update_job(job_id, status=CANCELLED, finished_at=datetime.now().isoformat())
+    return get_job(job_id)
+
+
+class JobContext:
+    """任务执行上下文，供任务处理函数汇报进度和检查取消"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.work_dir = job_dir(job_id)
+
+    def is_cancelled(self) -> bool:
+        return redis_client.hget(_job_key(self.job_id), "cancel_requested") == b"1"
+
+    def progress(self, processed: int, total: Optional[int] = None, errors: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        汇报进度
+
+        Args:
+            processed: 已处理的条数
+            total: 总条数（未知时不传）
+            errors: 本次新增的错误，只保留前 settings.job_error_preview 条，错误总数单独累计
+
+        Raises:
+            JobCancelled: 任务已被请求取消
+        """
+        pipe = redis_client.pipeline()
+        pipe.hset(_job_key(self.job_id), mapping={"processed": processed, **({"total": total} if total is not None else {})})
+        if errors:
+            pipe.hincrby(_job_key(self.job_id), "error_count", len(errors))
+            pipe.rpush(_errors_key(self.job_id), *(json.dumps(error, default=str, ensure_ascii=False) for error in errors))
+            pipe.ltrim(_errors_key(self.job_id), 0, settings.job_error_preview - 1)
+            pipe.expire(_errors_key(self.job_id), settings.job_ttl)
+        pipe.execute()
+
+        if self.is_cancelled():
+            raise JobCancelled()
+
+
+def run_job(job_id: str, handler: Callable[..., Any], kwargs: Dict[str, Any]) -> None:
+    """在任务进程中执行任务，处理函数的返回值写入结果文件"""
+    context = JobContext(job_id)
+    if context.is_cancelled():
+        _update_job(job_id, status=CANCELLED, finished_at=datetime.now().isoformat())
+        return
+
+    _update_job(job_id, status=RUNNING, started_at=datetime.now().isoformat())
+    try:
+        result = handler(context, **kwargs)
+        if result is not None:
+            with open(os.path.join(context.work_dir, RESULT_FILENAME), "w", encoding="utf-8") as f:
+                json.dump(result, f, default=str, ensure_ascii=False)
+        _update_job(job_id, status=SUCCEEDED, finished_at=datetime.now().isoformat())
+    except JobCancelled:
+        _update_job(job_id, status=CANCELLED, finished_at=datetime.now().isoformat())
+    except Exception as e:
+        logger.exception("任务执行失败: %s", job_id)
+        _update_job(job_id, status=FAILED, message=str(e), finished_at=datetime.now().isoformat())
+
+
+class JobExecutor:
+    """任务执行器（每进程一个实例），任务在spawn方式创建的进程池中执行"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures = set()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.job_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def submit(self, job_id: str, handler: Callable[..., Any], **kwargs: Any) -> None:
+        """
+        提交任务
+
+        Args:
+            job_id: create_job 返回的任务ID
+            handler: 模块级的任务处理函数，签名为 handler(context: JobContext, **kwargs)
+        """
+        future = asyncio.get_running_loop().run_in_executor(self.pool, run_job, job_id, handler, kwargs)
+        self._futures.add(future)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: str, future: asyncio.Future) -> None:
+        self._futures.discard(future)
+        if not future.cancelled() and future.exception():
+            # 进程池异常（如子进程被杀）时任务无法自行更新状态
+            logger.error("任务进程异常退出: %s", future.exception())
+            _update_job(job_id, status=FAILED, message=str(future.exception()), finished_at=datetime.now().isoformat())
+
+    def shutdown(self) -> None:
+        """关闭进程池，未开始的任务被丢弃"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# 全局任务执行器
+job_executor = JobExecutor()
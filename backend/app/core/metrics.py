@@ -0,0 +1,215 @@
+"""
+Prometheus指标
+
+通过 /metrics 暴露（Prometheus文本格式）：
+- http_request_duration_seconds / http_requests_in_flight   按路由模板统计的请求耗时和进行中的请求数
+- http_request_db_queries / http_request_db_seconds          每个请求执行的SQL条数和累计耗时
+- db_query_duration_seconds                                  单条SQL耗时（按引擎）
+- db_pool_checkout_wait_seconds                              从连接池取得连接的等待时间（按引擎）
+- cache_requests_total                                       Redis缓存命中/未命中（按缓存命名空间）
+- checkins_total                                             签到次数（按结果）
+SQL统计通过SQLAlchemy游标事件采集，按请求归集依赖上下文变量（异步会话的 run_sync 和线程池都会继承）。
+多进程部署时设置环境变量 PROMETHEUS_MULTIPROC_DIR，/metrics 汇总各进程的指标。
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+# 未匹配任何路由的请求（404）统一归为一个标签值，避免路径参数撑爆标签基数
+UNMATCHED_ROUTE = "unmatched"
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP请求耗时",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "正在处理的HTTP请求数",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "每个HTTP请求执行的SQL条数",
+    ["method", "route"],
+    buckets=_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "每个HTTP请求的SQL累计耗时",
+    ["method", "route"],
+    buckets=_LATENCY_BUCKETS
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "单条SQL耗时",
+    ["engine"],
+    buckets=_QUERY_BUCKETS
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "从连接池取得连接的等待时间（含新建连接）",
+    ["engine"],
+    buckets=_QUERY_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Redis缓存读取次数",
+    ["cache", "result"]
+)
+CHECKINS = Counter(
+    "checkins_total",
+    "签到次数",
+    ["result"]
+)
+
+
+class RequestStats:
+    """一个请求内的SQL统计"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """当前请求的SQL统计，不在请求中时返回None"""
+    return _request_stats.get()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """记录一次缓存读取"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_checkin(result: str) -> None:
+    """记录一次签到：success 成功，replayed 幂等重放，rejected 被拒绝"""
+    CHECKINS.labels(result).inc()
+
+
+def _instrument_pool(pool, name: str) -> None:
+    # 连接池没有“开始取连接”的事件，包装取连接的方法计时（超时抛出异常时同样记录）
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.labels(name).observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """为引擎注册SQL耗时和连接池等待时间的采集（异步引擎传入 async_engine.sync_engine）"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        DB_QUERY_DURATION.labels(name).observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+        starts = context.connection.info.get("metrics_query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, "engine_disposed")
+    def engine_disposed(engine):
+        # dispose 会替换连接池
+        _instrument_pool(engine.pool, name)
+
+    _instrument_pool(engine.pool, name)
+
+
+class MetricsMiddleware:
+    """采集HTTP请求指标的ASGI中间件（按路由模板统计，流式响应计至响应结束）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            _request_stats.reset(token)
+            REQUEST_DURATION.labels(method, route, str(status)).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.db_seconds)
+
+
+def _route_template(scope) -> str:
+    """请求匹配的路由模板（如 /api/v1/schedules/{schedule_id}），匹配方式与路由分发相同"""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+def render_metrics() -> tuple:
+    """生成 /metrics 的响应内容，返回 (内容, Content-Type)"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
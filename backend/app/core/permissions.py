@@ -0,0 +1,162 @@
+"""
+权限矩阵
+
+启动时将数据库中的角色-权限关系编译为位掩码：每个权限占一位，每个角色对应一个掩码，
+权限检查只需一次按位与，不访问数据库。
+用户的权限为其角色枚举对应的RBAC角色（见 ROLE_BINDINGS）与 user_roles 中显式分配的角色的并集。
+角色、权限或用户角色分配变更后调用 bump_permissions_version，Redis中的版本号加1；
+各进程最多每 settings.rbac_version_check_interval 秒检查一次版本号，发现变化时重新编译。
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..config.database import SessionLocal, redis_client
+from ..config.settings import settings
+from ..models.rbac import Permission, Role, role_permissions, user_roles
+from ..models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+RBAC_VERSION_KEY = "rbac:version"
+
+# 用户角色枚举对应的RBAC角色
+ROLE_BINDINGS = {
+    UserRole.SUPER_ADMIN: "super_admin",
+    UserRole.ADMIN: "exam_admin",
+    UserRole.OPERATOR: "institution_user",
+    UserRole.EXAMINER: "staff",
+    UserRole.CANDIDATE: "candidate",
+}
+
+
+class PermissionMatrix:
+    """编译后的权限矩阵（只读）"""
+
+    def __init__(
+        self,
+        bits: Dict[str, int],
+        role_masks: Dict[str, int],
+        user_masks: Dict[int, int]
+    ):
+        self.bits = bits              # 权限名称 -> 位
+        self.role_masks = role_masks  # 角色名称 -> 权限掩码
+        self.user_masks = user_masks  # 用户ID -> 显式分配角色的权限掩码
+
+    def mask_for(self, user: User) -> int:
+        """用户的权限掩码"""
+        mask = self.user_masks.get(user.id, 0)
+        role_name = ROLE_BINDINGS.get(user.role)
+        if role_name:
+            mask |= self.role_masks.get(role_name, 0)
+        return mask
+
+    def allows(self, user: User, permission: str) -> bool:
+        bit = self.bits.get(permission)
+        return bit is not None and bool(self.mask_for(user) & bit)
+
+
+def compile_permissions(db: Session) -> PermissionMatrix:
+    """从数据库编译权限矩阵（三次查询）"""
+    names = [
+        name for (name,) in db.query(Permission.name)
+        .filter(Permission.is_active.is_(True))
+        .order_by(Permission.id)
+    ]
+    bits = {name: 1 << index for index, name in enumerate(names)}
+
+    role_names: Dict[int, str] = {}
+    role_masks: Dict[str, int] = {}
+    rows = (
+        db.query(Role.id, Role.name, Permission.name)
+        .outerjoin(role_permissions, role_permissions.c.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == role_permissions.c.permission_id)
+        .filter(Role.is_active.is_(True))
+    )
+    for role_id, role_name, permission_name in rows:
+        role_names[role_id] = role_name
+        role_masks[role_name] = role_masks.get(role_name, 0) | bits.get(permission_name, 0)
+
+    user_masks: Dict[int, int] = {}
+    for user_id, role_id in db.query(user_roles.c.user_id, user_roles.c.role_id):
+        role_name = role_names.get(role_id)
+        if role_name:
+            user_masks[user_id] = user_masks.get(user_id, 0) | role_masks[role_name]
+
+    return PermissionMatrix(bits, role_masks, user_masks)
+
+
+def _get_version() -> Optional[int]:
+    try:
+        return int(redis_client.get(RBAC_VERSION_KEY) or 0)
+    except redis.RedisError as e:
+        logger.warning("权限版本号读取失败: %s", e)
+        return None
+
+
+class PermissionEngine:
+    """权限引擎（每进程一个实例）"""
+
+    def __init__(self):
+        self.matrix = PermissionMatrix({}, {}, {})
+        self.version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """重新编译权限矩阵；数据库中还没有权限数据时先写入默认的角色和权限"""
+        # 先读版本号再编译，编译期间发生的变更会在下次检查时重新加载
+        version = _get_version()
+        db = SessionLocal()
+        try:
+            matrix = compile_permissions(db)
+            if not matrix.bits:
+                from .init_rbac import assign_role_permissions, init_permissions, init_roles
+
+                logger.info("权限数据为空，写入默认角色和权限")
+                init_permissions(db)
+                init_roles(db)
+                assign_role_permissions(db)
+                matrix = compile_permissions(db)
+        finally:
+            db.close()
+
+        with self._lock:
+            self.matrix = matrix
+            self.version = version
+            self._checked_at = time.monotonic()
+
+    async def refresh(self) -> None:
+        """版本号变化时重新编译（按检查间隔节流，Redis不可用时沿用当前矩阵）"""
+        now = time.monotonic()
+        if now - self._checked_at < settings.rbac_version_check_interval:
+            return
+        self._checked_at = now
+
+        version = await run_in_threadpool(_get_version)
+        if version is not None and version != self.version:
+            await run_in_threadpool(self.load)
+
+    def allows(self, user: User, permission: str) -> bool:
+        """检查用户是否拥有权限"""
+        return self.matrix.allows(user, permission)
+
+
+def bump_permissions_version() -> None:
+    """角色、权限或用户角色分配变更后调用（在事务提交之后），通知所有进程重新编译"""
+    try:
+        redis_client.incr(RBAC_VERSION_KEY)
+    except redis.RedisError as e:
+        logger.warning("权限版本号更新失败: %s", e)
+    # 本进程立即重新加载
+    permission_engine.load()
+
+
+# 全局权限引擎
+permission_engine = PermissionEngine()
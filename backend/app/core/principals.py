@@ -0,0 +1,150 @@
+"""
+登录用户缓存
+
+每个认证请求解析JWT后都要确认用户存在且未被禁用。用户信息依次从进程内TTL LRU缓存、Redis中获取，
+均未命中时才查询数据库，鉴权在热路径上不再访问数据库。
+用户被禁用、角色或所属机构变更、登录或登出时调用 invalidate_principal：删除Redis中的记录并清除本进程的缓存，
+其他进程的本地缓存在 settings.principal_local_ttl 秒内过期。
+缓存键包含权限版本号（见 core.permissions）：角色、权限或用户角色分配变更后调用 bump_permissions_version，
+各进程读到新版本后不再使用旧版本的缓存（旧记录按TTL过期），无需逐个清除。
+缓存还原的用户是游离态ORM实例，只能访问列属性，不能访问关联对象。
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+
+from ..config.database import redis_client
+from ..config.settings import settings
+from ..models.user import User
+from .cache import dicts_to_models, model_to_dict
+from .metrics import record_cache
+from .permissions import permission_engine
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_PREFIX = "principal"
+
+# 不进入缓存的列
+_EXCLUDED_COLUMNS = ("password_hash",)
+
+_to_users = dicts_to_models(User)
+
+
+class TTLCache:
+    """带过期时间的LRU缓存（线程安全）"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # 键 -> (过期时刻, 值)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local = TTLCache(settings.principal_local_size, settings.principal_local_ttl)
+
+
+def _version() -> int:
+    return permission_engine.version or 0
+
+
+def _principal_key(version: int, user_id: int) -> str:
+    return f"{PRINCIPAL_PREFIX}:{version}:{user_id}"
+
+
+def _to_user(data: Dict[str, Any]) -> User:
+    # 还原函数会原地转换字段类型，每次使用副本，各请求得到独立的实例
+    return _to_users([dict(data)])[0]
+
+
+def _get_local(version: int, user_id: int) -> Optional[User]:
+    data = _local.get((version, user_id))
+    return _to_user(data) if data is not None else None
+
+
+def _get_remote(version: int, user_id: int) -> Optional[User]:
+    try:
+        hit = redis_client.get(_principal_key(version, user_id))
+    except redis.RedisError as e:
+        logger.warning("登录用户缓存读取失败: %s", e)
+        return None
+
+    record_cache(PRINCIPAL_PREFIX, hit is not None)
+    if hit is None:
+        return None
+
+    data = json.loads(hit)
+    _local.set((version, user_id), data)
+    return _to_user(data)
+
+
+def _set_remote(version: int, user_id: int, data: Dict[str, Any]) -> None:
+    try:
+        redis_client.set(
+            _principal_key(version, user_id),
+            json.dumps(data, ensure_ascii=False),
+            ex=settings.principal_cache_ttl
+        )
+    except redis.RedisError as e:
+        logger.warning("登录用户缓存写入失败: %s", e)
+
+
+async def get_principal(user_id: int) -> Optional[User]:
+    """从缓存获取用户，未命中返回None（本地缓存未命中时在线程池中访问Redis，不阻塞事件循环）"""
+    version = _version()
+    user = _get_local(version, user_id)
+    if user is None:
+        user = await run_in_threadpool(_get_remote, version, user_id)
+    return user
+
+
+async def set_principal(user: User) -> None:
+    """缓存从数据库加载的用户（在线程池中写入Redis）"""
+    version = _version()
+    data = json.loads(json.dumps(model_to_dict(user, exclude=_EXCLUDED_COLUMNS), default=str))
+    _local.set((version, user.id), data)
+    await run_in_threadpool(_set_remote, version, user.id, data)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """使用户的缓存失效（在修改用户的事务提交之后调用）"""
+    version = _version()
+    _local.pop((version, user_id))
+    try:
+        redis_client.delete(_principal_key(version, user_id))
+    except redis.RedisError as e:
+        logger.warning("登录用户缓存失效失败: %s", e)
@@ -0,0 +1,182 @@
+"""
+SQL分析
+
+记录一个请求（或一段代码）执行的全部SQL，按语句形状（去掉参数、字面量和IN列表长度）归并，
+同一形状在一次请求中重复执行多次通常是循环内的延迟加载（N+1查询）。
+- QueryProfilerMiddleware 在 settings.sql_profiler_enabled 时为每个响应附带
+  X-Query-Count / X-Query-Time-Ms / X-Query-Max-Repeats 头并输出日志，
+  重复达到 settings.sql_profiler_repeat_threshold 次或超过 settings.sql_profiler_max_queries 条时记录警告；
+- capture_queries 捕获代码块内所有线程执行的SQL，供测试（tests/conftest.py 的 query_budget）和脚本使用。
+引擎需先调用 install_profiler 注册游标事件，没有进行中的分析时事件只做一次上下文变量读取。
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_PLACEHOLDER = r"(?:\?|%s|:\w+|%\(\w+\)s)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """语句形状：参数和字面量替换为?，IN列表折叠为(?)，空白归一"""
+    shape = _LITERAL.sub("?", statement)
+    shape = _IN_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryRecord(NamedTuple):
+    """一条已执行的SQL"""
+    statement: str
+    shape: str
+    seconds: float
+
+
+class QueryProfile:
+    """一次请求（或一段代码）的SQL记录"""
+
+    def __init__(self):
+        self.queries: List[QueryRecord] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(query.seconds for query in self.queries)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.queries.append(QueryRecord(statement, statement_shape(statement), seconds))
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """执行次数达到 threshold 的语句形状及次数，按次数从多到少排列"""
+        counts = Counter(query.shape for query in self.queries)
+        return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+    def max_repeats(self) -> int:
+        repeated = self.repeated(1)
+        return repeated[0][1] if repeated else 0
+
+    def report(self, threshold: int = 2) -> str:
+        """文本报告：总条数、耗时及重复执行的语句形状"""
+        lines = [f"共执行SQL {self.count} 条，耗时 {self.total_seconds * 1000:.1f}ms"]
+        for shape, count in self.repeated(threshold):
+            lines.append(f"  ×{count} {shape}")
+        return "\n".join(lines)
+
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("query_profile", default=None)
+
+# capture_queries 进行中的全局捕获（不区分线程）
+_captures: List[QueryProfile] = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None or _captures:
+        conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profiler_query_start")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+    for capture in list(_captures):
+        if capture is not profile:
+            capture.record(statement, seconds)
+
+
+def _handle_error(context):
+    # 执行失败时不会触发 after_cursor_execute，丢弃对应的开始时间
+    starts = context.connection.info.get("profiler_query_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+
+def install_profiler(engine: Engine) -> None:
+    """为引擎注册SQL记录（可重复调用；异步引擎传入 async_engine.sync_engine）"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """记录当前上下文（及其派生的线程池任务、异步会话）执行的SQL"""
+    profile = QueryProfile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryProfile]:
+    """记录代码块执行期间所有线程执行的SQL（测试客户端在其他线程中运行应用时使用）"""
+    profile = QueryProfile()
+    _captures.append(profile)
+    try:
+        yield profile
+    finally:
+        _captures.remove(profile)
+
+
+class QueryProfilerMiddleware:
+    """按请求记录SQL并检测重复语句的ASGI中间件（settings.sql_profiler_enabled 时生效）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.sql_profiler_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    # 响应头发出时的统计；流式响应之后执行的SQL只计入日志
+                    headers = list(message.get("headers", []))
+                    headers.extend([
+                        (b"x-query-count", str(profile.count).encode()),
+                        (b"x-query-time-ms", f"{profile.total_seconds * 1000:.1f}".encode()),
+                        (b"x-query-max-repeats", str(profile.max_repeats()).encode())
+                    ])
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                _log_profile(scope, profile)
+
+
+def _log_profile(scope, profile: QueryProfile) -> None:
+    request = f"{scope['method']} {scope['path']}"
+    threshold = settings.sql_profiler_repeat_threshold
+    repeated = profile.repeated(threshold)
+    if repeated or profile.count > settings.sql_profiler_max_queries:
+        logger.warning("疑似N+1查询 %s: %s", request, profile.report(threshold))
+    else:
+        logger.info("SQL %s: %s 条，%.1fms", request, profile.count, profile.total_seconds * 1000)
@@ -0,0 +1,190 @@
+"""
+考场排队索引
+
+每个考场的待进行日程保存在Redis有序集合中（按开始时间、排队位置排序），
+考生的排队位置和考场总等待人数通过 ZRANK/ZCARD 获得，不再查询数据库：
+- queue:venue:{venue_id}       成员为日程ID
+- queue:candidate:{user_id}    成员为“日程ID:考场ID:考试产品ID”，第一个即考生的下一个日程
+- queue:venue_names            考场ID -> 考场名称
+日程创建或状态变更的事务提交后调用 sync_queue 同步受影响的日程；
+应用启动时调用 rebuild_queue 从数据库重建全部索引，重建完成前（或Redis不可用时）调用方回退到数据库查询。
+"""
+
+import calendar
+import logging
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple, Optional, Tuple
+
+import redis
+from sqlalchemy.orm import Query, Session
+
+from ..config.database import redis_client
+from ..models.exam import ExamRegistration, Schedule, ScheduleStatus
+from ..models.venue import Venue
+
+logger = logging.getLogger(__name__)
+
+QUEUE_PREFIX = "queue"
+READY_KEY = f"{QUEUE_PREFIX}:ready"
+VENUE_NAMES_KEY = f"{QUEUE_PREFIX}:venue_names"
+REBUILD_LOCK_KEY = f"{QUEUE_PREFIX}:rebuild"
+
+# 每次写入Redis的日程数
+_BATCH_SIZE = 1000
+
+
+class QueueEntry(NamedTuple):
+    """考生下一个日程的排队情况"""
+    venue_id: int
+    venue_name: str
+    exam_product_id: int
+    position: int       # 排队位置（从1开始）
+    total_waiting: int  # 考场总等待人数
+
+
+def _venue_key(venue_id: int) -> str:
+    return f"{QUEUE_PREFIX}:venue:{venue_id}"
+
+
+def _candidate_key(user_id: int) -> str:
+    return f"{QUEUE_PREFIX}:candidate:{user_id}"
+
+
+def queue_score(start_time: datetime, queue_position: Optional[int]) -> int:
+    """排序分值：开始时间（秒）为主，同一时间按排队位置"""
+    return calendar.timegm(start_time.timetuple()) * 1000 + min(max(queue_position or 0, 0), 999)
+
+
+def queue_rows(db: Session, *criteria: Any) -> Query:
+    """查询符合条件的日程在排队索引中所需的字段（sync_queue 的数据库部分）"""
+    return db.query(
+        Schedule.id,
+        Schedule.venue_id,
+        Schedule.exam_product_id,
+        Schedule.start_time,
+        Schedule.queue_position,
+        Schedule.status,
+        ExamRegistration.user_id,
+        Venue.name
+    ).join(
+        ExamRegistration, ExamRegistration.id == Schedule.registration_id
+    ).join(
+        Venue, Venue.id == Schedule.venue_id
+    ).filter(*criteria)
+
+
+def write_queue_rows(rows: Iterable[Any]) -> Optional[int]:
+    """
+    将 queue_rows 查出的日程写入排队索引（sync_queue 的Redis部分，不访问数据库，可在线程池中执行）
+
+    待进行的日程加入（或更新）排队索引，其他状态的日程从索引中移除。
+    Redis 写入失败时撤销就绪标记并返回None。
+    """
+    count = 0
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for schedule_id, venue_id, exam_product_id, start_time, queue_position, status, user_id, venue_name in rows:
+            member = f"{schedule_id}:{venue_id}:{exam_product_id}"
+            if status == ScheduleStatus.PENDING:
+                score = queue_score(start_time, queue_position)
+                pipe.zadd(_venue_key(venue_id), {schedule_id: score})
+                pipe.zadd(_candidate_key(user_id), {member: score})
+                pipe.hset(VENUE_NAMES_KEY, venue_id, venue_name)
+            else:
+                pipe.zrem(_venue_key(venue_id), schedule_id)
+                pipe.zrem(_candidate_key(user_id), member)
+
+            count += 1
+            if count % _BATCH_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
+    except redis.RedisError as e:
+        # 索引与数据库不一致，撤销就绪标记，查询回退到数据库，直到下次重建
+        logger.warning("排队索引同步失败: %s", e)
+        try:
+            redis_client.delete(READY_KEY)
+        except redis.RedisError:
+            pass
+        return None
+    return count
+
+
+def sync_queue(db: Session, *criteria: Any) -> Optional[int]:
+    """
+    按数据库中的当前状态同步符合条件的日程（在事务提交之后调用），返回同步的日程数；
+    Redis 写入失败时返回None，见 write_queue_rows
+    """
+    return write_queue_rows(queue_rows(db, *criteria))
+
+
+def rebuild_queue(db: Session) -> Optional[int]:
+    """从数据库重建全部排队索引，返回索引的日程数；其他进程正在重建时跳过并返回None"""
+    try:
+        lock = redis_client.lock(REBUILD_LOCK_KEY, timeout=300, blocking=False)
+        if not lock.acquire():
+            return None
+    except redis.RedisError as e:
+        logger.warning("排队索引重建失败: %s", e)
+        return None
+
+    try:
+        redis_client.delete(READY_KEY)
+        keys = list(redis_client.scan_iter(match=f"{QUEUE_PREFIX}:*", count=_BATCH_SIZE))
+        keys = [key for key in keys if key.decode() != REBUILD_LOCK_KEY]
+        for start in range(0, len(keys), _BATCH_SIZE):
+            redis_client.delete(*keys[start:start + _BATCH_SIZE])
+
+        count = sync_queue(db, Schedule.status == ScheduleStatus.PENDING)
+        if count is None:
+            # 索引不完整，保持未就绪，查询继续回退到数据库
+            return None
+        redis_client.set(READY_KEY, 1)
+        logger.info("排队索引重建完成，共 %s 个待进行日程", count)
+        return count
+    except redis.RedisError as e:
+        logger.warning("排队索引重建失败: %s", e)
+        return None
+    finally:
+        try:
+            lock.release()
+        except redis.RedisError:
+            pass
+
+
+def get_queue_position(user_id: int) -> Tuple[bool, Optional[QueueEntry]]:
+    """
+    考生的排队情况（两次Redis往返）
+
+    Returns:
+        (索引是否可用, 考生下一个日程的排队情况)；考生没有待进行的日程时第二项为None
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.exists(READY_KEY)
+        pipe.zrange(_candidate_key(user_id), 0, 0)
+        ready, first = pipe.execute()
+        if not ready:
+            return False, None
+        if not first:
+            return True, None
+
+        schedule_id, venue_id, exam_product_id = first[0].decode().split(":")
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zrank(_venue_key(int(venue_id)), schedule_id)
+        pipe.zcard(_venue_key(int(venue_id)))
+        pipe.hget(VENUE_NAMES_KEY, venue_id)
+        rank, total, venue_name = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("排队索引读取失败: %s", e)
+        return False, None
+
+    if rank is None:
+        # 两个有序集合不一致（同步中途失败），回退到数据库
+        return False, None
+    return True, QueueEntry(
+        int(venue_id),
+        venue_name.decode() if venue_name else "",
+        int(exam_product_id),
+        rank + 1,
+        total
+    )
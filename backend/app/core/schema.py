@@ -0,0 +1,81 @@
+"""
+索引与列约束迁移
+
+Base.metadata.create_all 只创建缺失的表，已有表上新声明的索引和放宽的列约束需要迁移。
+ensure_indexes 对比模型中声明的索引与数据库中已有的索引（按名称），创建缺失的索引；
+relax_columns 将模型中允许为空、数据库中仍为 NOT NULL 的列改为允许为空（MySQL）。
+均可重复执行，已迁移的部分不受影响。部署新版本后执行：
+
+    python -m app.core.schema
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.engine import Engine
+
+from ..config.database import Base, engine
+from .. import models  # noqa: F401  注册全部模型
+
+logger = logging.getLogger(__name__)
+
+
+def missing_indexes(bind: Engine) -> List[Index]:
+    """模型中声明、数据库中还不存在的索引（表不存在时跳过，由 create_all 创建）"""
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(
+            index for index in sorted(table.indexes, key=lambda index: index.name)
+            if index.name not in existing
+        )
+    return missing
+
+
+def ensure_indexes(bind: Engine) -> List[str]:
+    """创建缺失的索引，返回新建的索引名称"""
+    created = []
+    for index in missing_indexes(bind):
+        logger.info("创建索引 %s.%s", index.table.name, index.name)
+        index.create(bind)
+        created.append(index.name)
+    return created
+
+
+def relax_columns(bind: Engine) -> List[str]:
+    """将模型中允许为空、数据库中为 NOT NULL 的列改为允许为空，返回修改的列（表名.列名）"""
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    relaxed = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column["name"]: column for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if not column.nullable or column.primary_key or existing.get(column.name, {}).get("nullable", True):
+                continue
+            name = f"{table.name}.{column.name}"
+            if bind.dialect.name != "mysql":
+                logger.warning("无法自动放宽列 %s 的 NOT NULL 约束（%s），请重建该表", name, bind.dialect.name)
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            logger.info("放宽列约束 %s", name)
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE `{table.name}` MODIFY `{column.name}` {column_type} NULL"))
+            relaxed.append(name)
+    return relaxed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    names = ensure_indexes(engine)
+    print(f"新建索引 {len(names)} 个" + (f": {', '.join(names)}" if names else ""))
+    columns = relax_columns(engine)
+    print(f"放宽列约束 {len(columns)} 个" + (f": {', '.join(columns)}" if columns else ""))
@@ -0,0 +1,83 @@
+"""
+序号分配
+
+报名号、准考证号等唯一编号由序号生成，不再依赖时间戳（同一秒内的两次报名会生成相同的编号）。
+分配器采用 hi/lo 方式：每次在独立的短事务中将数据库序号表中的下一个值推进一整块，
+块内的序号在进程内分配，不再访问数据库；批量操作可以一次预留任意数量的连续序号。
+进程退出时未用完的序号会被丢弃，编号连续但允许有间隔。
+"""
+
+import threading
+from typing import Dict, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..config.database import engine
+from ..config.settings import settings
+from ..models.sequence import Sequence
+
+# 序号名称
+REGISTRATION_NUMBER = "registration_number"
+CANDIDATE_NUMBER = "candidate_number"
+
+_sequences = Sequence.__table__
+
+
+def reserve(name: str, count: int) -> int:
+    """
+    在数据库中预留 count 个连续序号，返回第一个序号
+
+    使用独立连接和事务，不受调用方会话中未提交事务的影响；
+    更新语句对序号行加锁，并发的预留在数据库中串行执行。
+    """
+    if count < 1:
+        raise ValueError("预留的序号个数必须大于0")
+
+    while True:
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(_sequences)
+                .where(_sequences.c.name == name)
+                .values(next_value=_sequences.c.next_value + count)
+            )
+            if result.rowcount:
+                end = conn.execute(
+                    select(_sequences.c.next_value).where(_sequences.c.name == name)
+                ).scalar_one()
+                return end - count
+
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(_sequences).values(name=name, next_value=1 + count))
+            return 1
+        except IntegrityError:
+            # 其他进程同时创建了该序号，重新更新
+            continue
+
+
+class SequenceAllocator:
+    """序号分配器（每进程一个实例，线程安全）"""
+
+    def __init__(self):
+        self._blocks: Dict[str, Tuple[int, int]] = {}  # 序号名称 -> (下一个值, 块结束值)
+        self._lock = threading.Lock()
+
+    def next_value(self, name: str) -> int:
+        """分配一个序号，当前块用完时才访问数据库"""
+        with self._lock:
+            value, end = self._blocks.get(name, (0, 0))
+            if value >= end:
+                value = reserve(name, settings.sequence_block_size)
+                end = value + settings.sequence_block_size
+            self._blocks[name] = (value + 1, end)
+            return value
+
+    def allocate(self, name: str, count: int) -> range:
+        """一次分配 count 个连续序号（一次数据库往返），用于批量操作"""
+        start = reserve(name, count)
+        return range(start, start + count)
+
+
+# 全局序号分配器
+sequence_allocator = SequenceAllocator()
@@ -0,0 +1,340 @@
+"""
+考试日排期优化
+
+根据待排期的报名、考试产品时长、考场容量和考场可用时间段生成完整的排期表（纯计算，不访问数据库）：
+- 理论考试按场次安排：同一考试产品的考生合并到同一考场同时开考，每场人数不超过考场容量；
+- 实操考试每个考场同一时间只安排一名考生，考生分散到并行的各个考场；
+- 采用基于堆的列表调度：考试按时长从长到短依次安排（最长处理时间优先），
+  每次取能最早开考的考场，使全部考试的结束时间（makespan）尽量早；
+- 同一考生的考试时间互不重叠，也不与考生已有的有效日程重叠：理论考试场次只安排该时间段空闲的考生，
+  实操考试推迟到考生的占用结束之后，考场先安排后面的考生。
+每个考场维护一个只前进的时间游标，游标之前未用上的零碎空闲时间不再回填。
+"""
+
+import heapq
+from bisect import insort
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 考试类型（ExamProduct.exam_type）
+EXAM_TYPE_THEORY = "理论"
+EXAM_TYPE_PRACTICAL = "实操"
+
+
+def venue_exam_type(venue_name: Optional[str]) -> str:
+    """考场类型：考场没有类型字段，名称中包含“实操”的为实操考场，其余为理论考场"""
+    return EXAM_TYPE_PRACTICAL if EXAM_TYPE_PRACTICAL in (venue_name or "") else EXAM_TYPE_THEORY
+
+
+class PlanRegistration:
+    """待排期的报名"""
+
+    def __init__(
+        self,
+        registration_id: int,
+        user_id: int,
+        exam_product_id: int,
+        duration_minutes: int,
+        exam_type: str
+    ):
+        self.registration_id = registration_id
+        self.user_id = user_id
+        self.exam_product_id = exam_product_id
+        self.duration_minutes = duration_minutes
+        self.exam_type = EXAM_TYPE_THEORY if exam_type == EXAM_TYPE_THEORY else EXAM_TYPE_PRACTICAL
+
+
+class PlanVenue:
+    """参与排期的考场"""
+
+    def __init__(
+        self,
+        venue_id: int,
+        exam_type: str,
+        capacity: int,
+        free: List[Tuple[datetime, datetime]]
+    ):
+        self.venue_id = venue_id
+        self.exam_type = exam_type
+        self.capacity = max(capacity or 1, 1)
+        self.free = free  # 可用时间段（按时间排序、互不重叠）
+        self.available_minutes = sum((end - start).total_seconds() for start, end in free) / 60
+        self.busy_minutes = 0.0
+        self.sessions = 0
+        self.assigned = 0
+        self._gap = 0
+        self._cursor = free[0][0] if free else None
+
+    def earliest_fit(self, duration: timedelta, busy: List[Tuple[datetime, datetime]] = ()) -> Optional[datetime]:
+        """
+        游标之后能容纳 duration 的最早开始时间，没有时返回None
+
+        busy 为考生已占用的时间段（按开始时间排序），开考时间推迟到与之不重叠为止。
+        """
+        for start, end in self.free[self._gap:]:
+            start = max(start, self._cursor)
+            for busy_start, busy_end in busy:
+                if busy_start < start + duration and busy_end > start:
+                    start = busy_end
+            if end - start >= duration:
+                return start
+        return None
+
+    def book(self, start: datetime, duration: timedelta, candidates: int) -> datetime:
+        """占用 [start, start + duration)，返回结束时间"""
+        end = start + duration
+        while self.free[self._gap][1] < end:
+            self._gap += 1
+        self._cursor = end
+        self.busy_minutes += duration.total_seconds() / 60
+        self.sessions += 1
+        self.assigned += candidates
+        return end
+
+
+class TimetablePlan:
+    """排期结果"""
+
+    def __init__(self, venues: List[PlanVenue], total: int):
+        self.venues = venues
+        self.total = total
+        # (报名ID, 考试产品ID, 考场ID, 开始时间, 结束时间)
+        self.assignments: List[Tuple[int, int, int, datetime, datetime]] = []
+        self.unscheduled: List[int] = []
+        self.seats_offered = 0
+        self.seats_used = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """排期指标：排期人数、makespan、考场利用率、理论考场座位利用率"""
+        starts = [venue.free[0][0] for venue in self.venues if venue.free]
+        end_time = max((end for *_, end in self.assignments), default=None)
+        start_time = min(starts) if starts else None
+        available = sum(venue.available_minutes for venue in self.venues)
+        busy = sum(venue.busy_minutes for venue in self.venues)
+
+        return {
+            "registrations": self.total,
+            "scheduled": len(self.assignments),
+            "unscheduled": len(self.unscheduled),
+            "start_time": start_time,
+            "end_time": end_time,
+            "makespan_minutes": (
+                round((end_time - start_time).total_seconds() / 60, 1)
+                if start_time and end_time else 0
+            ),
+            "utilization": round(busy / available, 4) if available else 0,
+            "theory_sessions": sum(
+                venue.sessions for venue in self.venues if venue.exam_type == EXAM_TYPE_THEORY
+            ),
+            "seat_utilization": round(self.seats_used / self.seats_offered, 4) if self.seats_offered else 0,
+            "venues": [
+                {
+                    "venue_id": venue.venue_id,
+                    "exam_type": venue.exam_type,
+                    "capacity": venue.capacity,
+                    "assigned": venue.assigned,
+                    "sessions": venue.sessions,
+                    "busy_minutes": round(venue.busy_minutes, 1),
+                    "available_minutes": round(venue.available_minutes, 1),
+                    "utilization": (
+                        round(venue.busy_minutes / venue.available_minutes, 4)
+                        if venue.available_minutes else 0
+                    )
+                }
+                for venue in self.venues
+            ]
+        }
+
+
+class _VenueHeap:
+    """按能最早开考的时间排列的考场堆"""
+
+    def __init__(self, venues: List[PlanVenue]):
+        self.venues = venues
+        self._index = {venue.venue_id: index for index, venue in enumerate(venues)}
+        # (可开考时间, 优先级, 序号)：同时可用时容量大的考场优先
+        self._heap = [
+            (venue.free[0][0], -venue.capacity, index)
+            for index, venue in enumerate(venues) if venue.free
+        ]
+        heapq.heapify(self._heap)
+
+    def pop_earliest(
+        self,
+        duration: timedelta,
+        busy: List[Tuple[datetime, datetime]] = ()
+    ) -> Optional[Tuple[PlanVenue, datetime]]:
+        """
+        取出能最早容纳 duration 的考场及开考时间；没有考场能容纳时返回None
+
+        busy 为考生已占用的时间段：考生在某个考场要推迟开考时，继续查看其他考场，
+        直到堆中剩余考场的可开考时间都不早于已找到的开考时间。
+        """
+        skipped = []
+        best = None  # (开考时间, 优先级, 序号)
+        while self._heap:
+            key, priority, index = self._heap[0]
+            if best is not None and (key, priority) >= best[:2]:
+                break
+            heapq.heappop(self._heap)
+            venue = self.venues[index]
+            start = venue.earliest_fit(duration)
+            if start is None:
+                # 放不下这个时长，更短的考试可能还放得下
+                skipped.append((key, priority, index))
+            elif start > key:
+                # 堆中的时间已过期，按实际可开考时间重新入堆
+                heapq.heappush(self._heap, (start, priority, index))
+            else:
+                skipped.append((key, priority, index))
+                if busy:
+                    start = venue.earliest_fit(duration, busy)
+                if start is not None and (best is None or (start, priority) < best[:2]):
+                    best = (start, priority, index)
+
+        for item in skipped:
+            if best is None or item[2] != best[2]:
+                heapq.heappush(self._heap, item)
+        return (self.venues[best[2]], best[0]) if best else None
+
+    def push(self, venue: PlanVenue, available_at: datetime) -> None:
+        heapq.heappush(self._heap, (available_at, -venue.capacity, self._index[venue.venue_id]))
+
+
+def _by_duration(registrations: Iterable[PlanRegistration]) -> List[List[PlanRegistration]]:
+    """按考试产品分组，组按时长从长到短排列"""
+    groups: Dict[int, List[PlanRegistration]] = {}
+    for registration in registrations:
+        groups.setdefault(registration.exam_product_id, []).append(registration)
+    return sorted(groups.values(), key=lambda group: (-group[0].duration_minutes, group[0].exam_product_id))
+
+
+def _is_free(busy: List[Tuple[datetime, datetime]], start: datetime, end: datetime) -> bool:
+    """考生在 [start, end) 内没有其他考试"""
+    return all(busy_end <= start or busy_start >= end for busy_start, busy_end in busy)
+
+
+def _seat(
+    registrations: List[PlanRegistration],
+    capacity: int,
+    busy: Dict[int, List[Tuple[datetime, datetime]]],
+    start: datetime,
+    end: datetime
+) -> Tuple[List[PlanRegistration], List[PlanRegistration]]:
+    """按顺序安排 [start, end) 内空闲的考生入座，返回 (入座的考生, 其余考生)"""
+    session, waiting = [], []
+    for registration in registrations:
+        if len(session) < capacity and _is_free(busy.get(registration.user_id, []), start, end):
+            session.append(registration)
+        else:
+            waiting.append(registration)
+    return session, waiting
+
+
+def _plan_theory(
+    plan: TimetablePlan,
+    venues: List[PlanVenue],
+    registrations: List[PlanRegistration],
+    busy: Dict[int, List[Tuple[datetime, datetime]]]
+) -> None:
+    heap = _VenueHeap(venues)
+    for group in _by_duration(registrations):
+        duration = timedelta(minutes=group[0].duration_minutes)
+        remaining = group
+        while remaining:
+            picked = heap.pop_earliest(duration)
+            if picked is None:
+                break
+            venue, start = picked
+            session, waiting = _seat(remaining, venue.capacity, busy, start, start + duration)
+            if not session:
+                # 剩余考生这一时间段都有其他考试，按第一名考生空闲的时间另开一场
+                heap.push(venue, start)
+                picked = heap.pop_earliest(duration, busy[remaining[0].user_id])
+                if picked is None:
+                    plan.unscheduled.append(remaining.pop(0).registration_id)
+                    continue
+                venue, start = picked
+                session, waiting = _seat(remaining, venue.capacity, busy, start, start + duration)
+            remaining = waiting
+            end = venue.book(start, duration, len(session))
+            heap.push(venue, end)
+
+            plan.seats_offered += venue.capacity
+            plan.seats_used += len(session)
+            for registration in session:
+                insort(busy.setdefault(registration.user_id, []), (start, end))
+                plan.assignments.append(
+                    (registration.registration_id, registration.exam_product_id, venue.venue_id, start, end)
+                )
+
+        plan.unscheduled.extend(registration.registration_id for registration in remaining)
+
+
+def _plan_practical(
+    plan: TimetablePlan,
+    venues: List[PlanVenue],
+    registrations: List[PlanRegistration],
+    busy: Dict[int, List[Tuple[datetime, datetime]]]
+) -> None:
+    heap = _VenueHeap(venues)
+    for group in _by_duration(registrations):
+        duration = timedelta(minutes=group[0].duration_minutes)
+        queue = deque(group)
+        deferred = set()
+        while queue:
+            registration = queue.popleft()
+            candidate_busy = busy.get(registration.user_id, [])
+            picked = heap.pop_earliest(duration, candidate_busy)
+            if picked is None:
+                if candidate_busy:
+                    # 只是这名考生排不下，其余考生继续排
+                    plan.unscheduled.append(registration.registration_id)
+                    continue
+                plan.unscheduled.append(registration.registration_id)
+                plan.unscheduled.extend(item.registration_id for item in queue)
+                break
+            venue, start = picked
+            available_at = venue.earliest_fit(duration)
+            if start > available_at and queue and registration.registration_id not in deferred:
+                # 考生要等其他考试结束，考场先安排后面的考生，游标前的空闲时间不会空等
+                heap.push(venue, available_at)
+                deferred.add(registration.registration_id)
+                queue.append(registration)
+                continue
+            end = venue.book(start, duration, 1)
+            heap.push(venue, end)
+            insort(busy.setdefault(registration.user_id, []), (start, end))
+            plan.assignments.append(
+                (registration.registration_id, registration.exam_product_id, venue.venue_id, start, end)
+            )
+
+
+def plan_timetable(
+    registrations: List[PlanRegistration],
+    venues: List[PlanVenue],
+    candidate_busy: Optional[Dict[int, List[Tuple[datetime, datetime]]]] = None
+) -> TimetablePlan:
+    """
+    生成排期表
+
+    理论考试只安排到理论考场，实操考试只安排到实操考场；
+    candidate_busy 为考生（用户ID）已有的有效日程时间段，同一考生的考试互不重叠；
+    可用时间内排不下的报名列入 unscheduled。
+    """
+    plan = TimetablePlan(venues, len(registrations))
+    busy = {user_id: sorted(intervals) for user_id, intervals in (candidate_busy or {}).items()}
+    for exam_type, planner in (
+        (EXAM_TYPE_THEORY, _plan_theory),
+        (EXAM_TYPE_PRACTICAL, _plan_practical)
+    ):
+        planner(
+            plan,
+            [venue for venue in venues if venue.exam_type == exam_type],
+            [registration for registration in registrations if registration.exam_type == exam_type],
+            busy
+        )
+
+    plan.assignments.sort(key=lambda item: (item[3], item[2], item[0]))
+    return plan
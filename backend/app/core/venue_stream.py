@@ -0,0 +1,151 @@
+"""
+考场状态推送
+
+每个worker进程维护一份考场状态快照，通过Redis pub/sub接收其他进程发布的考场变更，
+与快照比对后只向订阅者（SSE/WebSocket连接）推送发生变化的考场。
+消息在广播前序列化一次，所有订阅者共享同一份JSON文本。
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import redis.asyncio as aioredis
+
+from ..config.settings import settings
+from .events import VENUE_STATUS_CHANNEL, subscribe_local, unsubscribe_local
+
+logger = logging.getLogger(__name__)
+
+# Redis断线后的重连间隔（秒）
+RECONNECT_INTERVAL = 3
+
+
+class VenueStatusBroadcaster:
+    """考场状态广播器（每进程一个实例）"""
+
+    def __init__(self, channel: str = VENUE_STATUS_CHANNEL):
+        self.channel = channel
+        self.snapshot: Dict[int, Dict[str, Any]] = {}
+        self.version = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loader: Optional[Callable[[], Awaitable[List[Dict[str, Any]]]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def start(self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> None:
+        """加载初始快照并开始监听Redis频道"""
+        self._loader = loader
+        self._loop = asyncio.get_running_loop()
+        subscribe_local(self.channel, self._on_local_event)
+
+        try:
+            await self.resync()
+        except Exception:
+            logger.exception("考场状态快照加载失败")
+
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """停止监听"""
+        unsubscribe_local(self.channel, self._on_local_event)
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def resync(self) -> None:
+        """从数据库重新加载完整快照并推送给所有订阅者"""
+        rows = await self._loader()
+        self.snapshot = {row["venue_id"]: row for row in rows}
+        self.version += 1
+        self._broadcast(self._snapshot_message())
+
+    def apply(self, payload: Dict[str, Any]) -> None:
+        """合并一条考场变更事件，仅推送与快照不同的部分"""
+        changed = [
+            row for row in payload.get("venues", [])
+            if self.snapshot.get(row["venue_id"]) != row
+        ]
+        removed = [
+            venue_id for venue_id in payload.get("removed", [])
+            if self.snapshot.pop(venue_id, None) is not None
+        ]
+        if not changed and not removed:
+            return
+
+        for row in changed:
+            self.snapshot[row["venue_id"]] = row
+        self.version += 1
+
+        self._broadcast(json.dumps({
+            "type": "delta",
+            "version": self.version,
+            "venues": changed,
+            "removed": removed
+        }, ensure_ascii=False))
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """订阅考场状态，首条消息为完整快照"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.venue_stream_queue_size)
+        queue.put_nowait(self._snapshot_message())
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def _snapshot_message(self) -> str:
+        return json.dumps({
+            "type": "snapshot",
+            "version": self.version,
+            "venues": list(self.snapshot.values())
+        }, ensure_ascii=False)
+
+    def _broadcast(self, message: str) -> None:
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # 消费过慢的连接丢弃积压的增量，改为推送一次完整快照
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_message())
+
+    def _on_local_event(self, payload: Dict[str, Any]) -> None:
+        # 发布方可能运行在线程池中，切回事件循环线程处理
+        if self._loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.apply, payload)
+
+    async def _listen(self) -> None:
+        while True:
+            client = aioredis.from_url(settings.redis_url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.channel)
+                # 订阅建立后重新加载快照，补齐断线期间错过的变更
+                await self.resync()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.apply(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("考场状态频道监听中断，%s秒后重连: %s", RECONNECT_INTERVAL, e)
+                await asyncio.sleep(RECONNECT_INTERVAL)
+            finally:
+                await client.aclose()
+
+
+# 全局广播器实例
+venue_status_broadcaster = VenueStatusBroadcaster()
@@ -0,0 +1,165 @@
+"""
+等待时间估算
+
+按考场和考试产品学习每名考生实际占用考场的时长（签到至完成），采用指数加权移动平均（EWMA），
+最近的样本权重更大，能跟上考官节奏和设备状况的变化。每个考场另有不分考试产品的估算，
+考试产品没有样本时使用；考场也没有样本时使用 settings.wait_time_default_minutes。
+估算结果保存在Redis哈希中，每次完成日程时增量更新；各进程在内存中保留一份副本，
+最多每 settings.wait_time_refresh_interval 秒同步一次，估算本身不访问数据库。
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from ..config.database import redis_client
+from ..config.settings import settings
+from ..models.checkin import CheckIn, CheckInStatus
+from ..models.exam import Schedule, ScheduleStatus
+
+logger = logging.getLogger(__name__)
+
+WAIT_TIME_KEY = "wait_time:ewma"
+
+# 不分考试产品的估算使用的字段后缀
+_ANY_PRODUCT = "*"
+
+
+def _field(venue_id: int, exam_product_id: Optional[int]) -> str:
+    return f"{venue_id}:{_ANY_PRODUCT if exam_product_id is None else exam_product_id}"
+
+
+def _ewma(current: Optional[Tuple[float, int]], minutes: float) -> Tuple[float, int]:
+    """合并一个样本，返回 (估算值, 样本数)"""
+    if current is None:
+        return minutes, 1
+    mean, samples = current
+    alpha = settings.wait_time_ewma_alpha
+    return mean + alpha * (minutes - mean), samples + 1
+
+
+def _valid(minutes: float) -> bool:
+    return settings.wait_time_min_minutes <= minutes <= settings.wait_time_max_minutes
+
+
+class WaitTimeEstimator:
+    """考试时长估算器（每进程一个实例）"""
+
+    def __init__(self):
+        self._estimates: Dict[str, Tuple[float, int]] = {}
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        """加载估算结果；Redis中还没有数据时用最近完成的日程初始化"""
+        try:
+            if not redis_client.exists(WAIT_TIME_KEY):
+                estimates = self._from_history(db)
+                if estimates:
+                    pipe = redis_client.pipeline(transaction=False)
+                    for field, value in estimates.items():
+                        # 其他进程可能同时初始化，已有的字段不覆盖
+                        pipe.hsetnx(WAIT_TIME_KEY, field, json.dumps(value))
+                    pipe.execute()
+                    logger.info("考试时长估算初始化完成，共 %s 项", len(estimates))
+        except redis.RedisError as e:
+            logger.warning("考试时长估算初始化失败: %s", e)
+        self._sync(force=True)
+
+    def observe(self, venue_id: int, exam_product_id: int, minutes: Optional[float]) -> None:
+        """记录一名考生实际占用考场的时长（分钟），增量更新考场及考试产品的估算；无效的样本忽略"""
+        if minutes is None or not _valid(minutes):
+            return
+
+        for field in (_field(venue_id, exam_product_id), _field(venue_id, None)):
+            try:
+                value = redis_client.transaction(
+                    lambda pipe: self._update(pipe, field, minutes),
+                    WAIT_TIME_KEY,
+                    value_from_callable=True
+                )
+            except redis.RedisError as e:
+                logger.warning("考试时长估算更新失败: %s", e)
+                with self._lock:
+                    value = _ewma(self._estimates.get(field), minutes)
+            with self._lock:
+                self._estimates[field] = value
+
+    def estimate(self, venue_id: int, exam_product_id: Optional[int] = None) -> float:
+        """每名考生预计占用考场的时长（分钟），只读内存"""
+        self._sync()
+        with self._lock:
+            for field in (_field(venue_id, exam_product_id), _field(venue_id, None)):
+                value = self._estimates.get(field)
+                if value:
+                    return value[0]
+        return settings.wait_time_default_minutes
+
+    @staticmethod
+    def _update(pipe, field: str, minutes: float) -> Tuple[float, int]:
+        # WATCH 期间读取当前值，其他进程同时更新时事务重试
+        raw = pipe.hget(WAIT_TIME_KEY, field)
+        value = _ewma(tuple(json.loads(raw)) if raw else None, minutes)
+        pipe.multi()
+        pipe.hset(WAIT_TIME_KEY, field, json.dumps(value))
+        return value
+
+    def _sync(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._synced_at < settings.wait_time_refresh_interval:
+            return
+        self._synced_at = now
+
+        try:
+            raw = redis_client.hgetall(WAIT_TIME_KEY)
+        except redis.RedisError as e:
+            logger.warning("考试时长估算同步失败: %s", e)
+            return
+
+        estimates = {field.decode(): tuple(json.loads(value)) for field, value in raw.items()}
+        with self._lock:
+            self._estimates.update(estimates)
+
+    @staticmethod
+    def _from_history(db: Session) -> Dict[str, Tuple[float, int]]:
+        """按完成时间依次合并最近完成的日程（签到时间至完成时间）"""
+        rows = db.query(
+            Schedule.venue_id,
+            Schedule.exam_product_id,
+            CheckIn.checkin_time,
+            Schedule.updated_at
+        ).join(
+            CheckIn, CheckIn.schedule_id == Schedule.id
+        ).filter(
+            Schedule.status == ScheduleStatus.COMPLETED,
+            CheckIn.status == CheckInStatus.SUCCESS
+        ).order_by(
+            Schedule.updated_at.desc()
+        ).limit(settings.wait_time_history_size).all()
+
+        estimates: Dict[str, Tuple[float, int]] = {}
+        for venue_id, exam_product_id, started_at, completed_at in reversed(rows):
+            minutes = service_minutes(started_at, completed_at)
+            if minutes is None:
+                continue
+            for field in (_field(venue_id, exam_product_id), _field(venue_id, None)):
+                estimates[field] = _ewma(estimates.get(field), minutes)
+        return estimates
+
+
+def service_minutes(started_at: Optional[datetime], completed_at: Optional[datetime]) -> Optional[float]:
+    """考生占用考场的时长（分钟），无效时返回None"""
+    if not started_at or not completed_at:
+        return None
+    minutes = (completed_at - started_at).total_seconds() / 60
+    return minutes if _valid(minutes) else None
+
+
+# 全局等待时间估算器
+wait_time_estimator = WaitTimeEstimator()
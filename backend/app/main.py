@@ -1,13 +1,25 @@
 """
 FastAPI主应用程序 - UAV考点运营管理系统
 """
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from datetime import datetime
+from sqlalchemy import text
+import time
 
 from .config.settings import settings
-from .config.database import engine, Base
+from .config.database import engine, async_engine, redis_client, Base
+from .core.jobs import job_executor
+from .core.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from .core.permissions import permission_engine
+from .core.profiler import QueryProfilerMiddleware, install_profiler
+from .core.venue_stream import venue_status_broadcaster
+from .utils.security import shutdown_password_pool
+from .services.wechat_service import load_venues_status
+from .services.schedule_service import load_wait_time_estimates, rebuild_queue_index
 from .routes import (
     auth_router,
     institutions_router,
@@ -15,18 +27,38 @@ from .routes import (
     candidates_router,
     wechat_router,
     venues_router,
-    schedules_router
+    schedules_router,
+    jobs_router
 )
 
 
+# SQL耗时和连接池等待时间采集（路由中的异步会话在 async_engine.sync_engine 上执行语句）
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+install_profiler(engine)
+install_profiler(async_engine.sync_engine)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用程序生命周期管理"""
     # 启动时创建数据库表
     Base.metadata.create_all(bind=engine)
+    # 编译权限矩阵
+    permission_engine.load()
+    # 重建排队索引
+    await rebuild_queue_index()
+    # 加载考试时长估算
+    await load_wait_time_estimates()
+    # 启动考场状态推送
+    await venue_status_broadcaster.start(load_venues_status)
     print("🚀 UAV考点运营管理系统启动成功")
     print(f"📊 API文档: http://localhost:8000{app.docs_url}")
     yield
+    await venue_status_broadcaster.stop()
+    job_executor.shutdown()
+    shutdown_password_pool()
+    await async_engine.dispose()
     print("👋 UAV考点运营管理系统关闭")
 
 
@@ -71,6 +103,12 @@ app.add_middleware(
     allowed_hosts=["*"]  # 生产环境应配置具体域名
 )
 
+# SQL分析中间件（settings.sql_profiler_enabled 时生效）
+app.add_middleware(QueryProfilerMiddleware)
+
+# 请求指标中间件（最外层，耗时包含其他中间件）
+app.add_middleware(MetricsMiddleware)
+
 
 # 注册路由
 app.include_router(auth_router, prefix="/api/v1")
@@ -80,6 +118,7 @@ app.include_router(candidates_router, prefix="/api/v1")
 app.include_router(wechat_router, prefix="/api/v1")
 app.include_router(venues_router, prefix="/api/v1")
 app.include_router(schedules_router, prefix="/api/v1")
+app.include_router(jobs_router, prefix="/api/v1")
 
 
 # 系统基础端点
@@ -102,15 +141,44 @@ def read_root():
     }
 
 
+def _ping_database():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
 @app.get("/health", tags=["系统"], summary="健康检查")
 def health_check():
-    """系统健康检查"""
-    return {
-        "status": "healthy",
-        "message": "UAV考点运营管理系统运行正常",
-        "version": settings.app_version,
-        "timestamp": "2025-08-18T08:00:00Z"
-    }
+    """系统健康检查：检查数据库和Redis连接，任一不可用时返回503"""
+    checks = {}
+    for name, probe in (
+        ("database", _ping_database),
+        ("redis", redis_client.ping)
+    ):
+        started = time.perf_counter()
+        try:
+            probe()
+            checks[name] = {"status": "up", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            checks[name] = {"status": "down", "error": str(e)}
+    
+    healthy = all(check["status"] == "up" for check in checks.values())
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={
+            "status": "healthy" if healthy else "unhealthy",
+            "message": "UAV考点运营管理系统运行正常" if healthy else "依赖服务不可用",
+            "version": settings.app_version,
+            "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "checks": checks
+        }
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus指标"""
+    content, content_type = render_metrics()
+    return Response(content=content, headers={"Content-Type": content_type})
 
 
 @app.get("/api/v1/system/info", tags=["系统"], summary="获取系统信息")
@@ -5,19 +5,19 @@
 from .user import User, UserRole
 from .institution import Institution
 from .venue import Venue, VenueStatus
-from .exam import Exam, ExamSession, ExamRegistration, ExamProduct, ScheduleStatus
+from .exam import Exam, ExamSession, ExamRegistration, ExamProduct, Schedule, ScheduleStatus
 from .checkin import CheckIn
 from .candidate import Candidate, CandidateStatus
 from .rbac import Role, Permission, role_permissions, user_roles
-from .schedule import Schedule, schedule_candidates
+from .sequence import Sequence
 
 __all__ = [
     "User", "UserRole",
     "Institution", 
     "Venue", "VenueStatus",
-    "Exam", "ExamSession", "ExamRegistration", "ExamProduct", "ScheduleStatus",
+    "Exam", "ExamSession", "ExamRegistration", "ExamProduct", "Schedule", "ScheduleStatus",
     "CheckIn",
     "Candidate", "CandidateStatus",
     "Role", "Permission", "role_permissions", "user_roles",
-    "Schedule", "schedule_candidates"
+    "Sequence"
 ]
\ No newline at end of file
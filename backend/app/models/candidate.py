@@ -59,7 +59,6 @@ class Candidate(Base):
     institution = relationship("Institution", back_populates="candidates")
     exam_product = relationship("ExamProduct", back_populates="candidates")
     creator = relationship("User", foreign_keys=[created_by])
-    schedules = relationship("Schedule", secondary="schedule_candidates", back_populates="candidates")
     checkins = relationship("CheckIn", back_populates="candidate")
     
     def __repr__(self):
@@ -34,9 +34,10 @@ class CheckIn(Base):
     
     # 关联信息
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    user = relationship("User", back_populates="checkins")
+    user = relationship("User", back_populates="checkins", foreign_keys=[user_id])
     
-    candidate_id = Column(Integer, ForeignKey("candidates.id"), nullable=False)
+    # 旧版考生表的关联，考生现为 users 中的用户（user_id），新签到不再填写
+    candidate_id = Column(Integer, ForeignKey("candidates.id"))
     candidate = relationship("Candidate", back_populates="checkins")
     
     venue_id = Column(Integer, ForeignKey("venues.id"), nullable=False)
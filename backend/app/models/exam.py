@@ -2,7 +2,7 @@
 考试相关数据模型
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Enum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Enum, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -112,7 +112,6 @@ class Exam(Base):
     
     # 反向关系
     exam_sessions = relationship("ExamSession", back_populates="exam")
-    registrations = relationship("ExamRegistration", back_populates="exam")
     
     def __repr__(self):
         return f"<Exam {self.title}>"
@@ -161,6 +160,10 @@ class ExamSession(Base):
 class ExamRegistration(Base):
     """考试报名模型"""
     __tablename__ = "exam_registrations"
+    __table_args__ = (
+        # 考生的报名记录（考生日程、排队位置）
+        Index("idx_exam_registrations_user_status", "user_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -200,6 +203,14 @@ class ExamRegistration(Base):
 class Schedule(Base):
     """日程安排模型"""
     __tablename__ = "schedules"
+    __table_args__ = (
+        # 考场的有效日程按时间排列（冲突检查、排队位置、考场日程列表），包含结束时间以覆盖冲突检查
+        Index("idx_schedules_venue_status_start", "venue_id", "status", "start_time", "end_time"),
+        # 报名对应的日程（考生日程、待排期报名）
+        Index("idx_schedules_registration_status", "registration_id", "status"),
+        # 按日期筛选日程
+        Index("idx_schedules_date", "schedule_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -51,7 +51,6 @@ class Institution(Base):
     venues = relationship("Venue", back_populates="institution")
     exams = relationship("Exam", back_populates="institution")
     candidates = relationship("Candidate", back_populates="institution")
-    schedules = relationship("Schedule", back_populates="institution")
     
     def __repr__(self):
         return f"<Institution {self.name}>"
\ No newline at end of file
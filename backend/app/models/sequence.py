@@ -0,0 +1,20 @@
+"""
+序号分配数据模型
+"""
+
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+
+from ..config.database import Base
+
+
+class Sequence(Base):
+    """序号表，记录每个序号下一个可分配的值（hi/lo 分配器的高位）"""
+    __tablename__ = "sequences"
+    
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Sequence {self.name}={self.next_value}>"
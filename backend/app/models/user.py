@@ -2,7 +2,7 @@
 用户相关数据模型
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -22,6 +22,12 @@ class UserRole(enum.Enum):
 class User(Base):
     """用户模型"""
     __tablename__ = "users"
+    __table_args__ = (
+        # 按角色、机构筛选并按创建时间分页（考生列表）
+        Index("idx_users_role_institution_created", "role", "institution_id", "created_at"),
+        # 按身份证号查找考生（考生登录、导入去重）
+        Index("idx_users_id_card", "id_card"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -55,7 +61,7 @@ class User(Base):
     # 关系定义
     institution = relationship("Institution", back_populates="users")
     exam_registrations = relationship("ExamRegistration", back_populates="user")
-    checkins = relationship("CheckIn", back_populates="user")
+    checkins = relationship("CheckIn", back_populates="user", foreign_keys="CheckIn.user_id")
     
     # RBAC 关系
     roles = relationship("Role", secondary="user_roles", back_populates="users")
@@ -9,6 +9,7 @@ from .exam_products import router as exam_products_router
 from .candidates import router as candidates_router
 from .wechat import router as wechat_router
 from .schedules import router as schedules_router
+from .jobs import router as jobs_router
 
 __all__ = [
     "auth_router",
@@ -17,5 +18,6 @@ __all__ = [
     "exam_products_router",
     "candidates_router",
     "wechat_router",
-    "schedules_router"
+    "schedules_router",
+    "jobs_router"
 ]
\ No newline at end of file
@@ -4,12 +4,13 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..config.settings import settings
-from ..services.auth_service import AuthService
+from ..core.principals import invalidate_principal
+from ..services.auth_service import AuthService, AsyncAuthService
 from ..utils.security import verify_password, create_access_token
 from ..models.user import User
 
@@ -20,11 +21,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 @router.post("/token", summary="用户登录获取访问令牌")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """用户登录获取JWT访问令牌"""
-    auth_service = AuthService(db)
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+    auth_service = AsyncAuthService(db)
+    user = await auth_service.authenticate_user(form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -66,13 +67,13 @@ async def register(
     email: str,
     real_name: str = None,
     phone: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """用户注册"""
-    auth_service = AuthService(db)
+    auth_service = AsyncAuthService(db)
     
     try:
-        user = auth_service.create_user(
+        user = await auth_service.create_user(
             username=username,
             password=password,
             email=email,
@@ -112,8 +113,11 @@ async def get_current_user_info(
 
 
 @router.post("/logout", summary="用户登出")
-async def logout():
-    """用户登出（实际上由于JWT无状态，主要在客户端删除token）"""
+async def logout(
+    current_user: User = Depends(AuthService.get_current_user)
+):
+    """用户登出（由于JWT无状态，主要在客户端删除token；服务端清除该用户的登录缓存）"""
+    invalidate_principal(current_user.id)
     return {"message": "登出成功"}
 
 
@@ -2,12 +2,20 @@
 考生管理API路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import os
+import shutil
 
-from ..config.database import get_db
+import redis
+
+from ..config.database import get_async_db
+from ..core.jobs import create_job, job_dir, job_executor
 from ..services.auth_service import AuthService
+from ..services.candidate_service import AsyncCandidateService, run_candidate_import_job
 from ..models.user import User, UserRole
 
 router = APIRouter(prefix="/candidates", tags=["考生管理"])
@@ -15,51 +23,111 @@ router = APIRouter(prefix="/candidates", tags=["考生管理"])
 
 @router.get("/", summary="获取考生列表")
 async def get_candidates(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    size: int = 20,
+    with_total: bool = False,
+    institution_id: Optional[int] = None,
+    exam_product_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: User = Depends(AuthService.require_permission("candidate:read")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取考生列表"""
-    # 根据用户角色过滤数据
-    query = db.query(User).filter(User.role == UserRole.CANDIDATE)
+    """获取考生列表（游标分页，翻页时传入上一页返回的 next_cursor）"""
+    # 机构用户只能查看本机构的考生
+    if current_user.role == UserRole.OPERATOR:
+        institution_id = current_user.institution_id
+    
+    try:
+        page = await AsyncCandidateService(db).get_candidates(
+            cursor=cursor,
+            size=size,
+            institution_id=institution_id,
+            exam_product_id=exam_product_id,
+            status=status_filter,
+            with_total=with_total
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
+    result = page.to_dict()
+    result["items"] = [
+        {
+            "id": candidate.id,
+            "username": candidate.username,
+            "real_name": candidate.real_name,
+            "id_card": candidate.id_card,
+            "phone": candidate.phone,
+            "email": candidate.email,
+            "institution_id": candidate.institution_id,
+            "is_active": candidate.is_active,
+            "created_at": candidate.created_at
+        }
+        for candidate in page.items
+    ]
+    return result
+
+
+@router.post("/batch-import", summary="批量导入考生")
+async def batch_import_candidates(
+    file: UploadFile = File(..., description="考生名单（.xlsx/.xls/.csv）"),
+    institution_id: Optional[int] = Form(None, description="考生所属机构ID（机构用户无需填写）"),
+    current_user: User = Depends(AuthService.require_permission("candidate:import"))
+):
+    """提交考生批量导入任务，立即返回任务ID，通过任务接口查询进度和下载结果"""
+    # 机构用户只能导入到本机构
     if current_user.role == UserRole.OPERATOR:
-        # 机构用户只能查看本机构的考生
-        query = query.filter(User.institution_id == current_user.institution_id)
+        institution_id = current_user.institution_id
     
-    candidates = query.offset(skip).limit(limit).all()
+    if not institution_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="必须指定考生所属机构"
+        )
     
-    return {
-        "candidates": [
-            {
-                "id": candidate.id,
-                "username": candidate.username,
-                "real_name": candidate.real_name,
-                "id_card": candidate.id_card,
-                "phone": candidate.phone,
-                "email": candidate.email,
-                "institution_id": candidate.institution_id,
-                "is_active": candidate.is_active,
-                "created_at": candidate.created_at
-            }
-            for candidate in candidates
-        ],
-        "total": query.count()
-    }
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in (".xlsx", ".xls", ".csv"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="仅支持 .xlsx、.xls、.csv 文件"
+        )
+    
+    try:
+        job_id = create_job("candidate_import", current_user.id)
+    except redis.RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="任务服务暂不可用"
+        )
+    
+    file_path = os.path.join(job_dir(job_id), f"input{extension}")
+    
+    def save_upload():
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(file.file, f)
+    
+    await run_in_threadpool(save_upload)
+    
+    job_executor.submit(job_id, run_candidate_import_job, file_path=file_path, institution_id=institution_id)
+    
+    return {"job_id": job_id, "status": "pending"}
 
 
 @router.get("/{candidate_id}", summary="获取考生详情")
 async def get_candidate(
     candidate_id: int,
-    current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("candidate:read")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考生详情"""
-    candidate = db.query(User).filter(
-        User.id == candidate_id,
-        User.role == UserRole.CANDIDATE
-    ).first()
+    candidate = await db.scalar(
+        select(User).where(
+            User.id == candidate_id,
+            User.role == UserRole.CANDIDATE
+        )
+    )
     
     if not candidate:
         raise HTTPException(
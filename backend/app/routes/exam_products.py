@@ -3,13 +3,13 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..services.auth_service import AuthService
-from ..services.exam_product_service import ExamProductService
+from ..services.exam_product_service import AsyncExamProductService
 from ..models.user import User, UserRole
 from ..schemas.exam_product import (
     ExamProductCreate,
@@ -28,11 +28,11 @@ async def get_exam_products(
     is_active: Optional[bool] = None,
     exam_type: Optional[str] = None,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考试产品列表"""
-    service = ExamProductService(db)
-    products = service.get_exam_products(
+    service = AsyncExamProductService(db)
+    products = await service.get_exam_products(
         skip=skip,
         limit=limit,
         is_active=is_active,
@@ -45,11 +45,11 @@ async def get_exam_products(
 async def get_exam_product(
     product_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考试产品详情"""
-    service = ExamProductService(db)
-    product = service.get_exam_product_by_id(product_id)
+    service = AsyncExamProductService(db)
+    product = await service.get_exam_product_by_id(product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,13 +61,13 @@ async def get_exam_product(
 @router.post("/", response_model=ExamProductResponse, summary="创建考试产品")
 async def create_exam_product(
     product_data: ExamProductCreate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("exam_product:create")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建新的考试产品"""
-    service = ExamProductService(db)
+    service = AsyncExamProductService(db)
     try:
-        product = service.create_exam_product(product_data)
+        product = await service.create_exam_product(product_data)
         return product
     except ValueError as e:
         raise HTTPException(
@@ -80,13 +80,13 @@ async def create_exam_product(
 async def update_exam_product(
     product_id: int,
     product_data: ExamProductUpdate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("exam_product:update")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新考试产品信息"""
-    service = ExamProductService(db)
+    service = AsyncExamProductService(db)
     try:
-        product = service.update_exam_product(product_id, product_data)
+        product = await service.update_exam_product(product_id, product_data)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -103,12 +103,12 @@ async def update_exam_product(
 @router.delete("/{product_id}", summary="删除考试产品")
 async def delete_exam_product(
     product_id: int,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("exam_product:delete")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除考试产品"""
-    service = ExamProductService(db)
-    success = service.delete_exam_product(product_id)
+    service = AsyncExamProductService(db)
+    success = await service.delete_exam_product(product_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -120,13 +120,13 @@ async def delete_exam_product(
 @router.post("/{product_id}/toggle-status", summary="切换考试产品状态")
 async def toggle_exam_product_status(
     product_id: int,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("exam_product:update")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """切换考试产品的启用/禁用状态"""
-    service = ExamProductService(db)
+    service = AsyncExamProductService(db)
     try:
-        product = service.toggle_exam_product_status(product_id)
+        product = await service.toggle_exam_product_status(product_id)
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
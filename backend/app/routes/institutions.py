@@ -3,12 +3,12 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..services.auth_service import AuthService
-from ..services.institution_service import InstitutionService
+from ..services.institution_service import AsyncInstitutionService
 from ..models.user import User, UserRole
 
 router = APIRouter(prefix="/institutions", tags=["机构管理"])
@@ -20,18 +20,18 @@ async def get_institutions(
     limit: int = 20,
     search: Optional[str] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(AuthService.get_current_user)
 ):
     """获取机构列表"""
-    service = InstitutionService(db)
-    institutions = service.get_institutions(
+    service = AsyncInstitutionService(db)
+    institutions = await service.get_institutions(
         skip=skip,
         limit=limit,
         search=search,
         is_active=is_active
     )
-    total = service.count_institutions(search=search, is_active=is_active)
+    total = await service.count_institutions(search=search, is_active=is_active)
     
     return {
         "items": institutions,
@@ -44,12 +44,12 @@ async def get_institutions(
 @router.get("/{institution_id}", summary="获取机构详情")
 async def get_institution(
     institution_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(AuthService.get_current_user)
 ):
     """获取指定机构的详细信息"""
-    service = InstitutionService(db)
-    institution = service.get_institution(institution_id)
+    service = AsyncInstitutionService(db)
+    institution = await service.get_institution(institution_id)
     
     if not institution:
         raise HTTPException(
@@ -69,14 +69,14 @@ async def create_institution(
     contact_phone: str = None,
     contact_email: str = None,
     address: str = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(AuthService.require_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(AuthService.require_permission("institution:create"))
 ):
     """创建新机构（需要管理员权限）"""
-    service = InstitutionService(db)
+    service = AsyncInstitutionService(db)
     
     try:
-        institution = service.create_institution(
+        institution = await service.create_institution(
             name=name,
             code=code,
             type=type,
@@ -104,13 +104,13 @@ async def update_institution(
     address: str = None,
     is_active: bool = None,
     is_approved: bool = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(AuthService.require_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(AuthService.require_permission("institution:update"))
 ):
     """更新机构信息（需要管理员权限）"""
-    service = InstitutionService(db)
+    service = AsyncInstitutionService(db)
     
-    institution = service.update_institution(
+    institution = await service.update_institution(
         institution_id=institution_id,
         name=name,
         type=type,
@@ -134,13 +134,13 @@ async def update_institution(
 @router.delete("/{institution_id}", summary="删除机构")
 async def delete_institution(
     institution_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(AuthService.require_super_admin)
 ):
     """删除机构（需要超级管理员权限）"""
-    service = InstitutionService(db)
+    service = AsyncInstitutionService(db)
     
-    success = service.delete_institution(institution_id)
+    success = await service.delete_institution(institution_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,12 +155,12 @@ async def get_institution_venues(
     institution_id: int,
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(AuthService.get_current_user)
 ):
     """获取指定机构的考场列表"""
-    service = InstitutionService(db)
-    venues = service.get_institution_venues(
+    service = AsyncInstitutionService(db)
+    venues = await service.get_institution_venues(
         institution_id=institution_id,
         skip=skip,
         limit=limit
@@ -176,11 +176,11 @@ async def get_institution_venues(
 @router.get("/{institution_id}/stats", summary="获取机构统计信息")
 async def get_institution_stats(
     institution_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(AuthService.get_current_user)
 ):
     """获取机构的统计信息"""
-    service = InstitutionService(db)
-    stats = service.get_institution_stats(institution_id)
+    service = AsyncInstitutionService(db)
+    stats = await service.get_institution_stats(institution_id)
     
     return stats
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+后台任务API路由
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from typing import Any, Dict
+import os
+
+import redis
+
+from ..core.jobs import RESULT_FILENAME, SUCCEEDED, get_job, job_dir, request_cancel
+from ..core.permissions import permission_engine
+from ..services.auth_service import AuthService
+from ..models.user import User
+
+router = APIRouter(prefix="/jobs", tags=["后台任务"])
+
+
+async def _get_job_or_404(job_id: str, current_user: User) -> Dict[str, Any]:
+    """获取任务并检查权限：只有提交者和拥有 system:monitor 权限的用户可以访问"""
+    try:
+        job = await run_in_threadpool(get_job, job_id)
+    except redis.RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="任务服务暂不可用"
+        )
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    
+    if job["created_by"] != current_user.id:
+        await permission_engine.refresh()
+        if not permission_engine.allows(current_user, "system:monitor"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权访问该任务"
+            )
+    
+    return job
+
+
+@router.get("/{job_id}", summary="查询任务进度")
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(AuthService.get_current_user)
+):
+    """查询任务状态、进度（已处理/总数）以及目前的错误"""
+    return await _get_job_or_404(job_id, current_user)
+
+
+@router.post("/{job_id}/cancel", summary="取消任务")
+async def cancel_job(
+    job_id: str,
+    current_user: User = Depends(AuthService.get_current_user)
+):
+    """取消任务（运行中的任务在处理完当前批次后停止，已完成的批次不会回滚）"""
+    await _get_job_or_404(job_id, current_user)
+    return await run_in_threadpool(request_cancel, job_id)
+
+
+@router.get("/{job_id}/result", summary="下载任务结果")
+async def download_job_result(
+    job_id: str,
+    current_user: User = Depends(AuthService.get_current_user)
+):
+    """下载任务结果文件"""
+    job = await _get_job_or_404(job_id, current_user)
+    
+    path = os.path.join(job_dir(job_id), RESULT_FILENAME)
+    if job["status"] != SUCCEEDED or not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="任务尚未完成或没有结果"
+        )
+    
+    return FileResponse(path, media_type="application/json", filename=f"{job['type']}_{job_id}.json")
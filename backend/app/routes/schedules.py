@@ -2,39 +2,43 @@
 日程管理API路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..services.auth_service import AuthService
-from ..services.schedule_service import ScheduleService
+from ..services.schedule_service import AsyncScheduleService
 from ..models.user import User, UserRole
 from ..schemas.schedule import (
     ScheduleCreate,
     ScheduleUpdate,
     ScheduleResponse,
     BatchScheduleCreate,
+    TimetableOptimize,
+    TimetablePlanResponse,
+    ScheduleList,
     ScheduleStatistics
 )
 
 router = APIRouter(prefix="/schedules", tags=["日程管理"])
 
 
-@router.get("/", response_model=List[ScheduleResponse], summary="获取日程列表")
+@router.get("/", response_model=ScheduleList, summary="获取日程列表")
 async def get_schedules(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    size: int = 20,
+    with_total: bool = False,
     venue_id: Optional[int] = None,
     date: Optional[str] = None,
-    status: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
     institution_id: Optional[int] = None,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取日程列表"""
-    service = ScheduleService(db)
+    """获取日程列表（游标分页，翻页时传入上一页返回的 next_cursor）"""
+    service = AsyncScheduleService(db)
     
     # 解析日期
     schedule_date = None
@@ -51,26 +55,33 @@ async def get_schedules(
     if current_user.role == UserRole.OPERATOR:
         institution_id = current_user.institution_id
     
-    schedules = service.get_schedules(
-        skip=skip,
-        limit=limit,
-        venue_id=venue_id,
-        date=schedule_date,
-        status=status,
-        institution_id=institution_id
-    )
-    return schedules
+    try:
+        page = await service.get_schedules(
+            cursor=cursor,
+            size=size,
+            venue_id=venue_id,
+            date=schedule_date,
+            status=status_filter,
+            institution_id=institution_id,
+            with_total=with_total
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return page.to_dict()
 
 
 @router.get("/{schedule_id}", response_model=ScheduleResponse, summary="获取日程详情")
 async def get_schedule(
     schedule_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取日程详情"""
-    service = ScheduleService(db)
-    schedule = service.get_schedule_by_id(schedule_id)
+    service = AsyncScheduleService(db)
+    schedule = await service.get_schedule_by_id(schedule_id)
     if not schedule:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -91,13 +102,13 @@ async def get_schedule(
 @router.post("/", response_model=ScheduleResponse, summary="创建日程")
 async def create_schedule(
     schedule_data: ScheduleCreate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("schedule:create")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建新日程"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     try:
-        schedule = service.create_schedule(
+        schedule = await service.create_schedule(
             registration_id=schedule_data.registration_id,
             exam_product_id=schedule_data.exam_product_id,
             venue_id=schedule_data.venue_id,
@@ -115,13 +126,13 @@ async def create_schedule(
 @router.post("/batch", summary="批量创建日程")
 async def batch_create_schedules(
     batch_data: BatchScheduleCreate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("schedule:create")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """批量创建日程安排"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     try:
-        schedules = service.batch_create_schedules(
+        schedules = await service.batch_create_schedules(
             registration_ids=batch_data.registration_ids,
             exam_product_id=batch_data.exam_product_id,
             venue_id=batch_data.venue_id,
@@ -139,17 +150,48 @@ async def batch_create_schedules(
         )
 
 
+@router.post("/optimize", response_model=TimetablePlanResponse, summary="自动排期")
+async def optimize_timetable(
+    optimize_data: TimetableOptimize,
+    current_user: User = Depends(AuthService.require_permission("schedule:create")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    为已审核通过的报名自动生成排期表
+    
+    理论考试按场次合并到理论考场，实操考试分散到并行的实操考场，尽量缩短整体结束时间。
+    dry_run 为true（默认）时只返回排期方案和考场利用率，确认后以 dry_run=false 再次调用写入日程。
+    """
+    service = AsyncScheduleService(db)
+    try:
+        return await service.optimize_timetable(
+            exam_date=optimize_data.exam_date,
+            day_start=optimize_data.day_start,
+            day_end=optimize_data.day_end,
+            days=optimize_data.days,
+            exam_product_ids=optimize_data.exam_product_ids,
+            venue_ids=optimize_data.venue_ids,
+            institution_id=optimize_data.institution_id,
+            dry_run=optimize_data.dry_run
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.put("/{schedule_id}", response_model=ScheduleResponse, summary="更新日程")
 async def update_schedule(
     schedule_id: int,
     schedule_data: ScheduleUpdate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("schedule:update")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新日程信息"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     try:
-        schedule = service.update_schedule(schedule_id, schedule_data)
+        schedule = await service.update_schedule(schedule_id, schedule_data)
         if not schedule:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -166,13 +208,13 @@ async def update_schedule(
 @router.delete("/{schedule_id}", summary="删除日程")
 async def delete_schedule(
     schedule_id: int,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("schedule:delete")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除日程"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     try:
-        success = service.delete_schedule(schedule_id)
+        success = await service.delete_schedule(schedule_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -190,12 +232,12 @@ async def delete_schedule(
 async def start_schedule(
     schedule_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """开始执行日程"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     try:
-        schedule = service.start_schedule(schedule_id)
+        schedule = await service.start_schedule(schedule_id)
         if not schedule:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -216,12 +258,12 @@ async def start_schedule(
 async def complete_schedule(
     schedule_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """完成日程"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     try:
-        schedule = service.complete_schedule(schedule_id)
+        schedule = await service.complete_schedule(schedule_id)
         if not schedule:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -242,10 +284,10 @@ async def complete_schedule(
 async def get_schedule_statistics(
     date: Optional[str] = None,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取日程统计信息"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     
     # 解析日期
     schedule_date = None
@@ -258,7 +300,7 @@ async def get_schedule_statistics(
                 detail="日期格式错误，请使用YYYY-MM-DD格式"
             )
     
-    stats = service.get_schedule_statistics(schedule_date)
+    stats = await service.get_schedule_statistics(schedule_date)
     return stats
 
 
@@ -266,10 +308,10 @@ async def get_schedule_statistics(
 async def get_venue_today_schedules(
     venue_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取指定考场今日的日程安排"""
-    service = ScheduleService(db)
+    service = AsyncScheduleService(db)
     today = datetime.now()
-    schedules = service.get_venue_schedules(venue_id, today)
+    schedules = await service.get_venue_schedules(venue_id, today)
     return schedules
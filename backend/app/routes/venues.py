@@ -2,14 +2,14 @@
 考场管理API路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..services.auth_service import AuthService
-from ..services.venue_service import VenueService
+from ..services.venue_service import AsyncVenueService
 from ..models.user import User, UserRole
 from ..schemas.venue import (
     VenueCreate,
@@ -21,42 +21,50 @@ from ..schemas.venue import (
 router = APIRouter(prefix="/venues", tags=["考场管理"])
 
 
-@router.get("/", response_model=List[VenueResponse], summary="获取考场列表")
+@router.get("/", response_model=VenueList, summary="获取考场列表")
 async def get_venues(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    size: int = 20,
+    with_total: bool = False,
     institution_id: Optional[int] = None,
-    status: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
     venue_type: Optional[str] = None,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """获取考场列表"""
-    service = VenueService(db)
+    """获取考场列表（游标分页，翻页时传入上一页返回的 next_cursor）"""
+    service = AsyncVenueService(db)
     
     # 机构用户只能查看本机构的考场
     if current_user.role == UserRole.OPERATOR:
         institution_id = current_user.institution_id
     
-    venues = service.get_venues(
-        skip=skip,
-        limit=limit,
-        institution_id=institution_id,
-        status=status,
-        venue_type=venue_type
-    )
-    return venues
+    try:
+        page = await service.get_venues(
+            cursor=cursor,
+            size=size,
+            institution_id=institution_id,
+            status=status_filter,
+            venue_type=venue_type,
+            with_total=with_total
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return page.to_dict()
 
 
 @router.get("/{venue_id}", response_model=VenueResponse, summary="获取考场详情")
 async def get_venue(
     venue_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考场详情"""
-    service = VenueService(db)
-    venue = service.get_venue_by_id(venue_id)
+    service = AsyncVenueService(db)
+    venue = await service.get_venue_by_id(venue_id)
     if not venue:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,13 +84,13 @@ async def get_venue(
 @router.post("/", response_model=VenueResponse, summary="创建考场")
 async def create_venue(
     venue_data: VenueCreate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("venue:create")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建新考场"""
-    service = VenueService(db)
+    service = AsyncVenueService(db)
     try:
-        venue = service.create_venue(venue_data)
+        venue = await service.create_venue(venue_data)
         return venue
     except ValueError as e:
         raise HTTPException(
@@ -95,13 +103,13 @@ async def create_venue(
 async def update_venue(
     venue_id: int,
     venue_data: VenueUpdate,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("venue:update")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新考场信息"""
-    service = VenueService(db)
+    service = AsyncVenueService(db)
     try:
-        venue = service.update_venue(venue_id, venue_data)
+        venue = await service.update_venue(venue_id, venue_data)
         if not venue:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -118,13 +126,13 @@ async def update_venue(
 @router.delete("/{venue_id}", summary="删除考场")
 async def delete_venue(
     venue_id: int,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("venue:delete")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除考场"""
-    service = VenueService(db)
+    service = AsyncVenueService(db)
     try:
-        success = service.delete_venue(venue_id)
+        success = await service.delete_venue(venue_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -141,13 +149,13 @@ async def delete_venue(
 @router.post("/{venue_id}/toggle-status", summary="切换考场状态")
 async def toggle_venue_status(
     venue_id: int,
-    current_user: User = Depends(AuthService.require_admin),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(AuthService.require_permission("venue:update")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """切换考场的可用/维护状态"""
-    service = VenueService(db)
+    service = AsyncVenueService(db)
     try:
-        venue = service.toggle_venue_status(venue_id)
+        venue = await service.toggle_venue_status(venue_id)
         if not venue:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -169,10 +177,10 @@ async def get_venue_schedules(
     venue_id: int,
     date: Optional[str] = None,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考场的日程安排"""
-    service = VenueService(db)
+    service = AsyncVenueService(db)
     
     # 解析日期
     schedule_date = None
@@ -185,7 +193,7 @@ async def get_venue_schedules(
                 detail="日期格式错误，请使用YYYY-MM-DD格式"
             )
     
-    schedules = service.get_venue_schedules(venue_id, schedule_date)
+    schedules = await service.get_venue_schedules(venue_id, schedule_date)
     return schedules
 
 
@@ -193,9 +201,9 @@ async def get_venue_schedules(
 async def get_venue_current_status(
     venue_id: int,
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考场当前状态信息"""
-    service = VenueService(db)
-    status_info = service.get_venue_current_status(venue_id)
+    service = AsyncVenueService(db)
+    status_info = await service.get_venue_current_status(venue_id)
     return status_info
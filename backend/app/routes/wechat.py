@@ -2,18 +2,24 @@
 微信小程序专用API路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-import qrcode
-import io
-import base64
+import asyncio
 
-from ..config.database import get_db
+import redis
+
+from ..config.database import get_async_db
+from ..config.settings import settings
+from ..core.jobs import create_job, job_executor
+from ..core.venue_stream import venue_status_broadcaster
+from ..utils.qrcode import generate_qr_code, decode_qr_token, QR_TOKEN_CANDIDATE
 from ..services.auth_service import AuthService
-from ..services.wechat_service import WeChatService
-from ..services.schedule_service import ScheduleService
+from ..services.wechat_service import AsyncWeChatService, run_qrcode_prerender_job
+from ..services.schedule_service import AsyncScheduleService
 from ..models.user import User, UserRole
 from ..schemas.wechat import (
     WeChatLoginRequest,
@@ -30,12 +36,12 @@ router = APIRouter(prefix="/wechat", tags=["微信小程序"])
 @router.post("/login", response_model=WeChatLoginResponse, summary="微信小程序登录")
 async def wechat_login(
     login_data: WeChatLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """微信小程序登录（身份证号登录）"""
-    service = WeChatService(db)
+    service = AsyncWeChatService(db)
     try:
-        result = service.login_by_id_card(login_data.id_card, login_data.openid)
+        result = await service.login_by_id_card(login_data.id_card, login_data.openid)
         return result
     except ValueError as e:
         raise HTTPException(
@@ -47,7 +53,7 @@ async def wechat_login(
 @router.get("/candidate/schedule", response_model=List[CandidateScheduleResponse], summary="获取考生日程")
 async def get_candidate_schedule(
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取当前考生的日程安排"""
     if current_user.role != UserRole.CANDIDATE:
@@ -56,15 +62,16 @@ async def get_candidate_schedule(
             detail="只有考生可以访问此接口"
         )
     
-    service = ScheduleService(db)
-    schedules = service.get_candidate_schedules(current_user.id)
+    service = AsyncScheduleService(db)
+    schedules = await service.get_candidate_schedules(current_user.id)
     return schedules
 
 
 @router.get("/candidate/qrcode", summary="获取考生二维码")
 async def get_candidate_qrcode(
+    format: str = Query("png", pattern="^(png|svg)$", description="图片格式"),
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考生的动态二维码"""
     if current_user.role != UserRole.CANDIDATE:
@@ -73,57 +80,142 @@ async def get_candidate_qrcode(
             detail="只有考生可以访问此接口"
         )
     
-    service = WeChatService(db)
-    qr_data = service.generate_candidate_qrcode(current_user.id)
-    
-    # 生成二维码图片
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # 转换为base64
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
+    service = AsyncWeChatService(db)
+    qr_data = await service.generate_candidate_qrcode(current_user.id)
+    token = decode_qr_token(qr_data)
     
     return {
-        "qr_code": f"data:image/png;base64,{img_str}",
+        "qr_code": generate_qr_code(qr_data, image_format=format),
         "qr_data": qr_data,
-        "expires_at": datetime.now().isoformat()
+        "expires_at": datetime.fromtimestamp(token.expires_at).isoformat()
     }
 
 
+@router.post("/qrcodes/prerender", summary="预渲染考生二维码")
+async def prerender_candidate_qrcodes(
+    date: str = Query(..., description="考试日期（YYYY-MM-DD）"),
+    current_user: User = Depends(AuthService.require_admin)
+):
+    """提交后台任务，预渲染指定考试日期所有考生的二维码，进度通过 /jobs/{job_id} 查询"""
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="日期格式错误，请使用YYYY-MM-DD格式"
+        )
+    
+    try:
+        job_id = await run_in_threadpool(create_job, "qrcode_prerender", current_user.id)
+    except redis.RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="任务服务暂不可用"
+        )
+    
+    job_executor.submit(job_id, run_qrcode_prerender_job, exam_date=date)
+    
+    return {"job_id": job_id, "status": "pending"}
+
+
 @router.get("/venues/status", response_model=List[VenueStatusResponse], summary="获取考场状态")
 async def get_venues_status(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取所有考场的实时状态（公共接口）"""
-    service = WeChatService(db)
-    venues = service.get_venues_status()
+    service = AsyncWeChatService(db)
+    venues = await service.get_venues_status()
     return venues
 
 
+@router.get("/venues/stream", summary="订阅考场状态（SSE）")
+async def stream_venues_status(request: Request):
+    """
+    以Server-Sent Events推送考场状态（公共接口）
+    
+    首条 snapshot 事件为全部考场状态，之后的 delta 事件只包含发生变化（venues）或被移除（removed）的考场。
+    """
+    async def event_stream():
+        async with venue_status_broadcaster.subscribe() as queue:
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.venue_stream_heartbeat)
+                except asyncio.TimeoutError:
+                    # 心跳，防止反向代理因读超时断开连接
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.websocket("/venues/ws")
+async def venues_status_websocket(websocket: WebSocket):
+    """以WebSocket推送考场状态（小程序等不支持SSE的客户端使用），消息格式与SSE一致"""
+    await websocket.accept()
+    
+    async def forward(queue: asyncio.Queue):
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.venue_stream_heartbeat)
+            except asyncio.TimeoutError:
+                message = '{"type": "ping"}'
+            await websocket.send_text(message)
+    
+    async def receive():
+        # 客户端不发送业务消息，持续读取以便及时感知断开
+        while True:
+            await websocket.receive_text()
+    
+    async with venue_status_broadcaster.subscribe() as queue:
+        tasks = [asyncio.create_task(forward(queue)), asyncio.create_task(receive())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                raise task.exception()
+
+
 @router.post("/checkin", response_model=CheckInResponse, summary="扫码签到")
 async def checkin_candidate(
     checkin_data: CheckInRequest,
-    current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=64),
+    current_user: User = Depends(AuthService.require_permission("checkin:create")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """考务人员扫码签到"""
-    if current_user.role not in [UserRole.ADMIN, UserRole.EXAMINER]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="只有考务人员可以执行签到操作"
-        )
+    """考务人员扫码签到（幂等键可通过请求体或 Idempotency-Key 请求头传入）"""
+    schedule_id = checkin_data.schedule_id
+    if checkin_data.qr_token:
+        # 先校验签名和有效期，伪造或过期的二维码不访问数据库
+        try:
+            token = decode_qr_token(checkin_data.qr_token, token_type=QR_TOKEN_CANDIDATE)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        if not token.schedule_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="该二维码没有待签到的日程"
+            )
+        schedule_id = token.schedule_id
     
-    service = WeChatService(db)
+    service = AsyncWeChatService(db)
     try:
-        result = service.process_checkin(
-            schedule_id=checkin_data.schedule_id,
+        result = await service.process_checkin(
+            schedule_id=schedule_id,
             examiner_id=current_user.id,
-            venue_id=checkin_data.venue_id
+            venue_id=checkin_data.venue_id,
+            idempotency_key=checkin_data.idempotency_key or idempotency_key
         )
         return result
     except ValueError as e:
@@ -136,7 +228,7 @@ async def checkin_candidate(
 @router.get("/candidate/queue-position", summary="获取排队位置")
 async def get_queue_position(
     current_user: User = Depends(AuthService.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取考生在当前考场的排队位置"""
     if current_user.role != UserRole.CANDIDATE:
@@ -145,16 +237,16 @@ async def get_queue_position(
             detail="只有考生可以访问此接口"
         )
     
-    service = ScheduleService(db)
-    position = service.get_candidate_queue_position(current_user.id)
+    service = AsyncScheduleService(db)
+    position = await service.get_candidate_queue_position(current_user.id)
     return position
 
 
 @router.get("/dashboard", summary="获取看板数据")
 async def get_dashboard_data(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取小程序看板数据（公共接口）"""
-    service = WeChatService(db)
-    dashboard = service.get_dashboard_data()
+    service = AsyncWeChatService(db)
+    dashboard = await service.get_dashboard_data()
     return dashboard
@@ -50,10 +50,10 @@ class CandidateResponse(CandidateBase):
 class CandidateList(BaseModel):
     """考生列表响应模式"""
     items: List[CandidateResponse]
-    total: int
-    page: int
     size: int
-    pages: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有下一页时为空")
+    has_next: bool
+    total: Optional[int] = Field(None, description="总数（仅在请求时返回）")
 
 
 class BatchImportResult(BaseModel):
@@ -4,7 +4,8 @@
 
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime, date
+from enum import Enum
+from datetime import datetime, date, time
 
 
 class ScheduleBase(BaseModel):
@@ -54,6 +55,11 @@ class ScheduleResponse(ScheduleBase):
     venue_name: Optional[str] = None
     institution_name: Optional[str] = None
     
+    @validator('status', pre=True)
+    def validate_status(cls, v):
+        # ORM对象的状态为枚举，转换为枚举值
+        return v.value if isinstance(v, Enum) else v
+    
     class Config:
         from_attributes = True
 
@@ -67,13 +73,48 @@ class BatchScheduleCreate(BaseModel):
     duration_minutes: int = Field(15, description="单个考试时长（分钟）", ge=1, le=480)
 
 
+
+class TimetableOptimize(BaseModel):
+    """自动排期请求模式"""
+    exam_date: date = Field(..., description="排期开始日期")
+    day_start: time = Field(time(8, 0), description="每日考场开放时间")
+    day_end: time = Field(time(18, 0), description="每日考场关闭时间")
+    days: int = Field(1, description="排期天数", ge=1, le=31)
+    exam_product_ids: Optional[List[int]] = Field(None, description="只为这些考试产品排期")
+    venue_ids: Optional[List[int]] = Field(None, description="只使用这些考场")
+    institution_id: Optional[int] = Field(None, description="只为该机构的考生和考场排期")
+    dry_run: bool = Field(True, description="只计算排期和利用率，不写入数据库")
+    
+    @validator('day_end')
+    def validate_day_end(cls, v, values):
+        if 'day_start' in values and v <= values['day_start']:
+            raise ValueError('每日关闭时间必须晚于开放时间')
+        return v
+
+
+class TimetableAssignment(BaseModel):
+    """自动排期结果中的一条日程"""
+    registration_id: int
+    exam_product_id: int
+    venue_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class TimetablePlanResponse(BaseModel):
+    """自动排期结果模式"""
+    dry_run: bool
+    metrics: Dict[str, Any] = Field(..., description="排期人数、makespan、考场利用率等指标")
+    assignments: List[TimetableAssignment]
+    unscheduled_registration_ids: List[int] = Field(..., description="可用时间内排不下的报名ID")
+
 class ScheduleList(BaseModel):
     """日程列表响应模式"""
     items: List[ScheduleResponse]
-    total: int
-    page: int
     size: int
-    pages: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有下一页时为空")
+    has_next: bool
+    total: Optional[int] = Field(None, description="总数（仅在请求时返回）")
 
 
 class ScheduleStatistics(BaseModel):
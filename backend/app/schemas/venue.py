@@ -2,8 +2,9 @@
 考场数据模式
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
+from enum import Enum
 from datetime import datetime
 
 
@@ -52,6 +53,11 @@ class VenueResponse(VenueBase):
     created_at: datetime
     updated_at: datetime
     
+    @validator('status', pre=True)
+    def validate_status(cls, v):
+        # ORM对象的状态为枚举，转换为枚举值
+        return v.value if isinstance(v, Enum) else v
+    
     class Config:
         from_attributes = True
 
@@ -59,10 +65,10 @@ class VenueResponse(VenueBase):
 class VenueList(BaseModel):
     """考场列表响应模式"""
     items: List[VenueResponse]
-    total: int
-    page: int
     size: int
-    pages: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有下一页时为空")
+    has_next: bool
+    total: Optional[int] = Field(None, description="总数（仅在请求时返回）")
 
 
 class VenueStatusInfo(BaseModel):
@@ -2,7 +2,7 @@
 微信小程序数据模式
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -55,8 +55,16 @@ class VenueStatusResponse(BaseModel):
 
 class CheckInRequest(BaseModel):
     """签到请求"""
-    schedule_id: int = Field(..., description="日程ID")
+    schedule_id: Optional[int] = Field(None, description="日程ID")
     venue_id: int = Field(..., description="考场ID")
+    qr_token: Optional[str] = Field(None, max_length=64, description="考生二维码令牌（与日程ID二选一）")
+    idempotency_key: Optional[str] = Field(None, max_length=64, description="幂等键（扫码端重试时保持不变）")
+    
+    @validator('qr_token', always=True)
+    def validate_qr_token(cls, v, values):
+        if not v and not values.get('schedule_id'):
+            raise ValueError('日程ID和二维码令牌至少需要提供一个')
+        return v
 
 
 class CheckInResponse(BaseModel):
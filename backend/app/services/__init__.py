@@ -3,25 +3,35 @@
 """
 
 from .auth_service import AuthService
-from .user_service import UserService  
 from .institution_service import InstitutionService
 from .venue_service import VenueService
-from .exam_service import ExamService
-from .checkin_service import CheckInService
 from .exam_product_service import ExamProductService
 from .candidate_service import CandidateService
 from .wechat_service import WeChatService
 from .schedule_service import ScheduleService
+from .base import AsyncServiceBase
+from .auth_service import AsyncAuthService
+from .institution_service import AsyncInstitutionService
+from .venue_service import AsyncVenueService
+from .exam_product_service import AsyncExamProductService
+from .candidate_service import AsyncCandidateService
+from .wechat_service import AsyncWeChatService
+from .schedule_service import AsyncScheduleService
 
 __all__ = [
     "AuthService",
-    "UserService",
     "InstitutionService", 
     "VenueService",
-    "ExamService",
-    "CheckInService",
     "ExamProductService",
     "CandidateService",
     "WeChatService",
-    "ScheduleService"
+    "ScheduleService",
+    "AsyncServiceBase",
+    "AsyncAuthService",
+    "AsyncInstitutionService",
+    "AsyncVenueService",
+    "AsyncExamProductService",
+    "AsyncCandidateService",
+    "AsyncWeChatService",
+    "AsyncScheduleService"
 ]
\ No newline at end of file
@@ -5,13 +5,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime
+from typing import Optional
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..config.settings import settings
+from ..core.permissions import permission_engine
+from ..core.principals import get_principal, invalidate_principal, set_principal
 from ..models.user import User, UserRole
-from ..utils.security import verify_password, get_password_hash
+from ..utils.security import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_and_update_password,
+    verify_and_update_password_async
+)
+from .base import AsyncServiceBase
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -24,18 +34,32 @@ class AuthService:
     
     def authenticate_user(self, username: str, password: str) -> User:
         """验证用户凭据"""
-        user = self.db.query(User).filter(
+        user = self.get_user_for_login(username)
+        if not user:
+            return None
+        
+        valid, new_hash = verify_and_update_password(password, user.password_hash, _default_password(user))
+        if not valid:
+            return None
+        
+        self.record_login(user, new_hash)
+        return user
+    
+    def get_user_for_login(self, username: str) -> Optional[User]:
+        """根据用户名、邮箱或手机号获取用户"""
+        return self.db.query(User).filter(
             (User.username == username) | 
             (User.email == username) | 
             (User.phone == username)
         ).first()
-        
-        if not user or not verify_password(password, user.password_hash):
-            return None
-        
-        # 更新最后登录时间
+    
+    def record_login(self, user: User, new_password_hash: Optional[str] = None) -> User:
+        """记录登录成功：更新最后登录时间，需要时写入升级后的密码哈希"""
         user.last_login = datetime.utcnow()
+        if new_password_hash:
+            user.password_hash = new_password_hash
         self.db.commit()
+        invalidate_principal(user.id)
         
         return user
     
@@ -46,9 +70,10 @@ class AuthService:
         email: str = None,
         real_name: str = None,
         phone: str = None,
-        role: UserRole = UserRole.CANDIDATE
+        role: UserRole = UserRole.CANDIDATE,
+        password_hash: Optional[str] = None
     ) -> User:
-        """创建新用户"""
+        """创建新用户（已在进程池中计算好密码哈希时通过 password_hash 传入）"""
         # 检查用户名是否已存在
         if self.db.query(User).filter(User.username == username).first():
             raise ValueError("用户名已存在")
@@ -64,7 +89,7 @@ class AuthService:
         # 创建用户
         user = User(
             username=username,
-            password_hash=get_password_hash(password),
+            password_hash=password_hash or get_password_hash(password),
             email=email,
             real_name=real_name,
             phone=phone,
@@ -86,9 +111,9 @@ class AuthService:
         return self.db.query(User).filter(User.username == username).first()
     
     @staticmethod
-    def get_current_user(
+    async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
     ) -> User:
         """获取当前登录用户"""
         credentials_exception = HTTPException(
@@ -105,10 +130,13 @@ class AuthService:
         except JWTError:
             raise credentials_exception
         
-        service = AuthService(db)
-        user = service.get_user_by_id(user_id)
+        # 先查登录用户缓存，未命中时才查询数据库
+        user = await get_principal(user_id)
         if user is None:
-            raise credentials_exception
+            user = await db.get(User, user_id)
+            if user is None:
+                raise credentials_exception
+            await set_principal(user)
         
         if not user.is_active:
             raise HTTPException(
@@ -130,6 +158,23 @@ class AuthService:
             return current_user
         return role_checker
     
+    @staticmethod
+    def require_permission(permission: str):
+        """
+        要求特定权限的依赖生成器，如 Depends(AuthService.require_permission("schedule:update"))
+        
+        权限由启动时编译的权限矩阵判断，不访问数据库。
+        """
+        async def permission_checker(current_user: User = Depends(AuthService.get_current_user)):
+            await permission_engine.refresh()
+            if not permission_engine.allows(current_user, permission):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"需要 {permission} 权限"
+                )
+            return current_user
+        return permission_checker
+    
     @staticmethod
     def require_admin(current_user: User = Depends(get_current_user)):
         """要求管理员权限"""
@@ -148,4 +193,33 @@ class AuthService:
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="需要超级管理员权限"
             )
-        return current_user
\ No newline at end of file
+        return current_user
+
+
+def _default_password(user: User) -> Optional[str]:
+    """批量导入的考生默认密码为身份证后6位"""
+    return user.id_card[-6:] if user.id_card else None
+
+
+class AsyncAuthService(AsyncServiceBase):
+    """认证服务异步版本（bcrypt计算在进程池中执行，不阻塞事件循环）"""
+    service_class = AuthService
+    
+    async def authenticate_user(self, username: str, password: str) -> Optional[User]:
+        """验证用户凭据"""
+        user = await self.db.run_sync(lambda session: AuthService(session).get_user_for_login(username))
+        if not user:
+            return None
+        
+        valid, new_hash = await verify_and_update_password_async(password, user.password_hash, _default_password(user))
+        if not valid:
+            return None
+        
+        return await self.db.run_sync(lambda session: AuthService(session).record_login(user, new_hash))
+    
+    async def create_user(self, password: str, **kwargs) -> User:
+        """创建新用户"""
+        password_hash = await get_password_hash_async(password)
+        return await self.db.run_sync(
+            lambda session: AuthService(session).create_user(password=password, password_hash=password_hash, **kwargs)
+        )
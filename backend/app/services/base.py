@@ -0,0 +1,43 @@
+"""
+服务基类
+"""
+
+from typing import Any, Callable, Optional, Type
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class AsyncServiceBase:
+    """
+    异步服务基类
+
+    通过 AsyncSession.run_sync 在异步驱动（aiomysql/aiosqlite）之上复用同步服务的业务逻辑，
+    查询与隐式加载都经由异步连接完成，不再阻塞事件循环。
+    子类只需指定 service_class；需要原生异步实现的方法可直接在子类中覆盖。
+
+    注意 run_sync 中的同步代码整体在事件循环线程上执行：只有数据库访问会让出事件循环，
+    同步服务中的Redis调用（缓存读写与失效、幂等记录、排队索引同步、事件发布）和CPU计算（如二维码渲染）
+    执行期间事件循环被阻塞。热路径上的方法应在子类中覆盖：数据库部分经由 run_sync 执行，
+    Redis部分通过 run_in_threadpool 执行，见 AsyncWeChatService.process_checkin。
+    """
+
+    service_class: Optional[Type] = None
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_") or self.service_class is None:
+            raise AttributeError(name)
+
+        method = getattr(self.service_class, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        async def runner(*args, **kwargs):
+            return await self.db.run_sync(
+                lambda session: getattr(self.service_class(session), name)(*args, **kwargs)
+            )
+
+        runner.__name__ = name
+        runner.__doc__ = method.__doc__
+        return runner
@@ -3,8 +3,9 @@
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_, func, insert
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Callable, Iterable, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import pandas as pd
 import re
@@ -13,7 +14,39 @@ from ..models.user import User, UserRole
 from ..models.exam import ExamProduct, ExamRegistration, RegistrationStatus
 from ..models.institution import Institution
 from ..schemas.candidate import CandidateCreate, CandidateUpdate, BatchImportResult
-from ..utils.security import get_password_hash
+from ..utils.security import (
+    DEFERRED_PASSWORD_HASH,
+    generate_candidate_number,
+    generate_candidate_numbers,
+    generate_registration_number,
+    generate_registration_numbers
+)
+from ..utils.pagination import CursorPage, paginate_by_cursor
+from ..utils.spreadsheet import count_table_rows, iter_table_chunks
+from ..config.database import SessionLocal
+from ..core.cache import cached, invalidate, invalidates, CANDIDATES
+from ..core.jobs import JobContext
+from ..core.principals import invalidate_principal
+from .base import AsyncServiceBase
+
+# 导入表格列名到字段的映射
+IMPORT_COLUMNS = {
+    "姓名": "real_name",
+    "身份证号": "id_card",
+    "考试产品名称": "exam_product",
+    "手机号（可选）": "phone",
+    "邮箱（可选）": "email"
+}
+IMPORT_REQUIRED_COLUMNS = ["姓名", "身份证号", "考试产品名称"]
+
+# 每个事务导入的行数
+IMPORT_CHUNK_SIZE = 1000
+
+# 查询带序号的用户名时每条语句包含的用户名数（SQLite 的表达式深度上限为1000）
+USERNAME_LOOKUP_BATCH = 500
+
+ID_CARD_PATTERN = r"\d{17}[\dXx]"
+EMAIL_PATTERN = r"[^@\s]+@[^@\s]+\.[^@\s]+"
 
 
 class CandidateService:
@@ -24,35 +57,60 @@ class CandidateService:
     
     def get_candidates(
         self,
-        skip: int = 0,
-        limit: int = 100,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        institution_id: Optional[int] = None,
+        exam_product_id: Optional[int] = None,
+        status: Optional[str] = None,
+        with_total: bool = False
+    ) -> CursorPage:
+        """
+        获取考生列表（按创建时间倒序的游标分页）
+        
+        Args:
+            cursor: 上一页返回的游标，首页不传
+            size: 每页数量
+            with_total: 是否返回总数（计数结果有缓存）
+        """
+        query = self._candidate_query(institution_id, exam_product_id, status)
+        total = self.count_candidates(institution_id, exam_product_id, status) if with_total else None
+        return paginate_by_cursor(query, User.created_at, User.id, cursor=cursor, size=size, total=total)
+    
+    @cached(CANDIDATES)
+    def count_candidates(
+        self,
         institution_id: Optional[int] = None,
         exam_product_id: Optional[int] = None,
         status: Optional[str] = None
-    ) -> List[User]:
-        """获取考生列表"""
+    ) -> int:
+        """统计符合条件的考生数"""
+        return self._candidate_query(institution_id, exam_product_id, status).count()
+    
+    def _candidate_query(
+        self,
+        institution_id: Optional[int] = None,
+        exam_product_id: Optional[int] = None,
+        status: Optional[str] = None
+    ):
         query = self.db.query(User).filter(User.role == UserRole.CANDIDATE)
         
         # 应用过滤条件
         if institution_id:
             query = query.filter(User.institution_id == institution_id)
         
+        # 通过报名记录过滤（使用EXISTS，考生有多条报名记录时不会重复）
+        registration_filters = []
         if exam_product_id:
-            # 通过报名记录过滤
-            query = query.join(ExamRegistration).filter(
-                ExamRegistration.exam_product_id == exam_product_id
-            )
-        
+            registration_filters.append(ExamRegistration.exam_product_id == exam_product_id)
         if status:
-            # 通过报名状态过滤
-            query = query.join(ExamRegistration).filter(
-                ExamRegistration.status == RegistrationStatus(status)
-            )
-        
-        # 按创建时间倒序排列
-        query = query.order_by(User.created_at.desc())
+            try:
+                registration_filters.append(ExamRegistration.status == RegistrationStatus(status))
+            except ValueError:
+                raise ValueError(f"无效的报名状态: {status}")
+        if registration_filters:
+            query = query.filter(User.exam_registrations.any(and_(*registration_filters)))
         
-        return query.offset(skip).limit(limit).all()
+        return query
     
     def get_candidate_by_id(self, candidate_id: int) -> Optional[User]:
         """根据ID获取考生"""
@@ -72,6 +130,7 @@ class CandidateService:
             )
         ).first()
     
+    @invalidates(CANDIDATES)
     def create_candidate(self, candidate_data: CandidateCreate) -> User:
         """创建新的考生"""
         # 验证身份证号格式
@@ -106,7 +165,7 @@ class CandidateService:
         # 创建考生用户
         candidate = User(
             username=username,
-            password_hash=get_password_hash(candidate_data.id_card[-6:]),  # 默认密码为身份证后6位
+            password_hash=DEFERRED_PASSWORD_HASH,  # 默认密码为身份证后6位，首次登录时再计算哈希
             real_name=candidate_data.real_name,
             id_card=candidate_data.id_card,
             phone=candidate_data.phone,
@@ -123,8 +182,8 @@ class CandidateService:
         registration = ExamRegistration(
             user_id=candidate.id,
             exam_product_id=candidate_data.exam_product_id,
-            registration_number=self._generate_registration_number(),
-            candidate_number=self._generate_candidate_number(),
+            registration_number=generate_registration_number(),
+            candidate_number=generate_candidate_number(),
             status=RegistrationStatus.APPROVED  # 默认已通过
         )
         
@@ -133,6 +192,7 @@ class CandidateService:
         
         return candidate
     
+    @invalidates(CANDIDATES)
     def update_candidate(self, candidate_id: int, candidate_data: CandidateUpdate) -> Optional[User]:
         """更新考生信息"""
         candidate = self.get_candidate_by_id(candidate_id)
@@ -158,9 +218,12 @@ class CandidateService:
         
         self.db.commit()
         self.db.refresh(candidate)
+        # 所属机构等信息参与鉴权，清除登录用户缓存
+        invalidate_principal(candidate.id)
         
         return candidate
     
+    @invalidates(CANDIDATES)
     def delete_candidate(self, candidate_id: int) -> bool:
         """删除考生"""
         candidate = self.get_candidate_by_id(candidate_id)
@@ -177,56 +240,247 @@ class CandidateService:
         
         self.db.delete(candidate)
         self.db.commit()
+        invalidate_principal(candidate_id)
         
         return True
     
-    def batch_import_candidates(self, df: pd.DataFrame, institution_id: Optional[int] = None) -> BatchImportResult:
-        """批量导入考生"""
+    @invalidates(CANDIDATES)
+    def batch_import_candidates(
+        self,
+        df: pd.DataFrame,
+        institution_id: Optional[int] = None,
+        progress: Optional[Callable[[int, Optional[int], List[Dict[str, Any]]], None]] = None
+    ) -> BatchImportResult:
+        """
+        批量导入考生
+        
+        Args:
+            df: 导入数据
+            institution_id: 考生所属机构ID
+            progress: 每块提交后的回调 progress(已处理行数, 总行数, 本块错误)
+        """
+        chunks = (df.iloc[start:start + IMPORT_CHUNK_SIZE] for start in range(0, len(df), IMPORT_CHUNK_SIZE))
+        return self.import_candidate_chunks(chunks, institution_id, total=len(df), progress=progress)
+    
+    @invalidates(CANDIDATES)
+    def import_candidate_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        institution_id: Optional[int] = None,
+        total: Optional[int] = None,
+        progress: Optional[Callable[[int, Optional[int], List[Dict[str, Any]]], None]] = None
+    ) -> BatchImportResult:
+        """
+        按块导入考生（可接收流式读取的数据块，内存占用只与块大小有关）
+        
+        每块向量化校验，考试产品、已存在的身份证号/手机号/邮箱和用户名冲突每块各查询一次，
+        考生和报名记录按块批量插入并分块提交；单块插入失败时退回逐行插入以定位出错的行。
+        数据块的索引为行序号，错误中的行号为索引加1。
+        
+        Args:
+            chunks: 数据块序列
+            institution_id: 考生所属机构ID
+            total: 总行数（用于进度汇报，未知时为None）
+            progress: 每块提交后的回调 progress(已处理行数, 总行数, 本块错误)
+        """
+        if not institution_id:
+            raise ValueError("必须指定考生所属机构")
+        
+        if not self.db.query(Institution.id).filter(Institution.id == institution_id).first():
+            raise ValueError("指定的机构不存在")
+        
+        # 预取考试产品名称到ID的映射
+        products = dict(self.db.query(ExamProduct.name, ExamProduct.id).all())
+        
+        processed = 0
         success_count = 0
-        failed_count = 0
         errors = []
         
-        for index, row in df.iterrows():
-            try:
-                # 验证数据
-                if pd.isna(row['姓名']) or pd.isna(row['身份证号']) or pd.isna(row['考试产品名称']):
-                    raise ValueError("姓名、身份证号、考试产品名称为必填项")
-                
-                # 查找考试产品
-                exam_product = self.db.query(ExamProduct).filter(
-                    ExamProduct.name == row['考试产品名称']
-                ).first()
-                if not exam_product:
-                    raise ValueError(f"考试产品 '{row['考试产品名称']}' 不存在")
-                
-                # 创建考生数据
-                candidate_data = CandidateCreate(
-                    real_name=str(row['姓名']),
-                    id_card=str(row['身份证号']),
-                    exam_product_id=exam_product.id,
-                    institution_id=institution_id,
-                    phone=str(row.get('手机号（可选）', '')) if not pd.isna(row.get('手机号（可选）', '')) else None,
-                    email=str(row.get('邮箱（可选）', '')) if not pd.isna(row.get('邮箱（可选）', '')) else None
-                )
-                
-                # 创建考生
-                self.create_candidate(candidate_data)
-                success_count += 1
-                
-            except Exception as e:
-                failed_count += 1
-                errors.append({
-                    "row": index + 1,
-                    "error": str(e)
-                })
+        for chunk in chunks:
+            missing_columns = [column for column in IMPORT_REQUIRED_COLUMNS if column not in chunk.columns]
+            if missing_columns:
+                raise ValueError(f"缺少必填列: {'、'.join(missing_columns)}")
+            
+            chunk_success, chunk_errors = self._import_chunk(chunk, products, institution_id)
+            processed += len(chunk)
+            success_count += chunk_success
+            errors.extend(chunk_errors)
+            if progress:
+                progress(processed, total, chunk_errors)
         
         return BatchImportResult(
-            total=len(df),
+            total=processed,
             success_count=success_count,
-            failed_count=failed_count,
-            errors=errors
+            failed_count=len(errors),
+            errors=sorted(errors, key=lambda error: error["row"])
         )
     
+    def _import_chunk(
+        self,
+        chunk: pd.DataFrame,
+        products: Dict[str, int],
+        institution_id: int
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """校验并导入一块考生数据，返回成功数和错误列表"""
+        frame = self._normalize_import_frame(chunk)
+        row_errors = pd.Series(None, index=frame.index, dtype=object)
+        
+        def flag(mask: pd.Series, message) -> None:
+            # 每行只记录第一个错误
+            mask = mask & row_errors.isna()
+            row_errors[mask] = message[mask] if isinstance(message, pd.Series) else message
+        
+        flag(frame[["real_name", "id_card", "exam_product"]].isna().any(axis=1), "姓名、身份证号、考试产品名称为必填项")
+        flag(~frame["id_card"].fillna("").str.fullmatch(ID_CARD_PATTERN), "身份证号格式不正确")
+        flag(frame["real_name"].str.len() > 50, "考生姓名长度不能超过50个字符")
+        flag(frame["phone"].str.len() > 20, "手机号长度不能超过20个字符")
+        flag(frame["email"].notna() & ~frame["email"].fillna("").str.fullmatch(EMAIL_PATTERN), "邮箱格式不正确")
+        
+        frame["exam_product_id"] = frame["exam_product"].map(products)
+        flag(frame["exam_product_id"].isna(), "考试产品 '" + frame["exam_product"].astype(str) + "' 不存在")
+        
+        flag(frame["id_card"].notna() & frame["id_card"].duplicated(), "身份证号在文件中重复")
+        flag(frame["phone"].notna() & frame["phone"].duplicated(), "手机号在文件中重复")
+        flag(frame["email"].notna() & frame["email"].duplicated(), "邮箱在文件中重复")
+        
+        # 一次查询检查身份证号是否已存在
+        candidate_id_cards = frame.loc[row_errors.isna(), "id_card"].tolist()
+        existing = {
+            id_card for (id_card,) in self.db.query(User.id_card).filter(
+                and_(
+                    User.id_card.in_(candidate_id_cards),
+                    User.role == UserRole.CANDIDATE
+                )
+            ).all()
+        } if candidate_id_cards else set()
+        flag(frame["id_card"].isin(existing), "身份证号 '" + frame["id_card"].astype(str) + "' 已存在")
+        
+        # 一次查询检查手机号、邮箱是否已被其他用户使用
+        pending = frame[row_errors.isna()]
+        phones = pending["phone"].dropna().tolist()
+        emails = pending["email"].dropna().tolist()
+        used_phones, used_emails = set(), set()
+        if phones or emails:
+            for phone, email in self.db.query(User.phone, User.email).filter(
+                or_(User.phone.in_(phones), User.email.in_(emails))
+            ).all():
+                used_phones.add(phone)
+                used_emails.add(email)
+        flag(frame["phone"].isin(used_phones), "手机号 '" + frame["phone"].astype(str) + "' 已被使用")
+        flag(frame["email"].isin(used_emails), "邮箱 '" + frame["email"].astype(str) + "' 已被使用")
+        
+        errors = [
+            {"row": index + 1, "error": error}
+            for index, error in row_errors.dropna().items()
+        ]
+        
+        valid = frame[row_errors.isna()]
+        if valid.empty:
+            return 0, errors
+        
+        usernames = self._assign_usernames(["candidate_" + id_card[-6:] for id_card in valid["id_card"]])
+        
+        registration_numbers = generate_registration_numbers(len(valid))
+        candidate_numbers = generate_candidate_numbers(len(valid))
+        users = []
+        registrations = []
+        for row, username, registration_number, candidate_number in zip(
+            valid.itertuples(), usernames, registration_numbers, candidate_numbers
+        ):
+            users.append({
+                "username": username,
+                # 默认密码为身份证后6位，导入时不计算bcrypt哈希，首次登录时再计算
+                "password_hash": DEFERRED_PASSWORD_HASH,
+                "real_name": row.real_name,
+                "id_card": row.id_card,
+                "phone": row.phone,
+                "email": row.email,
+                "role": UserRole.CANDIDATE,
+                "institution_id": institution_id
+            })
+            registrations.append({
+                "exam_product_id": int(row.exam_product_id),
+                "registration_number": registration_number,
+                "candidate_number": candidate_number,
+                "status": RegistrationStatus.APPROVED  # 默认已通过
+            })
+        
+        try:
+            self._insert_candidates(users, registrations)
+            self.db.commit()
+            return len(users), errors
+        except SQLAlchemyError:
+            self.db.rollback()
+        
+        # 整块插入失败（如并发导入造成的唯一约束冲突），逐行插入定位出错的行
+        success_count = 0
+        for index, user, registration in zip(valid.index, users, registrations):
+            try:
+                with self.db.begin_nested():
+                    self._insert_candidates([user], [registration])
+                success_count += 1
+            except SQLAlchemyError as e:
+                errors.append({"row": index + 1, "error": str(e.orig if hasattr(e, "orig") else e)})
+        self.db.commit()
+        
+        return success_count, errors
+    
+    def _normalize_import_frame(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """将导入表格的列转换为去除首尾空白的字符串，空值统一为None"""
+        frame = pd.DataFrame(index=chunk.index)
+        for column, field in IMPORT_COLUMNS.items():
+            if column not in chunk.columns:
+                frame[field] = None
+                continue
+            values = chunk[column]
+            frame[field] = values.where(values.isna(), values.astype(str).str.strip())
+            frame[field] = frame[field].where(frame[field].notna() & (frame[field] != ""), None)
+        return frame
+    
+    def _assign_usernames(self, bases: List[str]) -> List[str]:
+        """批量分配用户名，与已有用户名冲突时追加序号"""
+        taken = {
+            username for (username,) in self.db.query(User.username).filter(
+                User.username.in_(set(bases))
+            ).all()
+        }
+        
+        # 仅对已被占用的用户名查询其带序号的变体，每批一条语句
+        collided = sorted(taken)
+        for start in range(0, len(collided), USERNAME_LOOKUP_BATCH):
+            taken.update(
+                username for (username,) in self.db.query(User.username).filter(or_(*[
+                    User.username.like(f"{base}\\_%", escape="\\")
+                    for base in collided[start:start + USERNAME_LOOKUP_BATCH]
+                ])).all()
+            )
+        
+        usernames = []
+        for base in bases:
+            username = base
+            counter = 1
+            while username in taken:
+                username = f"{base}_{counter}"
+                counter += 1
+            taken.add(username)
+            usernames.append(username)
+        
+        return usernames
+    
+    def _insert_candidates(self, users: List[Dict[str, Any]], registrations: List[Dict[str, Any]]) -> None:
+        """批量插入考生及其报名记录"""
+        self.db.execute(insert(User), users)
+        
+        user_ids = dict(self.db.query(User.username, User.id).filter(
+            User.username.in_([user["username"] for user in users])
+        ).all())
+        
+        for user, registration in zip(users, registrations):
+            registration["user_id"] = user_ids[user["username"]]
+        
+        self.db.execute(insert(ExamRegistration), registrations)
+    
+    @cached(CANDIDATES)
     def get_candidate_statistics(self, institution_id: Optional[int] = None) -> Dict[str, Any]:
         """获取考生统计信息"""
         query = self.db.query(User).filter(User.role == UserRole.CANDIDATE)
@@ -274,13 +528,25 @@ class CandidateService:
         # 简单的身份证号格式验证
         pattern = r'^\d{17}[\dXx]$'
         return bool(re.match(pattern, id_card))
-    
-    def _generate_registration_number(self) -> str:
-        """生成报名号"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"REG{timestamp}"
-    
-    def _generate_candidate_number(self) -> str:
-        """生成准考证号"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        return f"CAN{timestamp}"
+
+
+class AsyncCandidateService(AsyncServiceBase):
+    """考生服务异步版本"""
+    service_class = CandidateService
+
+
+def run_candidate_import_job(job: JobContext, file_path: str, institution_id: int) -> Dict[str, Any]:
+    """考生批量导入任务（在任务进程中执行）"""
+    db = SessionLocal()
+    try:
+        result = CandidateService(db).import_candidate_chunks(
+            iter_table_chunks(file_path, IMPORT_CHUNK_SIZE),
+            institution_id,
+            total=count_table_rows(file_path),
+            progress=job.progress
+        )
+        return result.dict()
+    finally:
+        db.close()
+        # 任务被取消时已提交的块仍然有效，同样需要使缓存失效
+        invalidate(CANDIDATES)
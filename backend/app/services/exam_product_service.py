@@ -9,6 +9,8 @@ from datetime import datetime
 
 from ..models.exam import ExamProduct
 from ..schemas.exam_product import ExamProductCreate, ExamProductUpdate
+from ..core.cache import cached, invalidates, models_to_dicts, dicts_to_models, EXAM_PRODUCTS, CANDIDATES
+from .base import AsyncServiceBase
 
 
 class ExamProductService:
@@ -51,6 +53,7 @@ class ExamProductService:
         """根据名称获取考试产品"""
         return self.db.query(ExamProduct).filter(ExamProduct.name == name).first()
     
+    @invalidates(EXAM_PRODUCTS)
     def create_exam_product(self, product_data: ExamProductCreate) -> ExamProduct:
         """创建新的考试产品"""
         # 检查代码是否已存在
@@ -77,6 +80,7 @@ class ExamProductService:
         
         return product
     
+    @invalidates(EXAM_PRODUCTS, CANDIDATES)
     def update_exam_product(self, product_id: int, product_data: ExamProductUpdate) -> Optional[ExamProduct]:
         """更新考试产品信息"""
         product = self.get_exam_product_by_id(product_id)
@@ -107,6 +111,7 @@ class ExamProductService:
         
         return product
     
+    @invalidates(EXAM_PRODUCTS, CANDIDATES)
     def delete_exam_product(self, product_id: int) -> bool:
         """删除考试产品"""
         product = self.get_exam_product_by_id(product_id)
@@ -126,6 +131,7 @@ class ExamProductService:
         
         return True
     
+    @invalidates(EXAM_PRODUCTS)
     def toggle_exam_product_status(self, product_id: int) -> Optional[ExamProduct]:
         """切换考试产品的启用/禁用状态"""
         product = self.get_exam_product_by_id(product_id)
@@ -140,6 +146,7 @@ class ExamProductService:
         
         return product
     
+    @cached(EXAM_PRODUCTS, serializer=models_to_dicts, deserializer=dicts_to_models(ExamProduct))
     def get_active_exam_products(self) -> List[ExamProduct]:
         """获取所有启用的考试产品"""
         return self.db.query(ExamProduct).filter(ExamProduct.is_active == True).all()
@@ -162,3 +169,8 @@ class ExamProductService:
                 ExamProduct.description.contains(keyword)
             )
         ).all()
+
+
+class AsyncExamProductService(AsyncServiceBase):
+    """考试产品服务异步版本"""
+    service_class = ExamProductService
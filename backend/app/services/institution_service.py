@@ -9,6 +9,8 @@ from typing import List, Optional
 from ..models.institution import Institution
 from ..models.venue import Venue
 from ..models.user import User
+from ..core.cache import invalidates, VENUES, CANDIDATES
+from .base import AsyncServiceBase
 
 
 class InstitutionService:
@@ -96,6 +98,7 @@ class InstitutionService:
         
         return institution
     
+    @invalidates(VENUES, CANDIDATES)
     def update_institution(
         self,
         institution_id: int,
@@ -116,6 +119,7 @@ class InstitutionService:
         
         return institution
     
+    @invalidates(VENUES, CANDIDATES)
     def delete_institution(self, institution_id: int) -> bool:
         """删除机构"""
         institution = self.get_institution(institution_id)
@@ -169,4 +173,9 @@ class InstitutionService:
             "venue_active": venue_active,
             "user_total": user_total,
             "user_active": user_active
-        }
\ No newline at end of file
+        }
+
+
+class AsyncInstitutionService(AsyncServiceBase):
+    """机构服务异步版本"""
+    service_class = InstitutionService
@@ -2,14 +2,29 @@
 日程管理服务
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, insert, update
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 
 from ..models.user import User, UserRole
-from ..models.exam import Schedule, ScheduleStatus, ExamRegistration, ExamProduct
-from ..models.venue import Venue
+from ..models.exam import Schedule, ScheduleStatus, ExamRegistration, ExamProduct, RegistrationStatus
+from ..models.venue import Venue, VenueStatus
+from ..models.checkin import CheckIn, CheckInStatus
+from ..config.database import AsyncSessionLocal
+from ..core.cache import cached, invalidate, invalidates, SCHEDULES
+from ..core.queue_index import QueueEntry, get_queue_position, rebuild_queue, sync_queue
+from ..core.wait_time import service_minutes, wait_time_estimator
+from ..core.timetable import PlanRegistration, PlanVenue, plan_timetable, venue_exam_type
+from ..utils.intervals import IntervalIndex
+from ..utils.pagination import CursorPage, paginate_by_cursor
+from .base import AsyncServiceBase
+from .wechat_service import WeChatService
+
+
+def _schedule_date(start_time: datetime) -> datetime:
+    """日程的安排日期（当天零点）"""
+    return datetime.combine(start_time.date(), datetime.min.time())
 
 
 class ScheduleService:
@@ -18,6 +33,12 @@ class ScheduleService:
     def __init__(self, db: Session):
         self.db = db
     
+    def get_schedule_by_id(self, schedule_id: int) -> Optional[Schedule]:
+        """根据ID获取日程（预加载报名及考生信息）"""
+        return self.db.query(Schedule).options(
+            joinedload(Schedule.registration).joinedload(ExamRegistration.user)
+        ).filter(Schedule.id == schedule_id).first()
+    
     def get_candidate_schedules(self, candidate_id: int) -> List[Schedule]:
         """获取考生的所有日程安排"""
         schedules = self.db.query(Schedule).filter(
@@ -31,7 +52,27 @@ class ScheduleService:
         return schedules
     
     def get_candidate_queue_position(self, candidate_id: int) -> Optional[Dict[str, Any]]:
-        """获取考生在当前考场的排队位置"""
+        """获取考生在当前考场的排队位置（优先使用Redis排队索引）"""
+        available, entry = get_queue_position(candidate_id)
+        if not available:
+            entry = self._queue_position_from_db(candidate_id)
+        
+        if entry is None:
+            return None
+        
+        # 按该考场、该考试产品实际考试时长的估算值计算等待时间
+        minutes_per_candidate = wait_time_estimator.estimate(entry.venue_id, entry.exam_product_id)
+        estimated_wait_time = round((entry.position - 1) * minutes_per_candidate)
+        
+        return {
+            "venue_name": entry.venue_name,
+            "position": entry.position,
+            "total_waiting": entry.total_waiting,
+            "estimated_wait_time": estimated_wait_time
+        }
+    
+    def _queue_position_from_db(self, candidate_id: int) -> Optional[QueueEntry]:
+        """从数据库计算排队位置（排队索引不可用时）"""
         # 获取考生的下一个待进行日程
         next_schedule = self.db.query(Schedule).filter(
             and_(
@@ -64,16 +105,48 @@ class ScheduleService:
             )
         ).count()
         
-        # 估算等待时间（假设每个考试15分钟）
-        estimated_wait_time = (position - 1) * 15 if position > 1 else 0
+        return QueueEntry(
+            next_schedule.venue_id,
+            next_schedule.venue.name,
+            next_schedule.exam_product_id,
+            position,
+            total_waiting
+        )
+    
+    def _lock_venue(self, venue_id: int) -> None:
+        """锁定考场直到当前事务结束，同一考场的排期在数据库中串行执行"""
+        if not self._lock_venues([venue_id]):
+            raise ValueError("考场不存在")
+    
+    def _lock_venues(self, venue_ids: List[int]) -> int:
+        """
+        锁定多个考场直到当前事务结束，返回锁定的考场数
         
-        return {
-            "venue_name": next_schedule.venue.name,
-            "position": position,
-            "total_waiting": total_waiting,
-            "estimated_wait_time": estimated_wait_time
-        }
+        对考场行执行不修改数据的更新：MySQL中对这些行加排他锁，SQLite中取得数据库写锁。
+        """
+        if not venue_ids:
+            return 0
+        
+        result = self.db.execute(
+            update(Venue)
+            .where(Venue.id.in_(venue_ids))
+            .values(updated_at=Venue.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
     
+    def _load_venue_timeline(self, venue_id: int, start_time: datetime, end_time: datetime) -> IntervalIndex:
+        """一次查询加载考场在 [start_time, end_time) 内已占用的时间段"""
+        rows = self.db.query(Schedule.start_time, Schedule.end_time).filter(
+            Schedule.venue_id == venue_id,
+            Schedule.status.in_([ScheduleStatus.PENDING, ScheduleStatus.IN_PROGRESS]),
+            Schedule.start_time < end_time,
+            Schedule.end_time > start_time
+        ).all()
+        
+        return IntervalIndex(rows)
+    
+    @invalidates(SCHEDULES)
     def create_schedule(
         self,
         registration_id: int,
@@ -83,37 +156,35 @@ class ScheduleService:
         end_time: datetime
     ) -> Schedule:
         """创建日程安排"""
-        # 检查时间冲突
-        conflict = self.db.query(Schedule).filter(
-            and_(
-                Schedule.venue_id == venue_id,
-                Schedule.status.in_([ScheduleStatus.PENDING, ScheduleStatus.IN_PROGRESS]),
-                or_(
-                    and_(Schedule.start_time < end_time, Schedule.end_time > start_time)
-                )
+        try:
+            # 锁定考场后再检查时间冲突，并发创建不会重复占用同一时间段
+            self._lock_venue(venue_id)
+            if self._load_venue_timeline(venue_id, start_time, end_time).overlaps(start_time, end_time):
+                raise ValueError("时间冲突，该时间段已被占用")
+            
+            # 创建日程
+            schedule = Schedule(
+                registration_id=registration_id,
+                exam_product_id=exam_product_id,
+                venue_id=venue_id,
+                schedule_date=_schedule_date(start_time),
+                start_time=start_time,
+                end_time=end_time,
+                status=ScheduleStatus.PENDING
             )
-        ).first()
-        
-        if conflict:
-            raise ValueError("时间冲突，该时间段已被占用")
-        
-        # 创建日程
-        schedule = Schedule(
-            registration_id=registration_id,
-            exam_product_id=exam_product_id,
-            venue_id=venue_id,
-            schedule_date=start_time.date(),
-            start_time=start_time,
-            end_time=end_time,
-            status=ScheduleStatus.PENDING
-        )
+            
+            self.db.add(schedule)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         
-        self.db.add(schedule)
-        self.db.commit()
         self.db.refresh(schedule)
-        
+        sync_queue(self.db, Schedule.id == schedule.id)
+        WeChatService(self.db).broadcast_venue_status([venue_id])
         return schedule
     
+    @invalidates(SCHEDULES)
     def batch_create_schedules(
         self,
         registration_ids: List[int],
@@ -122,44 +193,362 @@ class ScheduleService:
         start_time: datetime,
         duration_minutes: int = 15
     ) -> List[Schedule]:
-        """批量创建日程安排"""
-        schedules = []
-        current_time = start_time
+        """
+        批量创建日程安排
         
-        for registration_id in registration_ids:
-            end_time = current_time + timedelta(minutes=duration_minutes)
+        从 start_time 起按 duration_minutes 依次分配时间段，已被占用的时间段跳过。
+        在一个事务中完成：锁定考场，一次加载考场在整个批次时间范围内的占用情况，
+        在内存中检查冲突，最后一条语句批量插入。
+        """
+        if not registration_ids:
+            return []
+        
+        duration = timedelta(minutes=duration_minutes)
+        window_end = start_time + duration * len(registration_ids)
+        
+        try:
+            self._lock_venue(venue_id)
+            timeline = self._load_venue_timeline(venue_id, start_time, window_end)
             
-            try:
-                schedule = self.create_schedule(
-                    registration_id=registration_id,
-                    exam_product_id=exam_product_id,
-                    venue_id=venue_id,
-                    start_time=current_time,
-                    end_time=end_time
-                )
-                schedules.append(schedule)
+            rows = []
+            current_time = start_time
+            for registration_id in registration_ids:
+                end_time = current_time + duration
+                if not timeline.overlaps(current_time, end_time):
+                    timeline.add(current_time, end_time)
+                    rows.append({
+                        "registration_id": registration_id,
+                        "exam_product_id": exam_product_id,
+                        "venue_id": venue_id,
+                        "schedule_date": _schedule_date(current_time),
+                        "start_time": current_time,
+                        "end_time": end_time,
+                        "status": ScheduleStatus.PENDING
+                    })
+                # 时间冲突时跳过这个时间段
                 current_time = end_time
-            except ValueError as e:
-                # 如果时间冲突，跳过这个时间段
-                current_time = end_time
-                continue
+            
+            if rows:
+                self.db.execute(insert(Schedule), rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         
+        if not rows:
+            return []
+        
+        # 批次内的时间段与考场已有的有效日程互不重叠，按开始时间即可取回本批次创建的日程
+        schedules = self.db.query(Schedule).filter(
+            Schedule.venue_id == venue_id,
+            Schedule.status == ScheduleStatus.PENDING,
+            Schedule.start_time.in_([row["start_time"] for row in rows])
+        ).order_by(Schedule.start_time).all()
+        
+        sync_queue(self.db, Schedule.id.in_([schedule.id for schedule in schedules]))
+        WeChatService(self.db).broadcast_venue_status([venue_id])
         return schedules
     
-    def update_schedule_status(self, schedule_id: int, status: ScheduleStatus) -> Optional[Schedule]:
-        """更新日程状态"""
+    def optimize_timetable(
+        self,
+        exam_date: date,
+        day_start: time = time(8, 0),
+        day_end: time = time(18, 0),
+        days: int = 1,
+        exam_product_ids: Optional[List[int]] = None,
+        venue_ids: Optional[List[int]] = None,
+        institution_id: Optional[int] = None,
+        dry_run: bool = True
+    ) -> Dict[str, Any]:
+        """
+        自动生成考试日排期表
+        
+        为已审核通过且没有有效日程的报名安排考场和时间（算法见 core.timetable）：
+        从 exam_date 起连续 days 天，每天 day_start 至 day_end 为考场可用时间，扣除考场已有的有效日程；
+        同一考生的考试不与其本次安排的其他考试和已有的有效日程重叠。
+        dry_run 为True时只返回排期结果和利用率指标，不写入数据库；
+        否则在一个事务中锁定参与排期的考场后重新计算，并用一条语句批量写入日程，提交后推送考场状态。
+        """
+        if day_end <= day_start:
+            raise ValueError("每日结束时间必须晚于开始时间")
+        if days < 1:
+            raise ValueError("排期天数必须大于0")
+        
+        windows = [
+            (
+                datetime.combine(exam_date + timedelta(days=offset), day_start),
+                datetime.combine(exam_date + timedelta(days=offset), day_end)
+            )
+            for offset in range(days)
+        ]
+        
+        venue_query = self.db.query(Venue.id, Venue.name, Venue.capacity).filter(
+            Venue.is_active == True,
+            Venue.status.in_([VenueStatus.AVAILABLE, VenueStatus.OCCUPIED])
+        )
+        if venue_ids:
+            venue_query = venue_query.filter(Venue.id.in_(venue_ids))
+        if institution_id:
+            venue_query = venue_query.filter(Venue.institution_id == institution_id)
+        venue_rows = venue_query.order_by(Venue.id).all()
+        
+        try:
+            if not dry_run:
+                # 先锁定考场再读取占用情况，并发的排期不会重复占用
+                self._lock_venues([row.id for row in venue_rows])
+            
+            registrations = self._load_plan_registrations(exam_product_ids, institution_id)
+            plan = plan_timetable(
+                registrations,
+                self._load_plan_venues(venue_rows, windows),
+                self._load_candidate_busy({registration.user_id for registration in registrations}, windows)
+            )
+            
+            if not dry_run:
+                if plan.assignments:
+                    self.db.execute(insert(Schedule), [
+                        {
+                            "registration_id": registration_id,
+                            "exam_product_id": exam_product_id,
+                            "venue_id": venue_id,
+                            "schedule_date": _schedule_date(start_time),
+                            "start_time": start_time,
+                            "end_time": end_time,
+                            "status": ScheduleStatus.PENDING
+                        }
+                        for registration_id, exam_product_id, venue_id, start_time, end_time in plan.assignments
+                    ])
+                self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        if not dry_run and plan.assignments:
+            invalidate(SCHEDULES)
+            sync_queue(
+                self.db,
+                Schedule.registration_id.in_([item[0] for item in plan.assignments]),
+                Schedule.status == ScheduleStatus.PENDING
+            )
+            WeChatService(self.db).broadcast_venue_status(sorted({item[2] for item in plan.assignments}))
+        
+        return {
+            "dry_run": dry_run,
+            "metrics": plan.metrics(),
+            "assignments": [
+                {
+                    "registration_id": registration_id,
+                    "exam_product_id": exam_product_id,
+                    "venue_id": venue_id,
+                    "start_time": start_time,
+                    "end_time": end_time
+                }
+                for registration_id, exam_product_id, venue_id, start_time, end_time in plan.assignments
+            ],
+            "unscheduled_registration_ids": plan.unscheduled
+        }
+    
+    def _load_plan_registrations(
+        self,
+        exam_product_ids: Optional[List[int]],
+        institution_id: Optional[int]
+    ) -> List[PlanRegistration]:
+        """已审核通过、没有有效日程的报名"""
+        scheduled = self.db.query(Schedule.registration_id).filter(
+            Schedule.status.in_([ScheduleStatus.PENDING, ScheduleStatus.IN_PROGRESS])
+        )
+        query = self.db.query(
+            ExamRegistration.id,
+            ExamRegistration.user_id,
+            ExamRegistration.exam_product_id,
+            ExamProduct.duration_minutes,
+            ExamProduct.exam_type
+        ).join(
+            ExamProduct, ExamProduct.id == ExamRegistration.exam_product_id
+        ).filter(
+            ExamRegistration.status == RegistrationStatus.APPROVED,
+            ExamProduct.is_active == True,
+            ~ExamRegistration.id.in_(scheduled)
+        )
+        
+        if exam_product_ids:
+            query = query.filter(ExamRegistration.exam_product_id.in_(exam_product_ids))
+        if institution_id:
+            query = query.join(User, User.id == ExamRegistration.user_id).filter(
+                User.institution_id == institution_id
+            )
+        
+        return [
+            PlanRegistration(registration_id, user_id, exam_product_id, duration_minutes, exam_type)
+            for registration_id, user_id, exam_product_id, duration_minutes, exam_type
+            in query.order_by(ExamRegistration.id)
+        ]
+    
+    def _load_candidate_busy(self, user_ids: set, windows: List[tuple]) -> Dict[int, List[tuple]]:
+        """考生在排期时间范围内已有的有效日程（一次查询），同一考生的新日程不能与之重叠"""
+        busy: Dict[int, List[tuple]] = {}
+        if not user_ids:
+            return busy
+        
+        rows = self.db.query(ExamRegistration.user_id, Schedule.start_time, Schedule.end_time).join(
+            ExamRegistration, ExamRegistration.id == Schedule.registration_id
+        ).filter(
+            Schedule.status.in_([ScheduleStatus.PENDING, ScheduleStatus.IN_PROGRESS]),
+            Schedule.start_time < windows[-1][1],
+            Schedule.end_time > windows[0][0]
+        )
+        for user_id, start_time, end_time in rows:
+            if user_id in user_ids:
+                busy.setdefault(user_id, []).append((start_time, end_time))
+        return busy
+    
+    def _load_plan_venues(self, venue_rows: List[Any], windows: List[tuple]) -> List[PlanVenue]:
+        """考场在各个时间窗口内扣除已有有效日程后的空闲时间（一次查询）"""
+        busy: Dict[int, List[tuple]] = {row.id: [] for row in venue_rows}
+        if busy:
+            rows = self.db.query(Schedule.venue_id, Schedule.start_time, Schedule.end_time).filter(
+                Schedule.venue_id.in_(list(busy)),
+                Schedule.status.in_([ScheduleStatus.PENDING, ScheduleStatus.IN_PROGRESS]),
+                Schedule.start_time < windows[-1][1],
+                Schedule.end_time > windows[0][0]
+            )
+            for venue_id, start_time, end_time in rows:
+                busy[venue_id].append((start_time, end_time))
+        
+        venues = []
+        for row in venue_rows:
+            timeline = IntervalIndex(busy[row.id])
+            free = [gap for start, end in windows for gap in timeline.gaps(start, end)]
+            venues.append(PlanVenue(row.id, venue_exam_type(row.name), row.capacity, free))
+        return venues
+    
+    @invalidates(SCHEDULES)
+    def update_schedule_status(
+        self,
+        schedule_id: int,
+        status: ScheduleStatus,
+        changed_at: Optional[datetime] = None
+    ) -> Optional[Schedule]:
+        """更新日程状态，changed_at 为状态变更时间（UTC，默认当前时间）"""
         schedule = self.db.query(Schedule).filter(Schedule.id == schedule_id).first()
         if not schedule:
             return None
         
         schedule.status = status
-        schedule.updated_at = datetime.utcnow()
+        schedule.updated_at = changed_at or datetime.utcnow()
         
         self.db.commit()
         self.db.refresh(schedule)
+        sync_queue(self.db, Schedule.id == schedule_id)
+        WeChatService(self.db).broadcast_venue_status([schedule.venue_id])
         
         return schedule
     
+    def start_schedule(self, schedule_id: int) -> Optional[Schedule]:
+        """开始日程（待进行 -> 进行中）"""
+        schedule = self.db.query(Schedule).filter(Schedule.id == schedule_id).first()
+        if not schedule:
+            return None
+        
+        if schedule.status != ScheduleStatus.PENDING:
+            raise ValueError("只有待进行的日程可以开始")
+        
+        return self.update_schedule_status(schedule_id, ScheduleStatus.IN_PROGRESS)
+    
+    def complete_schedule(self, schedule_id: int) -> Optional[Schedule]:
+        """完成日程（进行中 -> 已完成）"""
+        schedule = self.db.query(Schedule).filter(Schedule.id == schedule_id).first()
+        if not schedule:
+            return None
+        
+        if schedule.status != ScheduleStatus.IN_PROGRESS:
+            raise ValueError("只有进行中的日程可以完成")
+        
+        # 考生入场时间：扫码签到时间；没有签到记录时为开始日程的时间
+        started_at = self.db.query(func.max(CheckIn.checkin_time)).filter(
+            CheckIn.schedule_id == schedule_id,
+            CheckIn.status == CheckInStatus.SUCCESS
+        ).scalar() or schedule.updated_at
+        
+        # 签到时间由应用按UTC写入，完成时间同样取应用时钟，不使用数据库生成的时间
+        completed_at = datetime.utcnow()
+        schedule = self.update_schedule_status(schedule_id, ScheduleStatus.COMPLETED, completed_at)
+        wait_time_estimator.observe(
+            schedule.venue_id,
+            schedule.exam_product_id,
+            service_minutes(started_at, completed_at)
+        )
+        return schedule
+    
+    def get_schedules(
+        self,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        venue_id: Optional[int] = None,
+        date: Optional[datetime] = None,
+        status: Optional[str] = None,
+        institution_id: Optional[int] = None,
+        with_total: bool = False
+    ) -> CursorPage:
+        """
+        获取日程列表（按开始时间正序的游标分页）
+        
+        Args:
+            cursor: 上一页返回的游标，首页不传
+            size: 每页数量
+            with_total: 是否返回总数（计数结果有缓存）
+        """
+        query = self._schedule_query(venue_id, date, status, institution_id)
+        total = self.count_schedules(venue_id, date, status, institution_id) if with_total else None
+        return paginate_by_cursor(
+            query, Schedule.start_time, Schedule.id,
+            cursor=cursor, size=size, descending=False, total=total
+        )
+    
+    @cached(SCHEDULES)
+    def count_schedules(
+        self,
+        venue_id: Optional[int] = None,
+        date: Optional[datetime] = None,
+        status: Optional[str] = None,
+        institution_id: Optional[int] = None
+    ) -> int:
+        """统计符合条件的日程数"""
+        return self._schedule_query(venue_id, date, status, institution_id).count()
+    
+    def _schedule_query(
+        self,
+        venue_id: Optional[int] = None,
+        date: Optional[datetime] = None,
+        status: Optional[str] = None,
+        institution_id: Optional[int] = None
+    ):
+        query = self.db.query(Schedule)
+        
+        if venue_id:
+            query = query.filter(Schedule.venue_id == venue_id)
+        
+        if date:
+            # 使用范围条件，可以利用日期列上的索引
+            day_start = datetime.combine(date.date(), datetime.min.time())
+            query = query.filter(
+                Schedule.schedule_date >= day_start,
+                Schedule.schedule_date < day_start + timedelta(days=1)
+            )
+        
+        if status:
+            try:
+                query = query.filter(Schedule.status == ScheduleStatus(status))
+            except ValueError:
+                raise ValueError(f"无效的日程状态: {status}")
+        
+        if institution_id:
+            query = query.join(ExamRegistration).join(User).filter(
+                User.institution_id == institution_id
+            )
+        
+        return query
+    
     def get_venue_schedules(
         self,
         venue_id: int,
@@ -198,6 +587,7 @@ class ScheduleService:
         
         return query.order_by(Schedule.start_time).all()
     
+    @cached(SCHEDULES)
     def get_schedule_statistics(self, date: Optional[datetime] = None) -> Dict[str, Any]:
         """获取日程统计信息"""
         query = self.db.query(Schedule)
@@ -238,3 +628,20 @@ class ScheduleService:
                 {"venue_name": name, "count": count} for name, count in venue_stats
             ]
         }
+
+
+class AsyncScheduleService(AsyncServiceBase):
+    """日程服务异步版本"""
+    service_class = ScheduleService
+
+
+async def rebuild_queue_index() -> None:
+    """从数据库重建排队索引（应用启动时调用）"""
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(rebuild_queue)
+
+
+async def load_wait_time_estimates() -> None:
+    """加载考试时长估算（应用启动时调用）"""
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(wait_time_estimator.load)
@@ -11,6 +11,11 @@ from ..models.venue import Venue, VenueStatus
 from ..models.exam import Schedule, ScheduleStatus
 from ..models.institution import Institution
 from ..schemas.venue import VenueCreate, VenueUpdate
+from ..core.cache import cached, invalidates, VENUES
+from ..core.timetable import venue_exam_type
+from ..utils.pagination import CursorPage, paginate_by_cursor
+from .base import AsyncServiceBase
+from .wechat_service import WeChatService
 
 
 class VenueService:
@@ -21,13 +26,41 @@ class VenueService:
     
     def get_venues(
         self,
-        skip: int = 0,
-        limit: int = 100,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        institution_id: Optional[int] = None,
+        status: Optional[str] = None,
+        venue_type: Optional[str] = None,
+        with_total: bool = False
+    ) -> CursorPage:
+        """
+        获取考场列表（按创建时间倒序的游标分页）
+        
+        Args:
+            cursor: 上一页返回的游标，首页不传
+            size: 每页数量
+            with_total: 是否返回总数（计数结果有缓存）
+        """
+        query = self._venue_query(institution_id, status, venue_type)
+        total = self.count_venues(institution_id, status, venue_type) if with_total else None
+        return paginate_by_cursor(query, Venue.created_at, Venue.id, cursor=cursor, size=size, total=total)
+    
+    @cached(VENUES)
+    def count_venues(
+        self,
+        institution_id: Optional[int] = None,
+        status: Optional[str] = None,
+        venue_type: Optional[str] = None
+    ) -> int:
+        """统计符合条件的考场数"""
+        return self._venue_query(institution_id, status, venue_type).count()
+    
+    def _venue_query(
+        self,
         institution_id: Optional[int] = None,
         status: Optional[str] = None,
         venue_type: Optional[str] = None
-    ) -> List[Venue]:
-        """获取考场列表"""
+    ):
         query = self.db.query(Venue)
         
         # 应用过滤条件
@@ -35,16 +68,16 @@ class VenueService:
             query = query.filter(Venue.institution_id == institution_id)
         
         if status:
-            query = query.filter(Venue.status == VenueStatus(status))
+            try:
+                query = query.filter(Venue.status == VenueStatus(status))
+            except ValueError:
+                raise ValueError(f"无效的考场状态: {status}")
         
         if venue_type:
             # 这里假设venue_type存储在description或其他字段中
             query = query.filter(Venue.description.contains(venue_type))
         
-        # 按创建时间倒序排列
-        query = query.order_by(Venue.created_at.desc())
-        
-        return query.offset(skip).limit(limit).all()
+        return query
     
     def get_venue_by_id(self, venue_id: int) -> Optional[Venue]:
         """根据ID获取考场"""
@@ -54,6 +87,7 @@ class VenueService:
         """根据代码获取考场"""
         return self.db.query(Venue).filter(Venue.code == code).first()
     
+    @invalidates(VENUES)
     def create_venue(self, venue_data: VenueCreate) -> Venue:
         """创建新考场"""
         # 检查代码是否已存在
@@ -86,9 +120,11 @@ class VenueService:
         self.db.add(venue)
         self.db.commit()
         self.db.refresh(venue)
+        WeChatService(self.db).broadcast_venue_status([venue.id])
         
         return venue
     
+    @invalidates(VENUES)
     def update_venue(self, venue_id: int, venue_data: VenueUpdate) -> Optional[Venue]:
         """更新考场信息"""
         venue = self.get_venue_by_id(venue_id)
@@ -112,9 +148,11 @@ class VenueService:
         
         self.db.commit()
         self.db.refresh(venue)
+        WeChatService(self.db).broadcast_venue_status([venue.id])
         
         return venue
     
+    @invalidates(VENUES)
     def delete_venue(self, venue_id: int) -> bool:
         """删除考场"""
         venue = self.get_venue_by_id(venue_id)
@@ -131,9 +169,11 @@ class VenueService:
         
         self.db.delete(venue)
         self.db.commit()
+        WeChatService(self.db).broadcast_venue_status([venue_id])
         
         return True
     
+    @invalidates(VENUES)
     def toggle_venue_status(self, venue_id: int) -> Optional[Venue]:
         """切换考场状态"""
         venue = self.get_venue_by_id(venue_id)
@@ -150,6 +190,7 @@ class VenueService:
         
         self.db.commit()
         self.db.refresh(venue)
+        WeChatService(self.db).broadcast_venue_status([venue.id])
         
         return venue
     
@@ -195,7 +236,7 @@ class VenueService:
         return {
             "venue_id": venue.id,
             "venue_name": venue.name,
-            "venue_type": "实操" if "实操" in venue.name else "理论",
+            "venue_type": venue_exam_type(venue.name),
             "status": venue.status.value,
             "capacity": venue.capacity,
             "current_count": venue.current_count,
@@ -235,6 +276,7 @@ class VenueService:
         
         return query.all()
     
+    @cached(VENUES)
     def get_venue_statistics(self, institution_id: Optional[int] = None) -> Dict[str, Any]:
         """获取考场统计信息"""
         query = self.db.query(Venue)
@@ -270,3 +312,8 @@ class VenueService:
                 {"name": name, "count": count} for name, count in institution_stats
             ]
         }
+
+
+class AsyncVenueService(AsyncServiceBase):
+    """考场服务异步版本"""
+    service_class = VenueService
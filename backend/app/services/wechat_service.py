@@ -2,18 +2,48 @@
 微信小程序服务
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, aliased, joinedload
+from sqlalchemy import and_, case, func, update
+from fastapi.concurrency import run_in_threadpool
+from typing import Callable, List, NamedTuple, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
-import json
+import time
 
 from ..models.user import User, UserRole
 from ..models.venue import Venue, VenueStatus
 from ..models.exam import Schedule, ScheduleStatus, ExamProduct, ExamRegistration
 from ..models.checkin import CheckIn, CheckInStatus, CheckInMethod
 from ..utils.security import create_access_token
+from ..utils.qrcode import encode_qr_token, decode_qr_token, prerender_qr_codes, QR_TOKEN_CANDIDATE
 from ..config.settings import settings
+from ..config.database import AsyncSessionLocal, SessionLocal
+from ..core.cache import invalidate, SCHEDULES
+from ..core.events import publish, VENUE_STATUS_CHANNEL
+from ..core.idempotency import get_response, save_response
+from ..core.jobs import JobContext
+from ..core.metrics import record_checkin
+from ..core.queue_index import queue_rows, write_queue_rows
+from .base import AsyncServiceBase
+
+# 签到幂等键作用域
+CHECKIN_SCOPE = "checkin"
+
+
+class CheckinFollowup(NamedTuple):
+    """签到提交后需要写入Redis的数据（由 WeChatService.apply_checkin 在数据库中查出）"""
+    queue_rows: List[Any]           # 排队索引中需要同步的日程，见 queue_rows
+    venue_event: Dict[str, Any]     # 考场状态变更事件
+    response_key: Optional[str]     # 幂等记录的键，未携带幂等键时为None
+
+
+def publish_checkin(followup: CheckinFollowup, result: Dict[str, Any]) -> None:
+    """签到提交后的Redis写入：缓存失效、排队索引同步、考场状态推送、幂等记录（不访问数据库，可在线程池中执行）"""
+    invalidate(SCHEDULES)
+    write_queue_rows(followup.queue_rows)
+    publish(VENUE_STATUS_CHANNEL, followup.venue_event)
+    
+    if followup.response_key:
+        save_response(CHECKIN_SCOPE, followup.response_key, result)
 
 
 class WeChatService:
@@ -67,9 +97,14 @@ class WeChatService:
         }
     
     def generate_candidate_qrcode(self, candidate_id: int) -> str:
-        """生成考生的动态二维码数据"""
+        """
+        生成考生的签名二维码令牌
+        
+        有待进行日程时令牌在日程结束后一段时间内有效，期间内容不变；
+        否则有效期对齐到固定时间窗口，同一窗口内生成的令牌相同。
+        """
         # 获取考生的下一个待进行日程
-        next_schedule = self.db.query(Schedule).filter(
+        next_schedule = self.db.query(Schedule.id, Schedule.end_time).filter(
             and_(
                 Schedule.registration_id.in_(
                     self.db.query(ExamRegistration.id).filter(
@@ -81,100 +116,236 @@ class WeChatService:
         ).order_by(Schedule.start_time).first()
         
         if not next_schedule:
-            # 如果没有待进行的日程，返回默认数据
-            qr_data = {
-                "type": "candidate",
-                "candidate_id": candidate_id,
-                "schedule_id": None,
-                "timestamp": datetime.now().isoformat()
-            }
-        else:
-            qr_data = {
-                "type": "candidate",
-                "candidate_id": candidate_id,
-                "schedule_id": next_schedule.id,
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._candidate_token(candidate_id)
         
-        return json.dumps(qr_data, ensure_ascii=False)
+        return self._candidate_token(candidate_id, next_schedule.id, next_schedule.end_time)
     
-    def get_venues_status(self) -> List[Dict[str, Any]]:
-        """获取所有考场的实时状态"""
-        venues = self.db.query(Venue).filter(Venue.is_active == True).all()
-        result = []
-        
-        for venue in venues:
-            # 获取当前正在进行的日程
-            current_schedule = self.db.query(Schedule).filter(
-                and_(
-                    Schedule.venue_id == venue.id,
-                    Schedule.status == ScheduleStatus.IN_PROGRESS
-                )
-            ).first()
-            
-            # 获取等待中的日程数量
-            waiting_count = self.db.query(Schedule).filter(
-                and_(
-                    Schedule.venue_id == venue.id,
-                    Schedule.status == ScheduleStatus.PENDING
-                )
-            ).count()
-            
-            # 获取下一个开始时间
-            next_schedule = self.db.query(Schedule).filter(
-                and_(
-                    Schedule.venue_id == venue.id,
-                    Schedule.status == ScheduleStatus.PENDING
-                )
-            ).order_by(Schedule.start_time).first()
-            
-            venue_data = {
-                "venue_id": venue.id,
-                "venue_name": venue.name,
-                "venue_type": venue.venue_type if hasattr(venue, 'venue_type') else "未知",
-                "status": venue.status.value,
-                "current_candidate": None,
-                "waiting_count": waiting_count,
-                "next_start_time": None,
-                "capacity": venue.capacity
+    def _candidate_token(
+        self,
+        candidate_id: int,
+        schedule_id: Optional[int] = None,
+        end_time: Optional[datetime] = None
+    ) -> str:
+        """生成考生令牌"""
+        # 短期有效期对齐到固定时间窗口
+        ttl = settings.qr_token_ttl
+        window_expires_at = (int(time.time()) // ttl + 2) * ttl
+        
+        if not schedule_id:
+            # 如果没有待进行的日程，生成不关联日程的短期令牌
+            return encode_qr_token(QR_TOKEN_CANDIDATE, candidate_id, window_expires_at)
+        
+        # 日程已过结束时间但仍待进行时，至少保证一个时间窗口的有效期
+        expires_at = end_time + timedelta(minutes=settings.qr_token_grace_minutes)
+        return encode_qr_token(
+            QR_TOKEN_CANDIDATE,
+            candidate_id,
+            max(int(expires_at.timestamp()), window_expires_at),
+            schedule_id=schedule_id
+        )
+    
+    def prerender_candidate_qrcodes(
+        self,
+        exam_date: datetime,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        预渲染指定考试日期所有考生的二维码
+        
+        每位考生取当天最早的待进行日程生成令牌（与考生当天首次打开二维码时一致），
+        渲染后写入Redis，考试当天API进程直接读取渲染结果。渲染占用CPU，应通过
+        run_qrcode_prerender_job 在任务进程中执行。
+        """
+        day_start = datetime.combine(exam_date.date(), datetime.min.time())
+        rows = self.db.query(
+            ExamRegistration.user_id,
+            Schedule.id,
+            Schedule.end_time
+        ).join(
+            Schedule, Schedule.registration_id == ExamRegistration.id
+        ).filter(
+            and_(
+                Schedule.start_time >= day_start,
+                Schedule.start_time < day_start + timedelta(days=1),
+                Schedule.status == ScheduleStatus.PENDING
+            )
+        ).order_by(Schedule.start_time).all()
+        
+        tokens = {}
+        for candidate_id, schedule_id, end_time in rows:
+            if candidate_id not in tokens:
+                tokens[candidate_id] = self._candidate_token(candidate_id, schedule_id, end_time)
+        
+        items = [(token, decode_qr_token(token).expires_at) for token in tokens.values()]
+        rendered = prerender_qr_codes(items, progress=progress)
+        
+        return {
+            "date": exam_date.strftime("%Y-%m-%d"),
+            "candidates": len(items),
+            "rendered": rendered
+        }
+    
+    def get_venues_status(self, venue_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """获取所有（或指定）考场的实时状态（单次聚合查询）"""
+        # 按考场聚合等待人数、下一场开始时间和当前进行中的日程
+        schedule_stats = self.db.query(
+            Schedule.venue_id.label("venue_id"),
+            func.sum(
+                case((Schedule.status == ScheduleStatus.PENDING, 1), else_=0)
+            ).label("waiting_count"),
+            func.min(
+                case((Schedule.status == ScheduleStatus.PENDING, Schedule.start_time))
+            ).label("next_start_time"),
+            func.min(
+                case((Schedule.status == ScheduleStatus.IN_PROGRESS, Schedule.id))
+            ).label("current_schedule_id")
+        ).filter(
+            Schedule.status.in_([ScheduleStatus.PENDING, ScheduleStatus.IN_PROGRESS])
+        )
+        
+        if venue_ids is not None:
+            schedule_stats = schedule_stats.filter(Schedule.venue_id.in_(venue_ids))
+        
+        schedule_stats = schedule_stats.group_by(Schedule.venue_id).subquery()
+        
+        current_schedule = aliased(Schedule)
+        
+        query = self.db.query(
+            Venue.id,
+            Venue.name,
+            Venue.status,
+            Venue.capacity,
+            schedule_stats.c.waiting_count,
+            schedule_stats.c.next_start_time,
+            User.real_name
+        ).outerjoin(
+            schedule_stats, schedule_stats.c.venue_id == Venue.id
+        ).outerjoin(
+            current_schedule, current_schedule.id == schedule_stats.c.current_schedule_id
+        ).outerjoin(
+            ExamRegistration, ExamRegistration.id == current_schedule.registration_id
+        ).outerjoin(
+            User, User.id == ExamRegistration.user_id
+        ).filter(
+            Venue.is_active == True
+        )
+        
+        if venue_ids is not None:
+            query = query.filter(Venue.id.in_(venue_ids))
+        
+        rows = query.order_by(Venue.id).all()
+        
+        return [
+            {
+                "venue_id": venue_id,
+                "venue_name": name,
+                "venue_type": "未知",
+                "status": status.value,
+                "current_candidate": f"{real_name[0]}**" if real_name else None,
+                "waiting_count": int(waiting_count or 0),
+                "next_start_time": next_start_time.strftime("%H:%M") if next_start_time else None,
+                "capacity": capacity
             }
-            
-            if current_schedule:
-                # 获取当前考生的姓名
-                candidate = self.db.query(User).filter(
-                    User.id == current_schedule.registration.user_id
-                ).first()
-                if candidate:
-                    venue_data["current_candidate"] = f"{candidate.real_name[0]}**"
-            
-            if next_schedule:
-                venue_data["next_start_time"] = next_schedule.start_time.strftime("%H:%M")
-            
-            result.append(venue_data)
+            for venue_id, name, status, capacity, waiting_count, next_start_time, real_name in rows
+        ]
+    
+    def venue_status_event(self, venue_ids: List[int]) -> Dict[str, Any]:
+        """重新计算指定考场的状态，组装考场状态变更事件"""
+        venues = self.get_venues_status(venue_ids)
+        found = {venue["venue_id"] for venue in venues}
+        
+        return {
+            "venues": venues,
+            "removed": [venue_id for venue_id in venue_ids if venue_id not in found]
+        }
+    
+    def broadcast_venue_status(self, venue_ids: List[int]) -> None:
+        """重新计算指定考场的状态并发布变更事件（需在事务提交后调用）"""
+        publish(VENUE_STATUS_CHANNEL, self.venue_status_event(venue_ids))
+    
+    def process_checkin(
+        self,
+        schedule_id: int,
+        examiner_id: int,
+        venue_id: int,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        处理扫码签到
+        
+        日程状态通过条件UPDATE（仅当状态仍为待进行时）原子切换为进行中，
+        多名考务人员同时扫同一考生时只有一人成功。
+        携带相同幂等键的重试请求直接返回首次签到的结果，不会重复创建签到记录。
+        """
+        if idempotency_key:
+            replay = get_response(CHECKIN_SCOPE, f"{schedule_id}:{idempotency_key}")
+            if replay:
+                record_checkin("replayed")
+                return replay
         
+        result, followup = self.apply_checkin(schedule_id, examiner_id, venue_id, idempotency_key)
+        if followup is not None:
+            publish_checkin(followup, result)
         return result
     
-    def process_checkin(self, schedule_id: int, examiner_id: int, venue_id: int) -> Dict[str, Any]:
-        """处理扫码签到"""
-        # 获取日程信息
-        schedule = self.db.query(Schedule).filter(Schedule.id == schedule_id).first()
+    def apply_checkin(
+        self,
+        schedule_id: int,
+        examiner_id: int,
+        venue_id: int,
+        idempotency_key: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], Optional[CheckinFollowup]]:
+        """
+        签到的数据库部分（不读写Redis）
+        
+        Returns:
+            (签到结果, 提交后需要写入Redis的数据)；幂等重放时第二项为None
+        """
+        # 一次查询加载响应所需的全部关联数据
+        schedule = self.db.query(Schedule).options(
+            joinedload(Schedule.registration).joinedload(ExamRegistration.user),
+            joinedload(Schedule.venue),
+            joinedload(Schedule.exam_product)
+        ).filter(Schedule.id == schedule_id).first()
+        
         if not schedule:
+            record_checkin("rejected")
             raise ValueError("日程不存在")
         
-        if schedule.status != ScheduleStatus.PENDING:
-            raise ValueError("该日程状态不允许签到")
-        
         if schedule.venue_id != venue_id:
+            record_checkin("rejected")
             raise ValueError("考场不匹配")
         
-        # 获取考生信息
-        candidate = self.db.query(User).filter(
-            User.id == schedule.registration.user_id
-        ).first()
-        
+        candidate = schedule.registration.user
         if not candidate:
+            record_checkin("rejected")
             raise ValueError("考生信息不存在")
         
+        now = datetime.utcnow()
+        
+        # 比较并交换：状态已被其他请求修改时影响行数为0
+        updated = self.db.execute(
+            update(Schedule).where(
+                and_(
+                    Schedule.id == schedule_id,
+                    Schedule.status == ScheduleStatus.PENDING
+                )
+            ).values(
+                status=ScheduleStatus.IN_PROGRESS,
+                updated_at=now
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        
+        if not updated:
+            self.db.rollback()
+            if idempotency_key:
+                replay = self._replay_checkin(schedule_id, idempotency_key)
+                if replay:
+                    record_checkin("replayed")
+                    return replay, None
+            record_checkin("rejected")
+            raise ValueError("该日程状态不允许签到")
+        
         # 创建签到记录
         checkin = CheckIn(
             user_id=candidate.id,
@@ -182,19 +353,49 @@ class WeChatService:
             exam_session_id=schedule.registration.exam_session_id,
             registration_id=schedule.registration.id,
             schedule_id=schedule_id,
-            checkin_time=datetime.utcnow(),
+            staff_id=examiner_id,
+            checkin_time=now,
             method=CheckInMethod.QR_CODE,
-            status=CheckInStatus.SUCCESS
+            status=CheckInStatus.SUCCESS,
+            data={"idempotency_key": idempotency_key} if idempotency_key else None
         )
         
         self.db.add(checkin)
         
-        # 更新日程状态
-        schedule.status = ScheduleStatus.IN_PROGRESS
-        schedule.updated_at = datetime.utcnow()
+        # 提交前组装响应，避免提交后属性过期再次查询
+        result = self._checkin_response(schedule, candidate, now)
         
         self.db.commit()
+        record_checkin("success")
+        
+        return result, CheckinFollowup(
+            queue_rows(self.db, Schedule.id == schedule_id).all(),
+            self.venue_status_event([venue_id]),
+            f"{schedule_id}:{idempotency_key}" if idempotency_key else None
+        )
+    
+    def _replay_checkin(self, schedule_id: int, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """根据数据库中的签到记录重放幂等请求的结果（Redis中无记录时的兜底）"""
+        checkin = self.db.query(CheckIn).options(
+            joinedload(CheckIn.schedule).joinedload(Schedule.venue),
+            joinedload(CheckIn.schedule).joinedload(Schedule.exam_product),
+            joinedload(CheckIn.user)
+        ).filter(
+            and_(
+                CheckIn.schedule_id == schedule_id,
+                CheckIn.status == CheckInStatus.SUCCESS
+            )
+        ).order_by(CheckIn.id.desc()).first()
+        
+        if not checkin or (checkin.data or {}).get("idempotency_key") != idempotency_key:
+            return None
         
+        result = self._checkin_response(checkin.schedule, checkin.user, checkin.checkin_time)
+        save_response(CHECKIN_SCOPE, f"{schedule_id}:{idempotency_key}", result)
+        return result
+    
+    def _checkin_response(self, schedule: Schedule, candidate: User, checkin_time: datetime) -> Dict[str, Any]:
+        """组装签到响应"""
         return {
             "success": True,
             "message": f"{candidate.real_name} 签到成功",
@@ -205,7 +406,7 @@ class WeChatService:
                 "exam_product_name": schedule.exam_product.name,
                 "start_time": schedule.start_time.strftime("%H:%M")
             },
-            "checkin_time": checkin.checkin_time
+            "checkin_time": checkin_time
         }
     
     def get_dashboard_data(self) -> Dict[str, Any]:
@@ -228,3 +429,47 @@ class WeChatService:
                 "total_waiting": total_waiting
             }
         }
+
+
+class AsyncWeChatService(AsyncServiceBase):
+    """微信服务异步版本"""
+    service_class = WeChatService
+    
+    async def process_checkin(
+        self,
+        schedule_id: int,
+        examiner_id: int,
+        venue_id: int,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """同 WeChatService.process_checkin：数据库部分经由 run_sync 执行，Redis读写在线程池中执行"""
+        if idempotency_key:
+            replay = await run_in_threadpool(get_response, CHECKIN_SCOPE, f"{schedule_id}:{idempotency_key}")
+            if replay:
+                record_checkin("replayed")
+                return replay
+        
+        result, followup = await self.db.run_sync(
+            lambda session: WeChatService(session).apply_checkin(schedule_id, examiner_id, venue_id, idempotency_key)
+        )
+        if followup is not None:
+            await run_in_threadpool(publish_checkin, followup, result)
+        return result
+
+
+def run_qrcode_prerender_job(job: JobContext, exam_date: str) -> Dict[str, Any]:
+    """考生二维码预渲染任务（在任务进程中执行）"""
+    db = SessionLocal()
+    try:
+        return WeChatService(db).prerender_candidate_qrcodes(
+            datetime.strptime(exam_date, "%Y-%m-%d"),
+            progress=job.progress
+        )
+    finally:
+        db.close()
+
+
+async def load_venues_status() -> List[Dict[str, Any]]:
+    """加载全部考场状态（考场状态推送的快照来源）"""
+    async with AsyncSessionLocal() as db:
+        return await AsyncWeChatService(db).get_venues_status()
@@ -5,11 +5,11 @@
 from .security import verify_password, get_password_hash, create_access_token
 from .validators import validate_email, validate_phone
 from .qrcode import generate_qr_code
-from .pagination import paginate
+from .pagination import paginate, paginate_by_cursor
 
 __all__ = [
     "verify_password", "get_password_hash", "create_access_token",
     "validate_email", "validate_phone",
     "generate_qr_code",
-    "paginate"
+    "paginate", "paginate_by_cursor"
 ]
\ No newline at end of file
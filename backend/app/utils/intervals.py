@@ -0,0 +1,66 @@
+"""
+时间段占用索引
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterable, Iterator, List, Tuple
+
+
+class IntervalIndex:
+    """
+    半开区间 [start, end) 的占用索引
+
+    保存已占用时间段的并集（按开始时间排序、互不重叠），
+    重叠检查和插入都通过二分查找定位，适合在内存中对一个考场的一段时间做大量冲突检查。
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Tuple[datetime, datetime]]:
+        return iter(zip(self._starts, self._ends))
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """[start, end) 是否与已占用的时间段重叠"""
+        # 开始时间早于 end 的区间中最后一个结束得最晚（区间互不重叠）
+        index = bisect_left(self._starts, end)
+        return index > 0 and self._ends[index - 1] > start
+
+    def add(self, start: datetime, end: datetime) -> None:
+        """占用 [start, end)，与相交或相邻的区间合并"""
+        if end <= start:
+            return
+        
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def gaps(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """[start, end) 内未被占用的时间段（按时间排序）"""
+        result = []
+        cursor = start
+        index = bisect_right(self._ends, start)
+        while cursor < end and index < len(self._starts):
+            busy_start, busy_end = self._starts[index], self._ends[index]
+            if busy_start >= end:
+                break
+            if busy_start > cursor:
+                result.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            index += 1
+        
+        if cursor < end:
+            result.append((cursor, end))
+        return result
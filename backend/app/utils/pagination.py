@@ -2,8 +2,13 @@
 分页工具函数
 """
 
-from typing import List, TypeVar, Generic
+from typing import List, Optional, Tuple, TypeVar, Generic, Union
 from math import ceil
+from datetime import datetime
+import base64
+import json
+
+from sqlalchemy import String, and_, or_, type_coerce
 
 T = TypeVar('T')
 
@@ -87,6 +92,140 @@ def paginate(
     )
 
 
+class CursorPage(Generic[T]):
+    """游标分页结果类"""
+    
+    def __init__(
+        self,
+        items: List[T],
+        size: int,
+        next_cursor: Optional[str] = None,
+        total: Optional[int] = None
+    ):
+        self.items = items
+        self.size = size
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.total = total
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            "items": self.items,
+            "size": self.size,
+            "next_cursor": self.next_cursor,
+            "has_next": self.has_next,
+            "total": self.total
+        }
+
+
+def encode_cursor(sort_value: Union[datetime, str], row_id: int) -> str:
+    """将排序键 (时间, ID) 编码为不透明的游标字符串（时间为字符串时原样保存）"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    解码游标，返回 (时间字符串, ID)
+    
+    Raises:
+        ValueError: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("分页游标无效")
+
+
+def paginate_by_cursor(
+    query,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    size: int = 20,
+    max_size: int = 100,
+    descending: bool = True,
+    total: Optional[int] = None
+) -> CursorPage:
+    """
+    按 (排序列, ID) 进行游标（键集）分页
+    
+    每页只读取 size+1 行，翻页条件 (排序列, ID) < (游标值) 可以直接利用 (排序列, ID) 索引，
+    每页的代价与页码无关；也不执行 COUNT，需要总数时由调用方传入（如缓存的计数）。
+    排序列不能为空。
+    
+    SQLite 以字符串保存时间，数据库生成的值（CURRENT_TIMESTAMP）不带微秒，应用写入的值带微秒，
+    按时间绑定的参数与前者永远不相等，游标处时间相同的行会被重复返回。
+    SQLite 上游标保存最后一行排序列的原始字符串，按字符串比较，与索引中的排序一致。
+    
+    Args:
+        query: SQLAlchemy查询对象（不要预先排序）
+        sort_column: 排序列（时间列）
+        id_column: 主键列，排序值相同时保证顺序稳定
+        cursor: 上一页返回的 next_cursor，首页不传
+        size: 每页数量
+        max_size: 最大每页数量
+        descending: 是否倒序
+        total: 总数（可选，原样返回）
+    
+    Returns:
+        游标分页结果对象
+    
+    Raises:
+        ValueError: 游标格式错误
+    """
+    if size < 1:
+        size = 20
+    elif size > max_size:
+        size = max_size
+    
+    # SQLite 上按原始字符串比较和生成游标
+    sort_key = sort_column
+    if query.session.get_bind().dialect.name == "sqlite":
+        sort_key = type_coerce(sort_column, String)
+    
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_key is sort_column:
+            sort_value = datetime.fromisoformat(sort_value)
+        if descending:
+            query = query.filter(or_(
+                sort_key < sort_value,
+                and_(sort_key == sort_value, id_column < row_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_key > sort_value,
+                and_(sort_key == sort_value, id_column > row_id)
+            ))
+    
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    
+    rows = query.add_columns(sort_key, id_column).limit(size + 1).all()
+    items = [row[0] for row in rows]
+    
+    next_cursor = None
+    if len(rows) > size:
+        items = items[:size]
+        next_cursor = encode_cursor(*rows[size - 1][-2:])
+    
+    return CursorPage(
+        items=items,
+        size=size,
+        next_cursor=next_cursor,
+        total=total
+    )
+
+
 def calculate_skip_limit(page: int = 1, size: int = 20) -> tuple:
     """
     计算跳过数量和限制数量
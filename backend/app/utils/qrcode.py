@@ -5,8 +5,50 @@
 import qrcode
 import io
 import base64
+import hashlib
+import hmac
+import json
+import logging
+import struct
+import time
+from functools import lru_cache
 from PIL import Image
-from typing import Optional
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import redis
+
+from ..config.database import redis_client
+from ..config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 渲染结果在Redis中的键前缀
+QR_RENDER_PREFIX = "qr:render"
+
+# 预渲染每批写入Redis（并汇报进度）的条数
+PRERENDER_BATCH_SIZE = 200
+
+# 二维码令牌格式版本
+QR_TOKEN_VERSION = 1
+
+# 二维码令牌类型
+QR_TOKEN_CANDIDATE = 1
+QR_TOKEN_VENUE = 2
+QR_TOKEN_CHECKIN = 3
+
+# 版本(1) + 类型(1) + 主体ID(4) + 日程ID(4) + 过期时间(4)
+_QR_TOKEN_STRUCT = struct.Struct(">BBIII")
+# HMAC-SHA256 截断长度（80位）
+_QR_TOKEN_MAC_SIZE = 10
+_QR_TOKEN_SIZE = _QR_TOKEN_STRUCT.size + _QR_TOKEN_MAC_SIZE
+
+
+class QRToken(NamedTuple):
+    """解码后的二维码令牌"""
+    token_type: int
+    subject_id: int
+    schedule_id: Optional[int]
+    expires_at: int  # Unix时间戳（秒）
 
 
 def generate_qr_code(
@@ -15,11 +57,14 @@ def generate_qr_code(
     border: int = 4,
     error_correction=qrcode.constants.ERROR_CORRECT_L,
     fill_color: str = "black",
-    back_color: str = "white"
+    back_color: str = "white",
+    image_format: str = "png"
 ) -> str:
     """
     生成二维码图片的Base64编码字符串
     
+    相同数据和样式的渲染结果依次从进程内LRU缓存、Redis中获取，均未命中时才渲染。
+    
     Args:
         data: 二维码包含的数据
         size: 二维码大小（1-40）
@@ -27,10 +72,24 @@ def generate_qr_code(
         error_correction: 错误纠正级别
         fill_color: 前景色
         back_color: 背景色
+        image_format: 图片格式，png 或 svg
     
     Returns:
-        Base64编码的PNG图片字符串
+        Base64编码的图片（data URI）字符串
     """
+    return _cached_render(data, size, border, error_correction, fill_color, back_color, image_format)
+
+
+def render_qr_code(
+    data: str,
+    size: int = 10,
+    border: int = 4,
+    error_correction=qrcode.constants.ERROR_CORRECT_L,
+    fill_color: str = "black",
+    back_color: str = "white",
+    image_format: str = "png"
+) -> str:
+    """渲染二维码（不经过缓存，可在任务进程中执行），参数同 generate_qr_code"""
     qr = qrcode.QRCode(
         version=1,
         error_correction=error_correction,
@@ -41,6 +100,11 @@ def generate_qr_code(
     qr.add_data(data)
     qr.make(fit=True)
     
+    if image_format == "svg":
+        svg = _render_svg(qr.get_matrix(), size, fill_color, back_color)
+        img_str = base64.b64encode(svg.encode()).decode()
+        return f"data:image/svg+xml;base64,{img_str}"
+    
     # 创建图片
     img = qr.make_image(fill_color=fill_color, back_color=back_color)
     
@@ -52,6 +116,111 @@ def generate_qr_code(
     return f"data:image/png;base64,{img_str}"
 
 
+def _render_svg(matrix: List[List[bool]], size: int, fill_color: str, back_color: str) -> str:
+    """将模块矩阵渲染为SVG，同一行相邻的深色模块合并为一个矩形"""
+    n = len(matrix)
+    path = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < n and row[x]:
+                x += 1
+            path.append(f"M{start} {y}h{x - start}v1H{start}z")
+    
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{n * size}" height="{n * size}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<path fill="{back_color}" d="M0 0h{n}v{n}H0z"/>'
+        f'<path fill="{fill_color}" d="{"".join(path)}"/></svg>'
+    )
+
+
+def _render_cache_key(*style) -> str:
+    raw = json.dumps(style, ensure_ascii=False)
+    return f"{QR_RENDER_PREFIX}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+@lru_cache(maxsize=settings.qr_render_cache_size)
+def _cached_render(*style) -> str:
+    key = _render_cache_key(*style)
+    try:
+        hit = redis_client.get(key)
+        if hit is not None:
+            return hit.decode()
+    except redis.RedisError as e:
+        logger.warning("二维码渲染缓存读取失败: %s", e)
+    
+    image = render_qr_code(*style)
+    
+    try:
+        redis_client.set(key, image, ex=settings.qr_render_ttl)
+    except redis.RedisError as e:
+        logger.warning("二维码渲染缓存写入失败: %s", e)
+    
+    return image
+
+
+def prerender_qr_codes(
+    items: List[Tuple[str, int]],
+    progress: Optional[Callable[[int, int], None]] = None,
+    size: int = 10,
+    border: int = 4,
+    error_correction=qrcode.constants.ERROR_CORRECT_L,
+    fill_color: str = "black",
+    back_color: str = "white",
+    image_format: str = "png"
+) -> int:
+    """
+    批量预渲染二维码并写入Redis，供各API进程直接读取
+    
+    在当前进程中逐批渲染，应在任务进程（job_executor）中调用，不要在API进程中调用。
+    
+    Args:
+        items: (二维码数据, 过期时间戳) 列表，缓存在二维码过期后失效
+        progress: 每批写入后回调 progress(已处理条数, 总条数)
+        其余参数同 generate_qr_code
+    
+    Returns:
+        渲染并写入Redis的二维码数量（Redis中已存在的会跳过；Redis不可用时为0，由API进程按需渲染）
+    """
+    style = (size, border, error_correction, fill_color, back_color, image_format)
+    keys = [_render_cache_key(data, *style) for data, _ in items]
+    
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.exists(key)
+    try:
+        existing = pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("二维码预渲染失败，渲染缓存读取失败: %s", e)
+        return 0
+    pending = [
+        (key, data, expires_at)
+        for key, (data, expires_at), exists in zip(keys, items, existing)
+        if not exists
+    ]
+    
+    rendered = 0
+    for offset in range(0, len(pending), PRERENDER_BATCH_SIZE):
+        now = int(time.time())
+        for key, data, expires_at in pending[offset:offset + PRERENDER_BATCH_SIZE]:
+            image = render_qr_code(data, *style)
+            pipe.set(key, image, ex=max(expires_at - now, settings.qr_render_ttl))
+        try:
+            rendered += len(pipe.execute())
+        except redis.RedisError as e:
+            logger.warning("二维码预渲染失败，渲染缓存写入失败: %s", e)
+            return rendered
+        if progress is not None:
+            progress(rendered, len(pending))
+    
+    return rendered
+
+
 def generate_venue_qr_code(venue_id: int, venue_name: str) -> str:
     """
     生成考场二维码
@@ -63,14 +232,14 @@ def generate_venue_qr_code(venue_id: int, venue_name: str) -> str:
     Returns:
         二维码的Base64字符串
     """
+    # 时间戳按小时对齐，同一小时内二维码内容相同，可复用渲染缓存
     qr_data = {
         "type": "venue",
         "venue_id": venue_id,
         "venue_name": venue_name,
-        "timestamp": int(time.time())
+        "timestamp": int(time.time()) // 3600 * 3600
     }
     
-    import json
     data_str = json.dumps(qr_data, ensure_ascii=False)
     
     return generate_qr_code(data_str, size=8)
@@ -92,15 +261,13 @@ def generate_checkin_qr_code(
     Returns:
         二维码的Base64字符串
     """
-    import time
-    import json
-    
+    # 时间戳按小时对齐，同一小时内二维码内容相同，可复用渲染缓存
     qr_data = {
         "type": "checkin",
         "exam_session_id": exam_session_id,
         "venue_id": venue_id,
         "exam_title": exam_title,
-        "timestamp": int(time.time())
+        "timestamp": int(time.time()) // 3600 * 3600
     }
     
     data_str = json.dumps(qr_data, ensure_ascii=False)
@@ -108,6 +275,82 @@ def generate_checkin_qr_code(
     return generate_qr_code(data_str, size=10)
 
 
+def _qr_token_key() -> bytes:
+    """由 settings.secret_key 派生二维码令牌的签名密钥，与JWT签名密钥隔离"""
+    return hmac.new(settings.secret_key.encode(), b"uav-qr-token", hashlib.sha256).digest()
+
+
+def _qr_token_mac(body: bytes) -> bytes:
+    return hmac.new(_qr_token_key(), body, hashlib.sha256).digest()[:_QR_TOKEN_MAC_SIZE]
+
+
+def encode_qr_token(
+    token_type: int,
+    subject_id: int,
+    expires_at: int,
+    schedule_id: Optional[int] = None
+) -> str:
+    """
+    生成二维码令牌
+    
+    令牌为24字节的二进制结构（含HMAC签名），使用不带填充的Base32编码，
+    只包含大写字母和数字，可用二维码字母数字模式编码，比JSON文本小得多。
+    
+    Args:
+        token_type: 令牌类型（QR_TOKEN_CANDIDATE 等）
+        subject_id: 主体ID（考生/考场/场次ID）
+        expires_at: 过期时间（Unix时间戳，秒）
+        schedule_id: 关联的日程ID
+    
+    Returns:
+        令牌字符串
+    """
+    body = _QR_TOKEN_STRUCT.pack(
+        QR_TOKEN_VERSION, token_type, subject_id, schedule_id or 0, expires_at
+    )
+    return base64.b32encode(body + _qr_token_mac(body)).decode().rstrip("=")
+
+
+def decode_qr_token(token: str, now: Optional[float] = None, token_type: Optional[int] = None) -> QRToken:
+    """
+    校验并解码二维码令牌（不访问数据库）
+    
+    Args:
+        token: 令牌字符串
+        now: 当前时间戳，默认取系统时间
+        token_type: 期望的令牌类型，不传时不检查
+    
+    Returns:
+        解码后的令牌
+    
+    Raises:
+        ValueError: 令牌格式错误、签名无效、类型不符或已过期
+    """
+    try:
+        raw = base64.b32decode(token.strip().upper() + "=" * (-len(token.strip()) % 8))
+    except (ValueError, TypeError):
+        raise ValueError("二维码无效")
+    
+    if len(raw) != _QR_TOKEN_SIZE:
+        raise ValueError("二维码无效")
+    
+    body, mac = raw[:_QR_TOKEN_STRUCT.size], raw[_QR_TOKEN_STRUCT.size:]
+    if not hmac.compare_digest(mac, _qr_token_mac(body)):
+        raise ValueError("二维码无效")
+    
+    version, actual_type, subject_id, schedule_id, expires_at = _QR_TOKEN_STRUCT.unpack(body)
+    if version != QR_TOKEN_VERSION:
+        raise ValueError("二维码版本不受支持")
+    
+    if token_type is not None and actual_type != token_type:
+        raise ValueError("二维码类型错误")
+    
+    if expires_at < (now if now is not None else time.time()):
+        raise ValueError("二维码已过期")
+    
+    return QRToken(actual_type, subject_id, schedule_id or None, expires_at)
+
+
 def parse_qr_data(qr_text: str) -> Optional[dict]:
     """
     解析二维码数据
@@ -119,7 +362,6 @@ def parse_qr_data(qr_text: str) -> Optional[dict]:
         解析后的数据字典，解析失败返回None
     """
     try:
-        import json
         return json.loads(qr_text)
     except (json.JSONDecodeError, TypeError):
         return None
\ No newline at end of file
@@ -2,20 +2,36 @@
 安全相关工具函数
 """
 
+import asyncio
+import hmac
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 
 from ..config.settings import settings
+from ..core.sequences import CANDIDATE_NUMBER, REGISTRATION_NUMBER, sequence_allocator
 
 # 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt轮数低于 settings.bcrypt_rounds 的哈希、早期的SHA256哈希在登录成功时自动重新哈希
+pwd_context = CryptContext(
+    schemes=["bcrypt", "hex_sha256"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds
+)
+
+# 默认密码（身份证后6位）尚未哈希的标记，首次登录时校验默认密码并写入真正的哈希
+DEFERRED_PASSWORD_HASH = "!deferred-default"
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
 
 
 def get_password_hash(password: str) -> str:
@@ -23,6 +39,67 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+    default_password: Optional[str] = None
+) -> Tuple[bool, Optional[str]]:
+    """
+    验证密码，哈希需要升级时同时返回新哈希
+    
+    Args:
+        plain_password: 明文密码
+        hashed_password: 数据库中的密码哈希
+        default_password: 默认密码，密码哈希为 DEFERRED_PASSWORD_HASH 时与之比较
+    
+    Returns:
+        (是否正确, 新的密码哈希或None)
+    """
+    if hashed_password == DEFERRED_PASSWORD_HASH:
+        if default_password and hmac.compare_digest(plain_password.encode(), default_password.encode()):
+            return True, pwd_context.hash(plain_password)
+        return False, None
+    
+    if not hashed_password or not pwd_context.identify(hashed_password):
+        return False, None
+    
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _get_hash_pool() -> Optional[ProcessPoolExecutor]:
+    global _hash_pool
+    if _hash_pool is None and settings.password_hash_workers > 0:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在进程池中生成密码哈希，不阻塞事件循环"""
+    return await asyncio.get_running_loop().run_in_executor(_get_hash_pool(), get_password_hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+    default_password: Optional[str] = None
+) -> Tuple[bool, Optional[str]]:
+    """在进程池中验证密码，参数和返回值同 verify_and_update_password"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_hash_pool(), verify_and_update_password, plain_password, hashed_password, default_password
+    )
+
+
+def shutdown_password_pool() -> None:
+    """关闭密码哈希进程池"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建JWT访问令牌"""
     to_encode = data.copy()
@@ -51,19 +128,26 @@ def generate_unique_code(prefix: str = "", length: int = 8) -> str:
     return code
 
 
+def _format_number(prefix: str, value: int) -> str:
+    """编号格式：前缀 + 日期 + 8位序号（序号全局唯一，日期仅便于人工识别）"""
+    return f"{prefix}{datetime.now().strftime('%Y%m%d')}{value:08d}"
+
+
 def generate_candidate_number() -> str:
     """生成准考证号"""
-    from datetime import datetime
-    
-    now = datetime.now()
-    date_str = now.strftime("%Y%m%d")
-    time_str = now.strftime("%H%M%S")
-    
-    return f"UAV{date_str}{time_str}"
+    return _format_number("CAN", sequence_allocator.next_value(CANDIDATE_NUMBER))
+
+
+def generate_candidate_numbers(count: int) -> List[str]:
+    """批量生成准考证号（只访问一次数据库）"""
+    return [_format_number("CAN", value) for value in sequence_allocator.allocate(CANDIDATE_NUMBER, count)]
 
 
 def generate_registration_number() -> str:
     """生成报名号"""
-    import uuid
-    
-    return str(uuid.uuid4()).replace('-', '').upper()[:12]
\ No newline at end of file
+    return _format_number("REG", sequence_allocator.next_value(REGISTRATION_NUMBER))
+
+
+def generate_registration_numbers(count: int) -> List[str]:
+    """批量生成报名号（只访问一次数据库）"""
+    return [_format_number("REG", value) for value in sequence_allocator.allocate(REGISTRATION_NUMBER, count)]
@@ -0,0 +1,110 @@
+"""
+表格文件流式读取工具
+"""
+
+from typing import Iterator, List, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+def iter_table_chunks(file_path: str, chunk_size: int = 1000) -> Iterator[pd.DataFrame]:
+    """
+    按块流式读取Excel（.xlsx）或CSV文件
+    
+    Excel使用openpyxl只读模式逐行读取，CSV使用pandas分块读取，内存占用只与块大小有关。
+    首行为表头；所有单元格转换为字符串（整数形式的数字不带小数点），空单元格为None。
+    返回的DataFrame索引为数据行的序号（从0开始，跨块连续）。
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块行数
+    
+    Yields:
+        每块数据
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith(".csv"):
+        yield from _iter_csv_chunks(file_path, chunk_size)
+    elif lower_path.endswith(".xls"):
+        # 旧版Excel格式不支持流式读取
+        df = pd.read_excel(file_path, dtype=str)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        yield from _iter_xlsx_chunks(file_path, chunk_size)
+
+
+def count_table_rows(file_path: str) -> Optional[int]:
+    """
+    估算数据行数（不含表头），用于显示进度
+    
+    CSV逐行计数（不解析内容，含换行的单元格会使结果偏大）；
+    Excel读取工作表记录的尺寸，文件未记录时返回None。
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith(".csv"):
+        with open(file_path, "rb") as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    
+    if lower_path.endswith(".xls"):
+        return None
+    
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        max_row = workbook.active.max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        workbook.close()
+
+
+def _iter_csv_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    reader = pd.read_csv(
+        file_path,
+        dtype=str,
+        encoding="utf-8-sig",
+        chunksize=chunk_size
+    )
+    with reader:
+        for chunk in reader:
+            yield chunk.where(chunk.notna(), None)
+
+
+def _iter_xlsx_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        columns = [str(value).strip() if value is not None else "" for value in header]
+        buffer: List[List[Optional[str]]] = []
+        start = 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append([_cell_to_str(value) for value in row[:len(columns)]])
+            if len(buffer) >= chunk_size:
+                yield _to_frame(buffer, columns, start)
+                start += len(buffer)
+                buffer = []
+        
+        if buffer:
+            yield _to_frame(buffer, columns, start)
+    finally:
+        workbook.close()
+
+
+def _to_frame(rows: List[List[Optional[str]]], columns: List[str], start: int) -> pd.DataFrame:
+    # 行尾的空单元格在只读模式下可能被省略，补齐列数
+    rows = [row + [None] * (len(columns) - len(row)) for row in rows]
+    return pd.DataFrame(rows, columns=columns, index=range(start, start + len(rows)), dtype=object)
+
+
+def _cell_to_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,6 @@
+"""
+服务层性能基准
+
+    python -m benchmarks.datagen --scale 0.01      # 生成生产规模（按比例缩放）的模拟数据
+    python -m pytest benchmarks -q                 # 热点服务方法的基准，与 baselines.json 比较
+"""
@@ -0,0 +1,127 @@
+"""
+考场实时状态查询基准
+
+为不同规模的考场数据（默认5/50/500个考场）生成数据，统计 WeChatService.get_venues_status
+的平均耗时和每次调用执行的SQL语句数。聚合查询实现下语句数应恒定为1，耗时随考场数近似持平。
+
+用法（在backend目录下）:
+    python -m benchmarks.bench_venues_status
+    python -m benchmarks.bench_venues_status --venues 5 50 500 --waiting 10 --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config.database import Base
+from app.models.user import User, UserRole
+from app.models.institution import Institution
+from app.models.venue import Venue
+from app.models.exam import ExamProduct, ExamRegistration, Schedule, ScheduleStatus, RegistrationStatus
+from app.services.wechat_service import WeChatService
+from loadtest.run import percentile
+
+
+def seed(session, venue_count: int, waiting_per_venue: int) -> None:
+    """生成考场、考生与日程数据：每个考场1个进行中日程和若干等待中日程"""
+    institution = Institution(name="基准测试机构", code="BENCH")
+    product = ExamProduct(name="基准测试产品", code="BENCH", duration_minutes=15, exam_type="实操")
+    session.add_all([institution, product])
+    session.flush()
+
+    day_start = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+    serial = 0
+
+    for v in range(venue_count):
+        venue = Venue(name=f"实操场{v}", code=f"BENCH{v}", institution_id=institution.id)
+        session.add(venue)
+        session.flush()
+
+        for slot in range(waiting_per_venue + 1):
+            serial += 1
+            user = User(
+                username=f"bench_{serial}",
+                password_hash="x",
+                real_name=f"考生{serial}",
+                role=UserRole.CANDIDATE,
+                institution_id=institution.id
+            )
+            registration = ExamRegistration(
+                user=user,
+                exam_product_id=product.id,
+                registration_number=f"REGBENCH{serial}",
+                candidate_number=f"CANBENCH{serial}",
+                status=RegistrationStatus.APPROVED
+            )
+            start_time = day_start + timedelta(minutes=15 * slot)
+            session.add(Schedule(
+                registration=registration,
+                exam_product_id=product.id,
+                venue_id=venue.id,
+                schedule_date=day_start,
+                start_time=start_time,
+                end_time=start_time + timedelta(minutes=15),
+                status=ScheduleStatus.IN_PROGRESS if slot == 0 else ScheduleStatus.PENDING
+            ))
+
+    session.commit()
+
+
+def run(venue_count: int, waiting_per_venue: int, repeat: int) -> dict:
+    """在独立的SQLite数据库上运行一个规模档位"""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        seed(session, venue_count, waiting_per_venue)
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        service = WeChatService(session)
+        service.get_venues_status()  # 预热
+
+        timings = []
+        for _ in range(repeat):
+            statements.clear()
+            started = time.perf_counter()
+            result = service.get_venues_status()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        session.close()
+        assert len(result) == venue_count
+
+        return {
+            "venues": venue_count,
+            "queries": len(statements),
+            "mean_ms": statistics.mean(timings),
+            "p95_ms": percentile(sorted(timings), 95)
+        }
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="考场实时状态查询基准")
+    parser.add_argument("--venues", type=int, nargs="+", default=[5, 50, 500], help="考场数量档位")
+    parser.add_argument("--waiting", type=int, default=10, help="每个考场的等待人数")
+    parser.add_argument("--repeat", type=int, default=20, help="每档重复次数")
+    args = parser.parse_args()
+
+    print(f"{'考场数':>8} {'SQL数':>8} {'平均(ms)':>10} {'P95(ms)':>10}")
+    for venue_count in args.venues:
+        r = run(venue_count, args.waiting, args.repeat)
+        print(f"{r['venues']:>8} {r['queries']:>8} {r['mean_ms']:>10.2f} {r['p95_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
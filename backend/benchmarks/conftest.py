@@ -0,0 +1,271 @@
+"""
+服务层基准的公共配置
+
+每个规模的数据集由 benchmarks.datagen 以固定种子生成，首次生成后缓存在 .pytest_cache 中
+（按数据集版本、规模和当天日期区分，日程状态相对当天生成），测试前复制为应用使用的SQLite数据库，
+会修改数据的基准只影响副本；副本关闭同步写盘（synchronous=OFF），提交的耗时不受磁盘抖动影响。
+Redis 使用单独的库（BENCH_REDIS_URL，默认 redis://localhost:6379/15），切换数据集时清空；
+Redis 不可用时各服务按原有逻辑降级，访问Redis的耗时计入被测方法。
+
+benchmark fixture 预热一次后多次调用被测方法（计时期间暂停垃圾回收），记录耗时和每次调用的SQL条数，
+与 benchmarks/baselines.json 中的基线比较：SQL条数比基线多时测试失败；
+最短耗时超过基线的 (1 + --bench-threshold) 倍时只给出警告（BenchmarkTimingWarning），
+毫秒级的调用在同一台机器上连续运行的波动也常超过50%，不适合作为硬性门槛。
+在独占的（或同规格的）机器上可加 --bench-strict-timing，耗时超出阈值也判定为失败。
+
+用法（在backend目录下）:
+    python -m pytest benchmarks -q                                  # 与基线比较
+    python -m pytest benchmarks -q --bench-update                   # 重新记录基线
+    python -m pytest benchmarks -q --bench-strict-timing            # 耗时超出阈值也判定为失败
+    python -m pytest benchmarks -q --bench-scales 0.001,0.01,0.1 --bench-output results.json
+"""
+
+import gc
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+import warnings
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+
+_WORK_DIR = tempfile.mkdtemp(prefix="uav-bench-")
+_DATABASE_PATH = os.path.join(_WORK_DIR, "app.db")
+
+# 应用配置在导入时读取环境变量，必须在导入应用模块之前设置；基准会重建数据库，不使用外部配置的数据库
+os.environ["DATABASE_URL"] = f"sqlite:///{_DATABASE_PATH}"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["REDIS_URL"] = os.environ.get("BENCH_REDIS_URL", "redis://localhost:6379/15")
+os.environ["DEBUG"] = "false"
+os.environ["CACHE_ENABLED"] = "false"
+
+# 数据生成规则变化时递增，使缓存的数据集失效
+DATASET_VERSION = 2
+DATASET_SEED = 20240101
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+
+# 低于该差值（毫秒）的变化视为计时噪声，不判定为回归
+_NOISE_FLOOR_MS = 0.5
+
+_results = pytest.StashKey[Dict[str, Dict[str, Any]]]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "服务层基准")
+    group.addoption("--bench-scales", default="0.001,0.01",
+                    help="数据集规模（相对 datagen 默认规模的比例），逗号分隔")
+    group.addoption("--bench-repeat", type=int, default=10, help="每个基准的计时次数")
+    group.addoption("--bench-threshold", type=float, default=0.5, help="允许的耗时增长比例")
+    group.addoption("--bench-strict-timing", action="store_true", help="耗时超出阈值时判定为失败（默认只警告）")
+    group.addoption("--bench-baseline", default=str(BASELINE_PATH), help="基线文件")
+    group.addoption("--bench-update", action="store_true", help="用本次结果更新基线，不做比较")
+    group.addoption("--bench-output", help="本次结果的输出文件（JSON）")
+
+
+def pytest_configure(config):
+    config.stash[_results] = {}
+
+
+def pytest_generate_tests(metafunc):
+    if "dataset" in metafunc.fixturenames:
+        scales = [float(scale) for scale in metafunc.config.getoption("--bench-scales").split(",")]
+        metafunc.parametrize("dataset", scales, indirect=True, scope="session", ids=lambda scale: f"scale={scale:g}")
+
+
+class BenchDataset:
+    """当前使用的数据集"""
+
+    def __init__(self, scale: float, spec):
+        self.scale = scale
+        self.spec = spec
+
+
+def _cached_dataset(config, spec, scale: float) -> Path:
+    """生成（或复用已缓存的）数据集文件"""
+    from benchmarks.datagen import generate_dataset
+
+    directory = Path(config.cache.mkdir("bench-datasets"))
+    prefix = f"v{DATASET_VERSION}-scale{scale:g}-"
+    path = directory / f"{prefix}{spec.now:%Y%m%d}.db"
+    if not path.exists():
+        for stale in directory.glob(f"{prefix}*.db"):
+            stale.unlink()
+        partial = path.with_suffix(".partial")
+        generate_dataset(f"sqlite:///{partial}", spec)
+        # 生成时使用WAL模式，切换回默认模式后数据集是单个文件，可以直接复制
+        connection = sqlite3.connect(partial)
+        connection.execute("PRAGMA journal_mode=DELETE")
+        connection.close()
+        partial.rename(path)
+    return path
+
+
+def _disable_sync(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+
+@pytest.fixture(scope="session")
+def dataset(request):
+    """按规模准备数据集并设为应用数据库（同一规模的基准共用，规模之间互不影响）"""
+    import redis
+    from sqlalchemy import event
+
+    from app.config.database import engine, redis_client
+    from app.core.profiler import install_profiler
+    from benchmarks.datagen import DatasetSpec
+
+    scale = request.param
+    spec = DatasetSpec.scaled(scale, now=datetime.combine(date.today(), datetime.min.time()).replace(hour=10),
+                              seed=DATASET_SEED)
+    source = _cached_dataset(request.config, spec, scale)
+
+    engine.dispose()
+    for suffix in ("-wal", "-shm", "-journal"):
+        if os.path.exists(_DATABASE_PATH + suffix):
+            os.remove(_DATABASE_PATH + suffix)
+    shutil.copyfile(source, _DATABASE_PATH)
+    install_profiler(engine)
+    if not event.contains(engine, "connect", _disable_sync):
+        event.listen(engine, "connect", _disable_sync)
+
+    try:
+        redis_client.flushdb()
+    except redis.RedisError:
+        pass
+
+    yield BenchDataset(scale, spec)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(dataset):
+    from app.config.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("benchmarks", {})
+
+
+@pytest.fixture
+def benchmark(request, dataset):
+    """
+    计时并与基线比较：
+
+        result = benchmark(lambda: service.get_venues_status())
+        result = benchmark(service.process_checkin, setup=lambda: (next(schedules), examiner_id, venue_id))
+
+    setup 在每次调用前执行（不计时），返回被测函数的参数；返回最后一次调用的结果。
+    """
+    from app.core.profiler import profile_queries
+
+    config = request.config
+    repeat = config.getoption("--bench-repeat")
+    name = request.node.name
+
+    def run(func: Callable, setup: Optional[Callable[[], tuple]] = None) -> Any:
+        # 预热：首次调用会加载进程内缓存（等待时间估算、语句编译缓存等）
+        result = func(*(setup() if setup else ()))
+
+        timings = []
+        queries = []
+        for _ in range(repeat):
+            args = setup() if setup else ()
+            gc.collect()
+            gc.disable()
+            try:
+                with profile_queries() as profile:
+                    started = time.perf_counter()
+                    result = func(*args)
+                    timings.append(time.perf_counter() - started)
+            finally:
+                gc.enable()
+            queries.append(profile.count)
+
+        measurement = {
+            "median_ms": round(statistics.median(timings) * 1000, 3),
+            "min_ms": round(min(timings) * 1000, 3),
+            "queries": max(queries),
+            "repeat": repeat
+        }
+        config.stash[_results][name] = measurement
+        if not config.getoption("--bench-update"):
+            _check_regression(name, measurement, _load_baseline(config.getoption("--bench-baseline")).get(name),
+                              config.getoption("--bench-threshold"), config.getoption("--bench-strict-timing"))
+        return result
+
+    return run
+
+
+class BenchmarkTimingWarning(UserWarning):
+    """耗时超出基线阈值（默认不判定为失败）"""
+
+
+def _check_regression(name: str, measurement: Dict[str, Any], baseline: Optional[Dict[str, Any]],
+                      threshold: float, strict_timing: bool = False) -> None:
+    if baseline is None:
+        # 新增的基准没有基线，记录基线后才参与比较
+        return
+
+    failures = []
+    if measurement["queries"] > baseline["queries"]:
+        failures.append(f"SQL条数 {measurement['queries']}，基线 {baseline['queries']}")
+
+    limit = baseline["min_ms"] * (1 + threshold)
+    if measurement["min_ms"] > limit and measurement["min_ms"] - baseline["min_ms"] > _NOISE_FLOOR_MS:
+        slower = (
+            f"最短耗时 {measurement['min_ms']:.2f}ms，超过基线 {baseline['min_ms']:.2f}ms 的 {1 + threshold:.0%}"
+            f"（中位数 {measurement['median_ms']:.2f}ms）"
+        )
+        if strict_timing:
+            failures.append(slower)
+        else:
+            warnings.warn(BenchmarkTimingWarning(f"{name} {slower}"))
+
+    if failures:
+        pytest.fail(f"{name} 性能回归: " + "；".join(failures), pytrace=False)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    results = config.stash.get(_results, {})
+    if not results:
+        return
+
+    environment = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count()
+    }
+
+    output = config.getoption("--bench-output")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment, "benchmarks": results}, f, ensure_ascii=False, indent=2)
+
+    if config.getoption("--bench-update"):
+        path = config.getoption("--bench-baseline")
+        # 只更新本次运行的基准，其余基线（如其他规模）保留
+        benchmarks = {**_load_baseline(path), **results}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment, "benchmarks": dict(sorted(benchmarks.items()))},
+                      f, ensure_ascii=False, indent=2)
+            f.write("\n")
@@ -0,0 +1,125 @@
+"""
+热点服务方法的基准
+
+每个基准在各个规模的数据集上运行（见 conftest.py），耗时或SQL条数超出基线时失败。
+会修改数据的基准每次调用使用不同的输入（新的身份证号、数据集之后的空闲日期、下一个待签到日程），
+调用之间互不影响。
+"""
+
+from datetime import datetime, time, timedelta
+from itertools import count
+
+import pandas as pd
+from sqlalchemy import func
+
+from app.models.exam import ExamRegistration, RegistrationStatus, Schedule, ScheduleStatus
+from app.models.user import User
+from app.models.venue import Venue
+from app.services.candidate_service import CandidateService
+from app.services.schedule_service import ScheduleService
+from app.services.venue_service import VenueService
+from app.services.wechat_service import WeChatService
+from benchmarks.datagen import PRODUCTS
+
+# 机构规模按Zipf分布，1号机构的考生和考场最多
+INSTITUTION_ID = 1
+# 实操考试产品（datagen.PRODUCTS 中的第2项）
+PRACTICAL_PRODUCT_ID = 2
+
+IMPORT_ROWS = 200
+SCHEDULE_BATCH = 50
+
+
+def _practical_venue(db) -> Venue:
+    return db.query(Venue).filter(Venue.institution_id == INSTITUTION_ID, Venue.name.like("实操场%")) \
+        .order_by(Venue.id).first()
+
+
+def test_get_candidates_first_page(db, benchmark):
+    service = CandidateService(db)
+    page = benchmark(lambda: service.get_candidates(size=20))
+    assert len(page.items) == 20
+
+
+def test_get_candidates_by_institution_with_total(db, benchmark):
+    service = CandidateService(db)
+    page = benchmark(lambda: service.get_candidates(size=20, institution_id=INSTITUTION_ID, with_total=True))
+    assert page.total >= len(page.items) > 0
+
+
+def test_batch_import_candidates(db, benchmark):
+    service = CandidateService(db)
+    serials = count(90_000_000)
+    product_name = PRODUCTS[PRACTICAL_PRODUCT_ID - 1][0]
+
+    def arguments():
+        batch = [next(serials) for _ in range(IMPORT_ROWS)]
+        frame = pd.DataFrame({
+            "姓名": [f"导入考生{serial}" for serial in batch],
+            "身份证号": [f"1101011990{serial:08d}" for serial in batch],
+            "考试产品名称": [product_name] * IMPORT_ROWS
+        })
+        return frame, INSTITUTION_ID
+
+    result = benchmark(service.batch_import_candidates, setup=arguments)
+    assert result.success_count == IMPORT_ROWS, result.errors[:3]
+
+
+def test_batch_create_schedules(db, benchmark, dataset):
+    service = ScheduleService(db)
+    venue = _practical_venue(db)
+    registration_ids = [
+        registration_id for (registration_id,) in db.query(ExamRegistration.id)
+        .filter(ExamRegistration.status == RegistrationStatus.PENDING)
+        .order_by(ExamRegistration.id).limit(SCHEDULE_BATCH)
+    ]
+    # 数据集的日期范围之后没有日程，每次调用排在新的一天
+    days = count(dataset.spec.future_days + 1)
+
+    def arguments():
+        start = datetime.combine(dataset.spec.now.date() + timedelta(days=next(days)), time(8, 0))
+        return registration_ids, PRACTICAL_PRODUCT_ID, venue.id, start, 15
+
+    schedules = benchmark(service.batch_create_schedules, setup=arguments)
+    assert len(schedules) == len(registration_ids)
+
+
+def test_get_candidate_queue_position(db, benchmark):
+    service = ScheduleService(db)
+    # 等待人数最多的考场中排在最后的考生
+    venue_id = db.query(Schedule.venue_id).filter(Schedule.status == ScheduleStatus.PENDING) \
+        .group_by(Schedule.venue_id).order_by(func.count().desc(), Schedule.venue_id).limit(1).scalar()
+    candidate_id = db.query(ExamRegistration.user_id) \
+        .join(Schedule, Schedule.registration_id == ExamRegistration.id) \
+        .filter(Schedule.venue_id == venue_id, Schedule.status == ScheduleStatus.PENDING) \
+        .order_by(Schedule.start_time.desc()).limit(1).scalar()
+
+    position = benchmark(lambda: service.get_candidate_queue_position(candidate_id))
+    assert position is not None
+
+
+def test_get_venues_status(db, benchmark):
+    service = WeChatService(db)
+    venues = benchmark(service.get_venues_status)
+    assert venues
+
+
+def test_process_checkin(db, benchmark, request):
+    service = WeChatService(db)
+    venue = _practical_venue(db)
+    examiner_id = db.query(User.id).filter(User.username == f"examiner{venue.id}").scalar()
+    calls = request.config.getoption("--bench-repeat") + 1
+    pending = iter([
+        schedule_id for (schedule_id,) in db.query(Schedule.id)
+        .filter(Schedule.venue_id == venue.id, Schedule.status == ScheduleStatus.PENDING)
+        .order_by(Schedule.start_time).limit(calls)
+    ])
+
+    result = benchmark(service.process_checkin, setup=lambda: (next(pending), examiner_id, venue.id))
+    assert result["schedule_info"]["venue_name"] == venue.name
+
+
+def test_search_venues(db, benchmark):
+    service = VenueService(db)
+    venues = benchmark(lambda: service.search_venues("实操", institution_id=INSTITUTION_ID))
+    assert venues and all(venue.institution_id == INSTITUTION_ID for venue in venues)
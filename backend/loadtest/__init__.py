@@ -0,0 +1,7 @@
+"""
+负载测试
+
+模拟考试日早高峰的流量，验证并发能力并逐版本跟踪吞吐量和延迟：
+    python -m loadtest.seed --database-url sqlite:///loadtest.db   # 生成数据（run 自动启动应用时会自动生成）
+    python -m loadtest.run --users 1250 --ramp 60 --hold 120 --output report.json
+"""
@@ -0,0 +1,370 @@
+"""
+考试日早高峰负载测试
+
+用 asyncio + httpx 模拟三类虚拟用户，在 --ramp 秒内线性增加到 --users 个，再保持 --hold 秒：
+- 考生（其余全部）：身份证号登录 -> 查看日程和排队位置 -> 获取签到二维码（交给所在考场的监考员）
+  -> 每 --poll-interval 秒查询排队位置，每 --dashboard-every 次查询附带刷新一次看板；
+- 监考员（每个考场一名，最先启动）：账号登录后依次扫描本考场考生的二维码签到，每次间隔 --checkin-interval 秒；
+- 考场大屏（--screens 个）：每 --screen-interval 秒刷新考场状态。
+未指定 --base-url 时生成数据（loadtest.seed）并启动本地应用（uvicorn），数据库默认为临时SQLite，
+也可用 --database-url 指定MySQL测试库以接近生产环境的写并发；Redis使用 --redis-url 指定的库
+（测试开始前清空，请使用专用的库）。SQLite同一时间只允许一个写事务，签到、登录等写接口在高并发下的
+锁等待和 "database is locked" 错误会如实计入报告。
+结果按接口统计请求数、吞吐量、P50/P95/P99延迟和错误率，以JSON输出；
+设置 --max-error-rate / --max-p95-ms 时超出阈值以退出码1结束，便于逐版本对比和在CI中把关。
+
+用法（在backend目录下）:
+    python -m loadtest.run --users 1250 --ramp 60 --hold 120 --output report.json
+    python -m loadtest.run --base-url http://staging:8000 --users 1250 --max-error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import redis
+
+from .seed import EXAMINER_PASSWORD, candidate_id_card, examiner_username, seed_database
+
+API = "/api/v1"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """已排序序列的百分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q * len(values) / 100) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class EndpointStats:
+    """单个接口的统计"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Counter = Counter()
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / requests, 4) if requests else 0,
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 2),
+                "p95": round(percentile(latencies, 95) * 1000, 2),
+                "p99": round(percentile(latencies, 99) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0,
+                "mean": round(sum(latencies) / requests * 1000, 2) if requests else 0
+            },
+            "statuses": dict(sorted(self.statuses.items()))
+        }
+
+
+class LoadTest:
+    """一次负载测试的共享状态：HTTP客户端、统计、截止时间和各考场的待扫码队列"""
+
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.scan_queues: Dict[int, asyncio.Queue] = {}
+        self.venue_ids: Dict[str, int] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + args.ramp + args.hold
+
+    @property
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    async def request(self, name: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """发送请求并按接口名称记录耗时和状态；4xx/5xx和网络错误计为错误"""
+        stats = self.endpoints.setdefault(name, EndpointStats())
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            stats.latencies.append(time.perf_counter() - started)
+            stats.errors += 1
+            stats.statuses[type(e).__name__] += 1
+            return None
+        finally:
+            self.in_flight -= 1
+
+        stats.latencies.append(time.perf_counter() - started)
+        stats.statuses[str(response.status_code)] += 1
+        if response.status_code >= 400:
+            stats.errors += 1
+            return None
+        return response
+
+    async def think(self, seconds: float) -> bool:
+        """等待（±20%抖动，避免虚拟用户同步请求）；测试已到截止时间时返回False"""
+        delay = seconds * random.uniform(0.8, 1.2)
+        if delay >= self.remaining:
+            return False
+        await asyncio.sleep(delay)
+        return True
+
+    def report(self, elapsed: float, users: Dict[str, int]) -> Dict[str, Any]:
+        requests = sum(len(stats.latencies) for stats in self.endpoints.values())
+        errors = sum(stats.errors for stats in self.endpoints.values())
+        latencies = sorted(latency for stats in self.endpoints.values() for latency in stats.latencies)
+        return {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "target": str(self.client.base_url),
+            "config": {
+                key: getattr(self.args, key)
+                for key in ("users", "ramp", "hold", "screens", "poll_interval", "dashboard_every",
+                            "checkin_interval", "screen_interval", "workers", "seed")
+            },
+            "virtual_users": users,
+            "elapsed_seconds": round(elapsed, 2),
+            "peak_in_flight": self.peak_in_flight,
+            "totals": {
+                "requests": requests,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4) if requests else 0,
+                "throughput_rps": round(requests / elapsed, 2) if elapsed else 0,
+                "latency_ms": {
+                    "p50": round(percentile(latencies, 50) * 1000, 2),
+                    "p95": round(percentile(latencies, 95) * 1000, 2),
+                    "p99": round(percentile(latencies, 99) * 1000, 2)
+                }
+            },
+            "endpoints": {
+                name: stats.report(elapsed) for name, stats in sorted(self.endpoints.items())
+            }
+        }
+
+
+async def candidate(test: LoadTest, serial: int) -> None:
+    response = await test.request(
+        "POST /wechat/login", "POST", f"{API}/wechat/login",
+        json={"id_card": candidate_id_card(serial), "openid": f"loadtest-{serial}"}
+    )
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    await test.request(
+        "GET /wechat/candidate/schedule", "GET", f"{API}/wechat/candidate/schedule", headers=headers
+    )
+    position = await test.request(
+        "GET /wechat/candidate/queue-position", "GET", f"{API}/wechat/candidate/queue-position",
+        headers=headers
+    )
+    qrcode = await test.request(
+        "GET /wechat/candidate/qrcode", "GET", f"{API}/wechat/candidate/qrcode", headers=headers
+    )
+
+    # 到达考场后把二维码交给该考场的监考员扫描
+    venue_id = test.venue_ids.get(position.json()["venue_name"]) if position and position.json() else None
+    if qrcode is not None and venue_id in test.scan_queues:
+        test.scan_queues[venue_id].put_nowait(qrcode.json()["qr_data"])
+
+    polls = 0
+    while await test.think(test.args.poll_interval):
+        await test.request(
+            "GET /wechat/candidate/queue-position", "GET", f"{API}/wechat/candidate/queue-position",
+            headers=headers
+        )
+        polls += 1
+        if polls % test.args.dashboard_every == 0:
+            await test.request("GET /wechat/dashboard", "GET", f"{API}/wechat/dashboard")
+
+
+async def examiner(test: LoadTest, serial: int, venue_id: int) -> None:
+    response = await test.request(
+        "POST /auth/token", "POST", f"{API}/auth/token",
+        data={"username": examiner_username(serial), "password": EXAMINER_PASSWORD}
+    )
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    queue = test.scan_queues[venue_id]
+
+    while test.remaining > 0:
+        try:
+            qr_token = await asyncio.wait_for(queue.get(), timeout=test.remaining)
+        except asyncio.TimeoutError:
+            return
+        await test.request(
+            "POST /wechat/checkin", "POST", f"{API}/wechat/checkin", headers=headers,
+            json={"venue_id": venue_id, "qr_token": qr_token, "idempotency_key": uuid.uuid4().hex}
+        )
+        if not await test.think(test.args.checkin_interval):
+            return
+
+
+async def screen(test: LoadTest) -> None:
+    while True:
+        await test.request("GET /wechat/venues/status", "GET", f"{API}/wechat/venues/status")
+        if not await test.think(test.args.screen_interval):
+            return
+
+
+async def _start_later(delay: float, coroutine) -> None:
+    await asyncio.sleep(delay)
+    await coroutine
+
+
+async def run_load_test(base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """按配置运行负载测试，返回报告"""
+    # 空闲连接的保留时间短于uvicorn的keep-alive超时（5秒），避免复用服务端已关闭的连接
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users, keepalive_expiry=4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        test = LoadTest(client, args)
+
+        response = await client.get(f"{API}/wechat/venues/status")
+        response.raise_for_status()
+        test.venue_ids = {venue["venue_name"]: venue["venue_id"] for venue in response.json()}
+        venue_ids = sorted(test.venue_ids.values())
+        for venue_id in venue_ids:
+            test.scan_queues[venue_id] = asyncio.Queue()
+
+        # 监考员和大屏在开考前就位，考生在爬坡期内陆续到达
+        examiners = len(venue_ids)
+        screens = min(args.screens, max(args.users - examiners, 0))
+        candidates = max(args.users - examiners - screens, 0)
+        tasks = [asyncio.create_task(examiner(test, serial, venue_id))
+                 for serial, venue_id in enumerate(venue_ids, start=1)]
+        tasks += [asyncio.create_task(screen(test)) for _ in range(screens)]
+        tasks += [
+            asyncio.create_task(_start_later(args.ramp * index / candidates, candidate(test, index + 1)))
+            for index in range(candidates)
+        ]
+
+        started = time.monotonic()
+        await asyncio.gather(*tasks)
+        return test.report(
+            time.monotonic() - started,
+            {"candidates": candidates, "examiners": examiners, "screens": screens}
+        )
+
+
+@contextmanager
+def local_server(args: argparse.Namespace) -> Iterator[str]:
+    """生成数据（默认使用临时SQLite数据库）并启动应用，返回基础URL"""
+    workdir = tempfile.mkdtemp(prefix="uav-loadtest-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    seed_database(database_url, args.candidates or args.users, args.venues)
+    redis.from_url(args.redis_url).flushdb()
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "REDIS_URL": args.redis_url,
+        "DEBUG": "false"
+    }
+    log = open(os.path.join(workdir, "server.log"), "w")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"应用启动失败，日志: {log.name}")
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"应用启动超时，日志: {log.name}")
+            time.sleep(0.5)
+        yield base_url
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        log.close()
+
+
+def _failures(report: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    failures = []
+    totals = report["totals"]
+    if args.max_error_rate is not None and totals["error_rate"] > args.max_error_rate:
+        failures.append(f"错误率 {totals['error_rate']:.2%} 超过 {args.max_error_rate:.2%}")
+    if args.max_p95_ms is not None:
+        for name, stats in report["endpoints"].items():
+            if stats["latency_ms"]["p95"] > args.max_p95_ms:
+                failures.append(f"{name} P95 {stats['latency_ms']['p95']}ms 超过 {args.max_p95_ms}ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="考试日早高峰负载测试")
+    parser.add_argument("--base-url", help="被测应用地址（需已用 loadtest.seed 生成数据）；不指定时启动本地应用")
+    parser.add_argument("--users", type=int, default=1250, help="虚拟用户总数（考生、监考员、考场大屏）")
+    parser.add_argument("--ramp", type=float, default=60, help="爬坡时间（秒）")
+    parser.add_argument("--hold", type=float, default=120, help="满负载保持时间（秒）")
+    parser.add_argument("--screens", type=int, default=20, help="考场大屏数")
+    parser.add_argument("--poll-interval", type=float, default=5, help="考生查询排队位置的间隔（秒）")
+    parser.add_argument("--dashboard-every", type=int, default=6, help="考生每查询多少次排队位置刷新一次看板")
+    parser.add_argument("--checkin-interval", type=float, default=3, help="监考员两次扫码的间隔（秒）")
+    parser.add_argument("--screen-interval", type=float, default=5, help="考场大屏刷新间隔（秒）")
+    parser.add_argument("--timeout", type=float, default=30, help="请求超时（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--candidates", type=int, help="本地应用生成的考生人数（默认等于 --users）")
+    parser.add_argument("--venues", type=int, default=20, help="本地应用生成的考场数")
+    parser.add_argument("--database-url", help="本地应用使用的数据库（表会被删除重建），默认使用临时SQLite数据库")
+    parser.add_argument("--workers", type=int, default=1, help="本地应用的worker进程数")
+    parser.add_argument("--port", type=int, default=8765, help="本地应用端口")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15", help="本地应用使用的Redis库（会被清空）")
+    parser.add_argument("--output", help="报告输出文件（默认输出到标准输出）")
+    parser.add_argument("--max-error-rate", type=float, help="总错误率上限，超出时退出码为1")
+    parser.add_argument("--max-p95-ms", type=float, help="各接口P95延迟上限（毫秒），超出时退出码为1")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.base_url:
+        report = asyncio.run(run_load_test(args.base_url, args))
+    else:
+        with local_server(args) as base_url:
+            report = asyncio.run(run_load_test(base_url, args))
+
+    failures = _failures(report, args)
+    report["failures"] = failures
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"未达标: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
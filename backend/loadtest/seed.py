@@ -0,0 +1,118 @@
+"""
+负载测试数据
+
+生成一个考试日上午的数据：若干实操考场，每名考生一条已审核的报名和一个当天的待进行日程
+（每个考场15分钟一场，从当前时间开始），以及每个考场一名监考员。
+考生身份证号和监考员账号按序号生成，压测驱动按同样的规则登录。
+
+用法（在backend目录下）:
+    python -m loadtest.seed --database-url sqlite:///loadtest.db --candidates 1200 --venues 20
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+
+from app.config.database import Base
+from app.models.exam import ExamProduct, ExamRegistration, RegistrationStatus, Schedule, ScheduleStatus
+from app.models.institution import Institution
+from app.models.user import User, UserRole
+from app.models.venue import Venue
+from app.utils.security import get_password_hash
+
+EXAMINER_PASSWORD = "loadtest123"
+EXAM_MINUTES = 15
+INSTITUTIONS = 10
+
+# 每批插入的行数
+_BATCH_SIZE = 5000
+
+
+def candidate_id_card(serial: int) -> str:
+    """第 serial 名考生（从1开始）的身份证号"""
+    return f"1101011990{serial:08d}"
+
+
+def examiner_username(serial: int) -> str:
+    """第 serial 名监考员（从1开始）的用户名"""
+    return f"examiner{serial}"
+
+
+def _insert(conn, model, rows) -> None:
+    for start in range(0, len(rows), _BATCH_SIZE):
+        conn.execute(insert(model), rows[start:start + _BATCH_SIZE])
+
+
+def seed_database(database_url: str, candidates: int, venues: int) -> None:
+    """重建数据库并生成数据（会删除已有的表）"""
+    engine = create_engine(database_url)
+    if engine.dialect.name == "sqlite":
+        # WAL模式下读写互不阻塞，接近MySQL的并发行为
+        @event.listens_for(engine, "connect")
+        def set_wal(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    day_start = datetime.now().replace(second=0, microsecond=0)
+    password_hash = get_password_hash(EXAMINER_PASSWORD)
+
+    try:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            _insert(conn, Institution, [
+                {"id": i, "name": f"培训机构{i}", "code": f"LT{i:03d}", "is_approved": True}
+                for i in range(1, INSTITUTIONS + 1)
+            ])
+            _insert(conn, ExamProduct, [
+                {"id": 1, "name": "多旋翼视距内驾驶员实操", "code": "LT-P01",
+                 "duration_minutes": EXAM_MINUTES, "exam_type": "实操"}
+            ])
+            _insert(conn, Venue, [
+                {"id": i, "name": f"实操场{i}", "code": f"LTV{i:03d}", "capacity": 1,
+                 "institution_id": i % INSTITUTIONS + 1}
+                for i in range(1, venues + 1)
+            ])
+            _insert(conn, User, [
+                {"id": i, "username": examiner_username(i), "password_hash": password_hash,
+                 "real_name": f"监考员{i}", "role": UserRole.EXAMINER, "id_card": None,
+                 "institution_id": i % INSTITUTIONS + 1}
+                for i in range(1, venues + 1)
+            ] + [
+                {"id": venues + i, "username": f"lt_candidate{i}", "password_hash": "!",
+                 "real_name": f"考生{i}", "role": UserRole.CANDIDATE, "id_card": candidate_id_card(i),
+                 "institution_id": i % INSTITUTIONS + 1}
+                for i in range(1, candidates + 1)
+            ])
+            _insert(conn, ExamRegistration, [
+                {"id": i, "user_id": venues + i, "exam_product_id": 1,
+                 "registration_number": f"LTREG{i:08d}", "candidate_number": f"LTCAN{i:08d}",
+                 "status": RegistrationStatus.APPROVED}
+                for i in range(1, candidates + 1)
+            ])
+            _insert(conn, Schedule, [
+                {"registration_id": i, "exam_product_id": 1, "venue_id": (i - 1) % venues + 1,
+                 "schedule_date": day_start.replace(hour=0, minute=0),
+                 "start_time": day_start + timedelta(minutes=EXAM_MINUTES * ((i - 1) // venues)),
+                 "end_time": day_start + timedelta(minutes=EXAM_MINUTES * ((i - 1) // venues + 1)),
+                 "queue_position": (i - 1) // venues + 1,
+                 "status": ScheduleStatus.PENDING}
+                for i in range(1, candidates + 1)
+            ])
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成负载测试数据")
+    parser.add_argument("--database-url", default="sqlite:///loadtest.db", help="数据库URL（表会被删除重建）")
+    parser.add_argument("--candidates", type=int, default=1200, help="考生人数")
+    parser.add_argument("--venues", type=int, default=20, help="实操考场数（每个考场一名监考员）")
+    args = parser.parse_args()
+
+    seed_database(args.database_url, args.candidates, args.venues)
+    print(f"已生成 {args.candidates} 名考生、{args.venues} 个考场: {args.database_url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+测试公共配置
+
+应用配置在导入时读取环境变量，这里先指定测试用的临时SQLite数据库和单独的Redis库（TEST_REDIS_URL，
+默认 redis://localhost:6379/14）并关闭Redis缓存，测试不会访问开发数据库和缓存；
+应用模块在环境变量设置之后（fixture内）才导入。
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Optional
+
+import pytest
+
+_TEST_DIR = tempfile.mkdtemp(prefix="uav-tests-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TEST_DIR, 'app.db')}")
+os.environ.setdefault("REDIS_URL", os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/14"))
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+
+@pytest.fixture
+def query_budget():
+    """
+    限定代码块执行的SQL条数，防止N+1查询回归：
+
+        with query_budget(3):
+            client.get("/api/v1/schedules/1", headers=headers)
+
+    超过预算，或同一形状的语句重复执行超过 max_repeats 次（默认按 settings.sql_profiler_repeat_threshold）时测试失败。
+    """
+    from app.config.settings import settings
+    from app.core.profiler import capture_queries
+
+    @contextmanager
+    def budget(max_queries: int, max_repeats: Optional[int] = None):
+        with capture_queries() as profile:
+            yield profile
+
+        threshold = max_repeats + 1 if max_repeats is not None else settings.sql_profiler_repeat_threshold
+        report = profile.report(threshold)
+        assert profile.count <= max_queries, f"超出SQL预算（{max_queries} 条）\n{report}"
+        assert not profile.repeated(threshold), f"存在重复执行的SQL（疑似N+1查询）\n{report}"
+
+    return budget
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    用 fakeredis 替换各应用模块导入的 redis_client，每个测试一个空的实例。
+
+    只替换已导入的模块，测试模块应在顶部导入被测代码。fakeredis 不支持Lua脚本，
+    依赖脚本的调用（如锁的释放）与真实Redis不可用时一样走异常分支。
+    """
+    import fakeredis
+
+    from app.config import database
+
+    original = database.redis_client
+    client = fakeredis.FakeRedis()
+    for name, module in list(sys.modules.items()):
+        if (name == "app" or name.startswith("app.")) and getattr(module, "redis_client", None) is original:
+            monkeypatch.setattr(module, "redis_client", client)
+    return client
@@ -0,0 +1,97 @@
+"""
+扫码签到：重复扫码、幂等重试、考场不匹配
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config.database import Base
+from app.models.checkin import CheckIn
+from app.models.exam import ExamProduct, ExamRegistration, RegistrationStatus, Schedule, ScheduleStatus
+from app.models.institution import Institution
+from app.models.user import User, UserRole
+from app.models.venue import Venue
+from app.services.wechat_service import WeChatService
+
+START = datetime(2026, 11, 2, 8)
+EXAMINER_ID = 1
+SCHEDULE_ID = 1
+VENUE_ID = 1
+
+
+@pytest.fixture
+def db(tmp_path, fake_redis):
+    engine = create_engine(f"sqlite:///{tmp_path / 'checkin.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Institution), [{"id": 1, "name": "机构1", "code": "INS001"}])
+        conn.execute(insert(ExamProduct), [
+            {"id": 1, "name": "多旋翼实操", "code": "P01", "duration_minutes": 15, "exam_type": "实操"}
+        ])
+        conn.execute(insert(Venue), [
+            {"id": i, "name": f"实操场{i}", "code": f"V{i:03d}", "capacity": 5, "institution_id": 1}
+            for i in (1, 2)
+        ])
+        conn.execute(insert(User), [
+            {"id": EXAMINER_ID, "username": "examiner", "password_hash": "x", "real_name": "考务",
+             "role": UserRole.EXAMINER, "institution_id": 1},
+            {"id": 2, "username": "candidate", "password_hash": "x", "real_name": "考生",
+             "role": UserRole.CANDIDATE, "institution_id": 1},
+        ])
+        conn.execute(insert(ExamRegistration), [
+            {"id": 1, "user_id": 2, "exam_product_id": 1, "registration_number": "REG00000001",
+             "candidate_number": "CAN00000001", "status": RegistrationStatus.APPROVED}
+        ])
+        conn.execute(insert(Schedule), [
+            {"id": SCHEDULE_ID, "registration_id": 1, "exam_product_id": 1, "venue_id": VENUE_ID,
+             "schedule_date": START.replace(hour=0), "start_time": START,
+             "end_time": START + timedelta(minutes=15)}
+        ])
+
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _checkin_count(db) -> int:
+    return db.scalar(select(func.count()).select_from(CheckIn).where(CheckIn.schedule_id == SCHEDULE_ID))
+
+
+def test_second_scan_is_rejected(db):
+    service = WeChatService(db)
+    assert service.process_checkin(SCHEDULE_ID, EXAMINER_ID, VENUE_ID)["success"]
+
+    # 另一名考务人员扫同一考生：条件UPDATE影响0行
+    with pytest.raises(ValueError, match="状态不允许签到"):
+        service.process_checkin(SCHEDULE_ID, EXAMINER_ID, VENUE_ID)
+
+    assert _checkin_count(db) == 1
+    assert db.get(Schedule, SCHEDULE_ID).status == ScheduleStatus.IN_PROGRESS
+
+
+def test_retry_replays_from_database_after_redis_miss(db, fake_redis):
+    service = WeChatService(db)
+    first = service.process_checkin(SCHEDULE_ID, EXAMINER_ID, VENUE_ID, idempotency_key="scan-1")
+    assert fake_redis.keys("idempotency:*")
+
+    # 幂等记录丢失（Redis重启或已过期），重试由数据库中的签到记录重放
+    fake_redis.flushall()
+    retry = service.process_checkin(SCHEDULE_ID, EXAMINER_ID, VENUE_ID, idempotency_key="scan-1")
+
+    assert retry == first
+    assert _checkin_count(db) == 1
+
+    # 不同的幂等键是另一次扫码
+    with pytest.raises(ValueError, match="状态不允许签到"):
+        service.process_checkin(SCHEDULE_ID, EXAMINER_ID, VENUE_ID, idempotency_key="scan-2")
+
+
+def test_venue_mismatch_is_rejected(db):
+    with pytest.raises(ValueError, match="考场不匹配"):
+        WeChatService(db).process_checkin(SCHEDULE_ID, EXAMINER_ID, 2)
+
+    assert _checkin_count(db) == 0
+    assert db.get(Schedule, SCHEDULE_ID).status == ScheduleStatus.PENDING
@@ -0,0 +1,75 @@
+"""
+游标分页的翻页测试
+
+SQLite 中数据库生成的创建时间不带微秒、应用写入的时间带微秒，
+同一时间的两种写法混在一起时，逐页翻完应恰好返回每一行一次。
+"""
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.config.database import Base
+from app.models.institution import Institution
+from app.models.user import User, UserRole
+from app.models.venue import Venue
+from app.services.candidate_service import CandidateService
+from app.services.venue_service import VenueService
+
+ROWS = 25
+PAGE_SIZE = 4
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pagination.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Institution), [{"id": 1, "name": "机构1", "code": "INS001"}])
+        # 同一条语句插入的行 created_at 相同（CURRENT_TIMESTAMP，不带微秒）
+        conn.execute(insert(User), [
+            {"username": f"candidate{i}", "password_hash": "x", "real_name": f"考生{i}",
+             "role": UserRole.CANDIDATE, "institution_id": 1}
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(Venue), [
+            {"name": f"考场{i}", "code": f"V{i:03d}", "capacity": 5, "institution_id": 1}
+            for i in range(ROWS)
+        ])
+        # 由应用写入同一时间（带微秒的写法）
+        created = conn.execute(select(User.created_at).limit(1)).scalar()
+        conn.execute(insert(User), [
+            {"username": f"imported{i}", "password_hash": "x", "real_name": f"导入考生{i}",
+             "role": UserRole.CANDIDATE, "institution_id": 1, "created_at": created}
+            for i in range(ROWS)
+        ])
+
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _all_pages(fetch) -> list:
+    ids = []
+    cursor = None
+    for _ in range(ROWS * 2):
+        page = fetch(cursor)
+        ids.extend(item.id for item in page.items)
+        if not page.has_next:
+            return ids
+        cursor = page.next_cursor
+    pytest.fail(f"翻页未结束，已返回 {len(ids)} 行")
+
+
+def test_candidate_pages_with_tied_created_at(db):
+    service = CandidateService(db)
+    ids = _all_pages(lambda cursor: service.get_candidates(cursor=cursor, size=PAGE_SIZE))
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == ROWS * 2
+
+
+def test_venue_pages_with_tied_created_at(db):
+    service = VenueService(db)
+    ids = _all_pages(lambda cursor: service.get_venues(cursor=cursor, size=PAGE_SIZE))
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == ROWS
@@ -0,0 +1,106 @@
+"""
+权限矩阵：编译出的位掩码，以及版本号变化后的重新加载
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config.database import Base
+from app.config.settings import settings
+from app.core import permissions
+from app.core.init_rbac import assign_role_permissions, init_permissions, init_roles
+from app.core.permissions import RBAC_VERSION_KEY, PermissionEngine, compile_permissions
+from app.models.institution import Institution
+from app.models.rbac import Permission, Role, user_roles
+from app.models.user import User, UserRole
+
+STAFF_PERMISSIONS = {"checkin:create", "checkin:read", "candidate:read", "schedule:read", "venue:read"}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch, fake_redis):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rbac.db'}")
+    Base.metadata.create_all(engine)
+    # 权限引擎（包括 bump_permissions_version 触发的重新加载）读取测试库
+    monkeypatch.setattr(permissions, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(permissions, "permission_engine", PermissionEngine())
+    monkeypatch.setattr(settings, "rbac_version_check_interval", 0)
+
+    with Session(engine) as session:
+        init_permissions(session)
+        init_roles(session)
+        assign_role_permissions(session)
+        yield session
+    engine.dispose()
+
+
+def _user(user_id: int, role: UserRole) -> User:
+    return User(id=user_id, role=role)
+
+
+def _mask(matrix, names) -> int:
+    mask = 0
+    for name in names:
+        mask |= matrix.bits[name]
+    return mask
+
+
+def test_compiled_masks(db):
+    matrix = compile_permissions(db)
+
+    bits = list(matrix.bits.values())
+    assert len(set(bits)) == len(bits) == db.query(Permission).count()
+    assert all(bit & (bit - 1) == 0 for bit in bits)
+
+    assert matrix.role_masks["super_admin"] == _mask(matrix, matrix.bits)
+    assert matrix.role_masks["staff"] == _mask(matrix, STAFF_PERMISSIONS)
+
+    examiner = _user(10, UserRole.EXAMINER)
+    assert matrix.allows(examiner, "checkin:create")
+    assert not matrix.allows(examiner, "candidate:import")
+    assert not matrix.allows(examiner, "no:such_permission")
+    assert matrix.allows(_user(11, UserRole.OPERATOR), "candidate:import")
+    assert not matrix.allows(_user(12, UserRole.CANDIDATE), "checkin:create")
+
+
+def test_explicit_role_assignment_adds_permissions(db):
+    db.execute(insert(Institution).values(id=1, name="机构1", code="INS001"))
+    db.execute(insert(User).values(
+        id=20, username="operator", password_hash="x", real_name="机构用户", role=UserRole.OPERATOR, institution_id=1
+    ))
+    staff_id = db.query(Role.id).filter(Role.name == "staff").scalar()
+    db.execute(insert(user_roles).values(user_id=20, role_id=staff_id))
+    db.commit()
+
+    matrix = compile_permissions(db)
+    operator = _user(20, UserRole.OPERATOR)
+
+    assert matrix.user_masks[20] == matrix.role_masks["staff"]
+    # 角色枚举对应的角色与显式分配的角色取并集
+    assert matrix.allows(operator, "checkin:create")
+    assert matrix.allows(operator, "candidate:import")
+    assert not matrix.allows(_user(21, UserRole.OPERATOR), "checkin:create")
+
+
+def test_version_bump_reloads(db, fake_redis):
+    engine = PermissionEngine()
+    engine.load()
+    operator = _user(30, UserRole.OPERATOR)
+    assert not engine.allows(operator, "checkin:create")
+
+    role = db.query(Role).filter(Role.name == "institution_user").one()
+    role.permissions.append(db.query(Permission).filter(Permission.name == "checkin:create").one())
+    db.commit()
+
+    # 版本号未变：沿用已编译的矩阵
+    asyncio.run(engine.refresh())
+    assert not engine.allows(operator, "checkin:create")
+
+    # 其他进程提交变更后将版本号加1
+    fake_redis.incr(RBAC_VERSION_KEY)
+    asyncio.run(engine.refresh())
+    assert engine.allows(operator, "checkin:create")
+    assert engine.version == int(fake_redis.get(RBAC_VERSION_KEY))
@@ -0,0 +1,60 @@
+"""
+二维码令牌：编解码、签名校验、过期和类型检查
+"""
+
+import base64
+
+import pytest
+
+from app.utils.qrcode import QR_TOKEN_CANDIDATE, QR_TOKEN_VENUE, QRToken, decode_qr_token, encode_qr_token
+
+NOW = 1_793_000_000
+EXPIRES_AT = NOW + 600
+
+
+def test_round_trip():
+    token = encode_qr_token(QR_TOKEN_CANDIDATE, 12345, EXPIRES_AT, schedule_id=678)
+
+    assert token.isalnum() and token.isupper()
+    assert decode_qr_token(token, now=NOW) == QRToken(QR_TOKEN_CANDIDATE, 12345, 678, EXPIRES_AT)
+    # 扫码端可能转成小写或带空白
+    assert decode_qr_token(f" {token.lower()}\n", now=NOW).subject_id == 12345
+
+
+def test_round_trip_without_schedule():
+    token = encode_qr_token(QR_TOKEN_VENUE, 7, EXPIRES_AT)
+    assert decode_qr_token(token, now=NOW) == QRToken(QR_TOKEN_VENUE, 7, None, EXPIRES_AT)
+
+
+def test_tampered_token_is_rejected():
+    token = encode_qr_token(QR_TOKEN_CANDIDATE, 12345, EXPIRES_AT, schedule_id=678)
+    raw = bytearray(base64.b32decode(token + "=" * (-len(token) % 8)))
+
+    # 改主体ID（签名不变）和改签名都应被拒绝
+    for index in (5, len(raw) - 1):
+        tampered = bytearray(raw)
+        tampered[index] ^= 0x01
+        with pytest.raises(ValueError, match="二维码无效"):
+            decode_qr_token(base64.b32encode(bytes(tampered)).decode().rstrip("="), now=NOW)
+
+
+@pytest.mark.parametrize("token", ["", "NOT-A-TOKEN", "A" * 38, "A" * 40])
+def test_malformed_token_is_rejected(token):
+    with pytest.raises(ValueError, match="二维码无效"):
+        decode_qr_token(token, now=NOW)
+
+
+def test_expired_token_is_rejected():
+    token = encode_qr_token(QR_TOKEN_CANDIDATE, 12345, EXPIRES_AT, schedule_id=678)
+
+    assert decode_qr_token(token, now=EXPIRES_AT).expires_at == EXPIRES_AT
+    with pytest.raises(ValueError, match="已过期"):
+        decode_qr_token(token, now=EXPIRES_AT + 1)
+
+
+def test_wrong_token_type_is_rejected():
+    token = encode_qr_token(QR_TOKEN_VENUE, 12345, EXPIRES_AT, schedule_id=678)
+
+    assert decode_qr_token(token, now=NOW).token_type == QR_TOKEN_VENUE
+    with pytest.raises(ValueError, match="类型错误"):
+        decode_qr_token(token, now=NOW, token_type=QR_TOKEN_CANDIDATE)
@@ -0,0 +1,109 @@
+"""
+热点接口的SQL预算
+
+每个接口声明允许执行的SQL条数（包括认证时从数据库加载登录用户的一条查询），
+数据量足以让循环内的延迟加载（N+1查询）超出预算或触发重复语句检测。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.config.database import Base, SessionLocal, engine
+from app.config.settings import settings
+from app.core.profiler import statement_shape
+from app.models.exam import ExamProduct, ExamRegistration, RegistrationStatus, Schedule
+from app.models.institution import Institution
+from app.models.user import User, UserRole
+from app.models.venue import Venue
+from app.utils.security import create_access_token
+
+VENUES = 5
+CANDIDATES = 30
+START = datetime(2026, 11, 2, 8)
+
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Institution), [{"id": 1, "name": "机构1", "code": "INS001"}])
+        conn.execute(insert(ExamProduct), [
+            {"id": 1, "name": "多旋翼实操", "code": "P01", "duration_minutes": 15, "exam_type": "实操"}
+        ])
+        conn.execute(insert(Venue), [
+            {"id": i, "name": f"实操场{i}", "code": f"V{i:03d}", "capacity": 5, "institution_id": 1}
+            for i in range(1, VENUES + 1)
+        ])
+        conn.execute(insert(User), [
+            {"id": 1, "username": "admin", "password_hash": "x", "real_name": "管理员", "role": UserRole.ADMIN,
+             "institution_id": 1}
+        ] + [
+            {"id": 1 + i, "username": f"candidate{i}", "password_hash": "x", "real_name": f"考生{i}",
+             "role": UserRole.CANDIDATE, "id_card": f"11010119900101{i:04d}", "institution_id": 1}
+            for i in range(1, CANDIDATES + 1)
+        ])
+        conn.execute(insert(ExamRegistration), [
+            {"id": i, "user_id": 1 + i, "exam_product_id": 1, "registration_number": f"REG{i:08d}",
+             "candidate_number": f"CAN{i:08d}", "status": RegistrationStatus.APPROVED}
+            for i in range(1, CANDIDATES + 1)
+        ])
+        conn.execute(insert(Schedule), [
+            {"id": i, "registration_id": i, "exam_product_id": 1, "venue_id": i % VENUES + 1,
+             "schedule_date": START.replace(hour=0),
+             "start_time": START + timedelta(minutes=15 * (i // VENUES)),
+             "end_time": START + timedelta(minutes=15 * (i // VENUES + 1))}
+            for i in range(1, CANDIDATES + 1)
+        ])
+
+    with TestClient(app) as client:
+        client.headers["Authorization"] = f"Bearer {create_access_token({'user_id': 1})}"
+        yield client
+
+
+@pytest.mark.parametrize("path, budget", [
+    ("/api/v1/schedules/?size=20", 3),
+    ("/api/v1/schedules/1", 2),
+    ("/api/v1/candidates/?size=20", 2),
+    ("/api/v1/venues/", 2),
+    ("/api/v1/wechat/venues/status", 2),
+])
+def test_read_endpoint_within_budget(client, query_budget, path, budget):
+    with query_budget(budget):
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+
+
+def test_checkin_within_budget(client, query_budget):
+    with query_budget(6):
+        response = client.post("/api/v1/wechat/checkin", json={"schedule_id": 2, "venue_id": 3})
+    assert response.status_code == 200, response.text
+
+
+def test_budget_detects_lazy_loading(client, query_budget):
+    db = SessionLocal()
+    try:
+        with pytest.raises(AssertionError, match="N\\+1"):
+            with query_budget(100):
+                for schedule in db.query(Schedule).limit(10):
+                    schedule.registration.user.real_name
+    finally:
+        db.close()
+
+
+def test_profiler_headers(client, monkeypatch):
+    monkeypatch.setattr(settings, "sql_profiler_enabled", True)
+    response = client.get("/api/v1/schedules/1")
+    assert int(response.headers["X-Query-Count"]) > 0
+    assert int(response.headers["X-Query-Max-Repeats"]) == 1
+
+
+def test_statement_shape_ignores_parameters():
+    assert statement_shape("SELECT * FROM users WHERE id IN (?, ?, ?) AND name = 'a'") == \
+        statement_shape("SELECT *\n  FROM users WHERE id IN (?, ?) AND name = 'b'")
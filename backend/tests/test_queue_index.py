@@ -0,0 +1,99 @@
+"""
+排队索引：重建、同步和排队位置查询
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import redis
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import Session
+
+from app.config.database import Base
+from app.core.queue_index import READY_KEY, QueueEntry, get_queue_position, rebuild_queue, sync_queue
+from app.models.exam import ExamProduct, ExamRegistration, RegistrationStatus, Schedule, ScheduleStatus
+from app.models.institution import Institution
+from app.models.user import User, UserRole
+from app.models.venue import Venue
+
+START = datetime(2026, 11, 2, 8)
+CANDIDATES = 4
+
+
+@pytest.fixture
+def db(tmp_path, fake_redis):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Institution), [{"id": 1, "name": "机构1", "code": "INS001"}])
+        conn.execute(insert(ExamProduct), [
+            {"id": 1, "name": "多旋翼实操", "code": "P01", "duration_minutes": 15, "exam_type": "实操"}
+        ])
+        conn.execute(insert(Venue), [
+            {"id": i, "name": f"实操场{i}", "code": f"V{i:03d}", "capacity": 5, "institution_id": 1}
+            for i in (1, 2)
+        ])
+        conn.execute(insert(User), [
+            {"id": i, "username": f"candidate{i}", "password_hash": "x", "real_name": f"考生{i}",
+             "role": UserRole.CANDIDATE, "institution_id": 1}
+            for i in range(1, CANDIDATES + 1)
+        ])
+        conn.execute(insert(ExamRegistration), [
+            {"id": i, "user_id": i, "exam_product_id": 1, "registration_number": f"REG{i:08d}",
+             "candidate_number": f"CAN{i:08d}", "status": RegistrationStatus.APPROVED}
+            for i in range(1, CANDIDATES + 1)
+        ])
+        # 考生1-3在考场1依次排队，考生4在考场2
+        conn.execute(insert(Schedule), [
+            {"id": i, "registration_id": i, "exam_product_id": 1, "venue_id": 1 if i < 4 else 2,
+             "schedule_date": START.replace(hour=0),
+             "start_time": START + timedelta(minutes=15 * i),
+             "end_time": START + timedelta(minutes=15 * (i + 1))}
+            for i in range(1, CANDIDATES + 1)
+        ])
+
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def test_rebuild_marks_ready(db, fake_redis):
+    assert rebuild_queue(db) == CANDIDATES
+    assert fake_redis.exists(READY_KEY)
+
+
+def test_rebuild_stays_unready_when_sync_fails(db, fake_redis, monkeypatch):
+    def fail(self, *args, **kwargs):
+        raise redis.ConnectionError("connection reset")
+
+    monkeypatch.setattr(redis.client.Pipeline, "execute", fail)
+    assert rebuild_queue(db) is None
+    monkeypatch.undo()
+    assert not fake_redis.exists(READY_KEY)
+
+
+def test_position_unavailable_before_rebuild(db):
+    assert get_queue_position(1) == (False, None)
+
+
+def test_queue_position(db):
+    rebuild_queue(db)
+
+    assert get_queue_position(1) == (True, QueueEntry(1, "实操场1", 1, 1, 3))
+    assert get_queue_position(3) == (True, QueueEntry(1, "实操场1", 1, 3, 3))
+    assert get_queue_position(4) == (True, QueueEntry(2, "实操场2", 1, 1, 1))
+    # 没有待进行日程的考生
+    assert get_queue_position(99) == (True, None)
+
+
+def test_sync_moves_queue_forward(db):
+    rebuild_queue(db)
+
+    # 考生1签到：日程离开待进行状态，后面的考生前移
+    db.execute(update(Schedule).where(Schedule.id == 1).values(status=ScheduleStatus.IN_PROGRESS))
+    db.commit()
+    assert sync_queue(db, Schedule.id == 1) == 1
+
+    assert get_queue_position(1) == (True, None)
+    assert get_queue_position(2) == (True, QueueEntry(1, "实操场1", 1, 1, 2))
+    assert get_queue_position(3) == (True, QueueEntry(1, "实操场1", 1, 2, 2))
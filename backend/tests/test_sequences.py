@@ -0,0 +1,66 @@
+"""
+序号分配：多个分配器（多进程）的序号块互不重叠
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.config.database import Base
+from app.config.settings import settings
+from app.core import sequences
+from app.core.sequences import SequenceAllocator, reserve
+from app.models.sequence import Sequence
+
+NAME = "test_number"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sequences.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(sequences, "engine", engine)
+    monkeypatch.setattr(settings, "sequence_block_size", 5)
+    yield engine
+    engine.dispose()
+
+
+def _next_value(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(Sequence.next_value).where(Sequence.name == NAME)).scalar_one()
+
+
+def test_missing_sequence_is_created(engine):
+    assert reserve(NAME, 3) == 1
+    assert _next_value(engine) == 4
+    assert reserve(NAME, 2) == 4
+    assert _next_value(engine) == 6
+
+
+def test_reserve_rejects_empty_block(engine):
+    with pytest.raises(ValueError):
+        reserve(NAME, 0)
+
+
+def test_allocators_never_overlap(engine):
+    # 每个分配器代表一个进程，并发取号并穿插批量分配
+    allocators = [SequenceAllocator() for _ in range(3)]
+
+    def work(allocator):
+        singles, bulk = [], []
+        for i in range(40):
+            singles.append(allocator.next_value(NAME))
+            if i % 10 == 0:
+                bulk.extend(allocator.allocate(NAME, 3))
+        return singles, bulk
+
+    with ThreadPoolExecutor(max_workers=len(allocators)) as pool:
+        results = list(pool.map(work, allocators))
+
+    values = [value for singles, bulk in results for value in singles + bulk]
+    assert len(values) == len(set(values)) == 3 * (40 + 4 * 3)
+    # 同一分配器的单个序号在块内依次递增
+    for singles, _ in results:
+        assert singles == sorted(singles)
+    assert max(values) < _next_value(engine)
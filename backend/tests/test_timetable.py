@@ -0,0 +1,69 @@
+"""
+排期优化：同一考生的考试时间互不重叠
+"""
+
+from datetime import datetime, timedelta
+
+from app.core.timetable import EXAM_TYPE_PRACTICAL, EXAM_TYPE_THEORY, PlanRegistration, PlanVenue, plan_timetable
+
+DAY_START = datetime(2026, 11, 2, 8)
+DAY_END = datetime(2026, 11, 2, 18)
+
+
+def _candidate_intervals(plan, registrations) -> dict:
+    users = {registration.registration_id: registration.user_id for registration in registrations}
+    intervals = {}
+    for registration_id, _, _, start, end in plan.assignments:
+        intervals.setdefault(users[registration_id], []).append((start, end))
+    return intervals
+
+
+def _assert_no_overlap(intervals) -> None:
+    for user_id, items in intervals.items():
+        items.sort()
+        for (_, previous_end), (start, _) in zip(items, items[1:]):
+            assert start >= previous_end, f"考生 {user_id} 的考试时间重叠: {items}"
+
+
+def test_candidate_exams_do_not_overlap():
+    # 每名考生同时报了理论和实操，理论考场和实操考场都从8点开始可用
+    registrations = []
+    for user_id in range(1, 11):
+        registrations.append(PlanRegistration(user_id * 10, user_id, 1, 60, EXAM_TYPE_THEORY))
+        registrations.append(PlanRegistration(user_id * 10 + 1, user_id, 2, 15, EXAM_TYPE_PRACTICAL))
+    venues = [
+        PlanVenue(1, EXAM_TYPE_THEORY, 20, [(DAY_START, DAY_END)]),
+        PlanVenue(2, EXAM_TYPE_PRACTICAL, 1, [(DAY_START, DAY_END)]),
+        PlanVenue(3, EXAM_TYPE_PRACTICAL, 1, [(DAY_START, DAY_END)]),
+    ]
+
+    plan = plan_timetable(registrations, venues)
+
+    assert not plan.unscheduled
+    _assert_no_overlap(_candidate_intervals(plan, registrations))
+
+
+def test_existing_schedules_are_avoided():
+    registrations = [PlanRegistration(i, i, 1, 30, EXAM_TYPE_PRACTICAL) for i in range(1, 4)]
+    venues = [PlanVenue(1, EXAM_TYPE_PRACTICAL, 1, [(DAY_START, DAY_END)])]
+    existing = {1: [(DAY_START, DAY_START + timedelta(hours=2))]}
+
+    plan = plan_timetable(registrations, venues, existing)
+
+    starts = {registration_id: start for registration_id, _, _, start, _ in plan.assignments}
+    assert starts[1] >= DAY_START + timedelta(hours=2)
+    # 考场不因考生1空等：其他考生先排
+    assert min(starts.values()) == DAY_START
+
+
+def test_theory_session_seats_only_free_candidates():
+    registrations = [PlanRegistration(i, i, 1, 60, EXAM_TYPE_THEORY) for i in range(1, 5)]
+    venues = [PlanVenue(1, EXAM_TYPE_THEORY, 10, [(DAY_START, DAY_END)])]
+    existing = {2: [(DAY_START, DAY_START + timedelta(minutes=30))]}
+
+    plan = plan_timetable(registrations, venues, existing)
+
+    assert not plan.unscheduled
+    starts = {registration_id: start for registration_id, _, _, start, _ in plan.assignments}
+    assert starts[1] == starts[3] == starts[4] == DAY_START
+    assert starts[2] >= DAY_START + timedelta(minutes=30)
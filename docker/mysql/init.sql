@@ -168,6 +168,8 @@ CREATE INDEX IF NOT EXISTS `idx_users_email` ON `users` (`email`);
 CREATE INDEX IF NOT EXISTS `idx_users_role` ON `users` (`role`);
 CREATE INDEX IF NOT EXISTS `idx_users_institution` ON `users` (`institution_id`);
 CREATE INDEX IF NOT EXISTS `idx_users_wechat_openid` ON `users` (`wechat_openid`);
+CREATE INDEX IF NOT EXISTS `idx_users_role_institution_created` ON `users` (`role`, `institution_id`, `created_at`);
+CREATE INDEX IF NOT EXISTS `idx_users_id_card` ON `users` (`id_card`);
 
 CREATE INDEX IF NOT EXISTS `idx_institutions_code` ON `institutions` (`code`);
 CREATE INDEX IF NOT EXISTS `idx_institutions_active` ON `institutions` (`is_active`);
@@ -184,12 +186,15 @@ CREATE INDEX IF NOT EXISTS `idx_exam_registrations_user` ON `exam_registrations`
 CREATE INDEX IF NOT EXISTS `idx_exam_registrations_product` ON `exam_registrations` (`exam_product_id`);
 CREATE INDEX IF NOT EXISTS `idx_exam_registrations_status` ON `exam_registrations` (`status`);
 CREATE INDEX IF NOT EXISTS `idx_exam_registrations_number` ON `exam_registrations` (`registration_number`);
+CREATE INDEX IF NOT EXISTS `idx_exam_registrations_user_status` ON `exam_registrations` (`user_id`, `status`);
 
 CREATE INDEX IF NOT EXISTS `idx_schedules_registration` ON `schedules` (`registration_id`);
 CREATE INDEX IF NOT EXISTS `idx_schedules_venue` ON `schedules` (`venue_id`);
 CREATE INDEX IF NOT EXISTS `idx_schedules_date` ON `schedules` (`schedule_date`);
 CREATE INDEX IF NOT EXISTS `idx_schedules_status` ON `schedules` (`status`);
 CREATE INDEX IF NOT EXISTS `idx_schedules_time` ON `schedules` (`start_time`, `end_time`);
+CREATE INDEX IF NOT EXISTS `idx_schedules_venue_status_start` ON `schedules` (`venue_id`, `status`, `start_time`, `end_time`);
+CREATE INDEX IF NOT EXISTS `idx_schedules_registration_status` ON `schedules` (`registration_id`, `status`);
 
 CREATE INDEX IF NOT EXISTS `idx_checkins_user` ON `checkins` (`user_id`);
 CREATE INDEX IF NOT EXISTS `idx_checkins_venue` ON `checkins` (`venue_id`);
@@ -5,10 +5,13 @@ import request from './index'
 import { API_ENDPOINTS } from './config'
 
 /**
- * 获取考生列表
+ * 获取考生列表（游标分页）
+ * 返回 { items, size, next_cursor, has_next, total }，翻页时将 next_cursor 作为 cursor 传入，
+ * 每页耗时与翻到第几页无关；total 只在 with_total 为 true 时返回，一般只在首页请求
  * @param {Object} params - 查询参数
- * @param {number} params.skip - 跳过数量
- * @param {number} params.limit - 限制数量
+ * @param {string} params.cursor - 上一页返回的 next_cursor，首页不传
+ * @param {number} params.size - 每页数量（最大100）
+ * @param {boolean} params.with_total - 是否返回总数
  * @param {number} params.institution_id - 机构ID
  * @param {number} params.exam_product_id - 考试产品ID
  * @param {string} params.status - 状态
@@ -75,12 +78,16 @@ export function deleteCandidate(id) {
 }
 
 /**
- * 批量导入考生
- * @param {File} file - Excel文件
+ * 提交考生批量导入任务，返回任务ID（通过 api/job 查询进度）
+ * @param {File} file - Excel或CSV文件
+ * @param {number} institutionId - 机构ID（机构用户可不传）
  */
-export function batchImportCandidates(file) {
+export function batchImportCandidates(file, institutionId) {
   const formData = new FormData()
   formData.append('file', file)
+  if (institutionId) {
+    formData.append('institution_id', institutionId)
+  }
   
   return request({
     url: API_ENDPOINTS.CANDIDATES.BATCH_IMPORT,
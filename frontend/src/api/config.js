@@ -75,6 +75,13 @@ export const API_ENDPOINTS = {
     DASHBOARD: '/api/v1/wechat/dashboard'
   },
   
+  // 后台任务
+  JOBS: {
+    DETAIL: (id) => `/api/v1/jobs/${id}`,
+    CANCEL: (id) => `/api/v1/jobs/${id}/cancel`,
+    RESULT: (id) => `/api/v1/jobs/${id}/result`
+  },
+  
   // 公共接口
   PUBLIC: {
     VENUES_STATUS: '/api/v1/public/venues/status',
@@ -0,0 +1,59 @@
+/**
+ * 后台任务API
+ */
+import request from './index'
+import { API_ENDPOINTS } from './config'
+
+/**
+ * 查询任务进度
+ * @param {string} id - 任务ID
+ */
+export function getJob(id) {
+  return request({
+    url: API_ENDPOINTS.JOBS.DETAIL(id),
+    method: 'get'
+  })
+}
+
+/**
+ * 取消任务
+ * @param {string} id - 任务ID
+ */
+export function cancelJob(id) {
+  return request({
+    url: API_ENDPOINTS.JOBS.CANCEL(id),
+    method: 'post'
+  })
+}
+
+/**
+ * 下载任务结果
+ * @param {string} id - 任务ID
+ */
+export function downloadJobResult(id) {
+  return request({
+    url: API_ENDPOINTS.JOBS.RESULT(id),
+    method: 'get',
+    responseType: 'blob'
+  })
+}
+
+/**
+ * 轮询任务直到结束
+ * @param {string} id - 任务ID
+ * @param {Function} onProgress - 每次查询后的回调
+ * @param {number} interval - 轮询间隔（毫秒）
+ */
+export async function waitForJob(id, onProgress, interval = 1000) {
+  const finished = ['succeeded', 'failed', 'cancelled']
+  for (;;) {
+    const { data: job } = await getJob(id)
+    if (onProgress) {
+      onProgress(job)
+    }
+    if (finished.includes(job.status)) {
+      return job
+    }
+    await new Promise(resolve => setTimeout(resolve, interval))
+  }
+}
@@ -77,12 +77,18 @@ Page({
 
   // 处理二维码数据
   processQRCode(qrData) {
+    // 考生二维码为签名令牌（大写字母和数字），由服务端校验签名和有效期
+    if (/^[A-Z2-7]+$/.test(qrData)) {
+      this.performCheckin({ qr_token: qrData })
+      return
+    }
+
     try {
       const data = JSON.parse(qrData)
       console.log('二维码数据', data)
       
       if (data.type === 'candidate' && data.schedule_id) {
-        this.performCheckin(data.schedule_id)
+        this.performCheckin({ schedule_id: data.schedule_id })
       } else {
         wx.showToast({
           title: '无效的二维码',
@@ -98,8 +104,8 @@ Page({
     }
   },
 
-  // 执行签到
-  performCheckin(scheduleId) {
+  // 执行签到（每次扫码生成一个幂等键，网络失败重试时保持不变，避免重复签到）
+  performCheckin(target, idempotencyKey = this.createIdempotencyKey(), retries = 2) {
     wx.showLoading({
       title: '签到中...'
     })
@@ -112,8 +118,9 @@ Page({
         'Authorization': `Bearer ${wx.getStorageSync('access_token')}`
       },
       data: {
-        schedule_id: scheduleId,
-        venue_id: 1 // 这里应该根据实际情况获取考场ID
+        ...target,
+        venue_id: 1, // 这里应该根据实际情况获取考场ID
+        idempotency_key: idempotencyKey
       },
       success: (res) => {
         console.log('签到响应', res.data)
@@ -140,6 +147,10 @@ Page({
       fail: (err) => {
         console.error('签到失败', err)
         wx.hideLoading()
+        if (retries > 0) {
+          setTimeout(() => this.performCheckin(target, idempotencyKey, retries - 1), 1000)
+          return
+        }
         wx.showToast({
           title: '网络错误',
           icon: 'error'
@@ -148,6 +159,11 @@ Page({
     })
   },
 
+  // 生成幂等键
+  createIdempotencyKey() {
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`
+  },
+
   // 加载最近签到记录
   loadRecentCheckins() {
     // 模拟数据，实际应该从服务器获取
@@ -3,6 +3,9 @@
  */
 const app = getApp()
 
+// 推送连接断开期间轮询的间隔（毫秒）
+const POLL_INTERVAL = 10000
+
 Page({
   data: {
     venues: [],
@@ -19,28 +22,139 @@ Page({
   onLoad() {
     console.log('考场状态页面加载')
     this.loadVenuesData()
-    
-    // 设置定时刷新（每10秒）
-    this.timer = setInterval(() => {
-      this.loadVenuesData(false)
-    }, 10000)
   },
 
   onUnload() {
-    // 清除定时器
-    if (this.timer) {
-      clearInterval(this.timer)
-    }
+    this.closeSocket()
   },
 
   onShow() {
-    this.loadVenuesData()
+    // 通过WebSocket接收服务端推送的考场状态，连接断开期间回退到定时轮询
+    this.connectSocket()
+  },
+
+  onHide() {
+    this.closeSocket()
   },
 
   onPullDownRefresh() {
     this.loadVenuesData(true)
   },
 
+  // 建立考场状态推送连接
+  connectSocket() {
+    if (this.socket) {
+      return
+    }
+    this.socketClosed = false
+
+    const socket = wx.connectSocket({
+      url: `${app.globalData.apiBaseUrl.replace(/^http/, 'ws')}/wechat/venues/ws`
+    })
+    this.socket = socket
+
+    socket.onOpen(() => {
+      console.log('考场状态推送已连接')
+      this.retryDelay = 1000
+      // 连接后先收到全量快照，不再需要轮询
+      this.stopPolling()
+    })
+
+    socket.onMessage((res) => {
+      const message = JSON.parse(res.data)
+      if (message.type === 'snapshot') {
+        this.setVenues(message.venues)
+      } else if (message.type === 'delta') {
+        this.applyDelta(message)
+      }
+    })
+
+    socket.onError((err) => {
+      console.error('考场状态推送连接失败', err)
+    })
+
+    socket.onClose(() => {
+      this.socket = null
+      if (this.socketClosed) {
+        return
+      }
+      // 断线期间回退到定时轮询，重连成功后停止
+      this.startPolling()
+      // 断线后指数退避重连，最长30秒
+      const delay = this.retryDelay || 1000
+      this.retryDelay = Math.min(delay * 2, 30000)
+      this.reconnectTimer = setTimeout(() => this.connectSocket(), delay)
+    })
+  },
+
+  // 关闭考场状态推送连接
+  closeSocket() {
+    this.socketClosed = true
+    this.stopPolling()
+    if (this.reconnectTimer) {
+      clearTimeout(this.reconnectTimer)
+      this.reconnectTimer = null
+    }
+    if (this.socket) {
+      this.socket.close()
+      this.socket = null
+    }
+  },
+
+  // 开始定时轮询考场状态
+  startPolling() {
+    if (this.pollTimer) {
+      return
+    }
+    this.pollTimer = setInterval(() => {
+      this.loadVenuesData(false)
+    }, POLL_INTERVAL)
+  },
+
+  // 停止定时轮询
+  stopPolling() {
+    if (this.pollTimer) {
+      clearInterval(this.pollTimer)
+      this.pollTimer = null
+    }
+  },
+
+  // 合并增量推送
+  applyDelta(message) {
+    const changed = {}
+    message.venues.forEach(venue => {
+      changed[venue.venue_id] = venue
+    })
+
+    const venues = this.data.venues
+      .filter(venue => !message.removed.includes(venue.venue_id))
+      .map(venue => changed[venue.venue_id] || venue)
+
+    message.venues.forEach(venue => {
+      if (!venues.some(v => v.venue_id === venue.venue_id)) {
+        venues.push(venue)
+      }
+    })
+    venues.sort((a, b) => a.venue_id - b.venue_id)
+
+    this.setVenues(venues)
+  },
+
+  // 更新考场列表
+  setVenues(venues) {
+    this.setData({
+      venues: venues.map(venue => ({
+        ...venue,
+        status_color: this.getStatusColor(venue.status),
+        status_text: this.getStatusText(venue.status)
+      })),
+      updateTime: new Date().toLocaleTimeString()
+    })
+
+    // 计算汇总信息
+    this.calculateSummary()
+  },
+
   // 加载考场数据
   loadVenuesData(showLoading = true) {
     if (showLoading) {
@@ -56,17 +170,7 @@ Page({
       success: (res) => {
         console.log('获取考场状态成功', res.data)
         if (res.statusCode === 200) {
-          this.setData({
-            venues: res.data.map(venue => ({
-              ...venue,
-              status_color: this.getStatusColor(venue.status),
-              status_text: this.getStatusText(venue.status)
-            })),
-            updateTime: new Date().toLocaleTimeString()
-          })
-          
-          // 计算汇总信息
-          this.calculateSummary()
+          this.setVenues(res.data)
         }
       },
       fail: (err) => {